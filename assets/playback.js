@@ -0,0 +1,153 @@
+// Lecture dans le navigateur (Mosqui'Track) : les positions des objets sélectionnés sont
+// envoyées par blocs (playback_chunk dans src/utils.py) et les marqueurs des vues XY/XZ/YZ/3D
+// sont déplacés ici à chaque tick de "client-interval", sans aller-retour avec le serveur.
+
+(function () {
+    // Bloc courant décodé, réutilisé tant que le serveur n'en envoie pas un nouveau
+    var decoded = {chunk: null, positions: null};
+
+    function decodePositions(chunk) {
+        if (decoded.chunk === chunk) {
+            return decoded.positions;
+        }
+        var binary = atob(chunk.positions);
+        var bytes = new Uint8Array(binary.length);
+        for (var i = 0; i < binary.length; i++) {
+            bytes[i] = binary.charCodeAt(i);
+        }
+        decoded = {chunk: chunk, positions: new Float32Array(bytes.buffer)};
+        return decoded.positions;
+    }
+
+    // Div plotly d'une vue spatiale (id dash {"type": "view-graph", "view": ...})
+    function viewGraph(view) {
+        var element = document.getElementById(JSON.stringify({type: "view-graph", view: view}));
+        if (!element) {
+            return null;
+        }
+        return element.classList.contains("js-plotly-plot") ? element : element.querySelector(".js-plotly-plot");
+    }
+
+    // Traces de chaque vue déjà préparées pour la lecture (voir freezeOverlays), par bloc reçu
+    var prepared = new WeakMap();
+
+    // Pendant la lecture, seules les positions suivent la frame : les vecteurs sont masqués et les
+    // marqueurs reprennent la couleur de leur objet, sans étoiles ni échelle de couleur. La pause
+    // renvoie l'instant atteint au serveur, dont la mise à jour remplace ces traces.
+    function freezeOverlays(graph, first, nObjects, batched, colors) {
+        if (prepared.get(graph.data) === colors) {
+            return;
+        }
+        prepared.set(graph.data, colors);
+
+        var markers = batched ? [first] : [];
+        for (var j = 0; !batched && j < nObjects; j++) {
+            markers.push(first + j);
+        }
+        window.Plotly.restyle(graph, {
+            "marker.color": batched ? [colors] : colors,
+            "marker.symbol": "circle",
+            "marker.showscale": false
+        }, markers);
+
+        var vectors = [];
+        for (var i = markers[markers.length - 1] + 1; i < graph.data.length; i++) {
+            if (graph.data[i].mode === "lines") {
+                vectors.push(i);
+            }
+        }
+        if (vectors.length) {
+            window.Plotly.restyle(graph, {visible: false}, vectors);
+        }
+    }
+
+    // Déplace les marqueurs d'une vue : traces consécutives à partir de la première en mode 'markers',
+    // ou une seule trace (un point par objet) en rendu groupé
+    function moveMarkers(graph, axes, positions, frameOffset, nObjects, batched, colors) {
+        var first = -1;
+        for (var i = 0; i < graph.data.length; i++) {
+            if (graph.data[i].mode === "markers") {
+                first = i;
+                break;
+            }
+        }
+        if (first < 0 || (!batched && first + nObjects > graph.data.length)) {
+            return;
+        }
+        freezeOverlays(graph, first, nObjects, batched, colors);
+
+        var keys = ["x", "y", "z"].slice(0, axes.length);
+        var update = {};
+        keys.forEach(function (key) { update[key] = []; });
+        if (batched) {
+            keys.forEach(function (key, a) {
+                var values = [];
+                for (var j = 0; j < nObjects; j++) {
+                    var value = positions[(frameOffset * nObjects + j) * 3 + axes[a]];
+                    values.push(isNaN(value) ? null : value);
+                }
+                update[key].push(values);
+            });
+            window.Plotly.restyle(graph, update, [first]);
+            return;
+        }
+
+        var indices = [];
+        for (var j = 0; j < nObjects; j++) {
+            var base = (frameOffset * nObjects + j) * 3;
+            var present = !isNaN(positions[base]);
+            keys.forEach(function (key, a) {
+                update[key].push(present ? [positions[base + axes[a]]] : []);
+            });
+            indices.push(first + j);
+        }
+        window.Plotly.restyle(graph, update, indices);
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        moustic: {
+            /*
+             * Tick de lecture : la frame affichée suit l'horloge (période d'échantillonnage des
+             * données), les ticks en retard sautent des frames au lieu de ralentir la lecture.
+             *
+             * Retour : [état de la lecture, demande du bloc suivant, temps affiché]
+             */
+            playbackTick: function (n_intervals, chunk, state) {
+                var noUpdate = window.dash_clientside.no_update;
+                if (!chunk || !window.Plotly) {
+                    return [noUpdate, noUpdate, noUpdate];
+                }
+
+                var now = performance.now();
+                if (!state || state.session !== chunk.session) {
+                    state = {session: chunk.session, wall: now, start: chunk.start_frame, requested: null};
+                }
+
+                var end = chunk.start_frame + chunk.n_frames - 1;
+                var frame = state.start + Math.floor((now - state.wall) / (1000 * chunk.period));
+                frame = Math.max(chunk.start_frame, Math.min(frame, end));
+
+                // Bloc suivant demandé aux trois quarts du bloc courant, à partir de la frame affichée
+                var request = noUpdate;
+                var threshold = chunk.start_frame + Math.floor(chunk.n_frames * 3 / 4);
+                if (end < chunk.last_frame && frame >= threshold && state.requested !== chunk.start_frame) {
+                    request = {session: chunk.session, frame: frame};
+                    state = Object.assign({}, state, {requested: chunk.start_frame});
+                }
+
+                var positions = decodePositions(chunk);
+                Object.keys(chunk.axes).forEach(function (view) {
+                    var graph = viewGraph(view);
+                    if (graph && graph.data) {
+                        moveMarkers(graph, chunk.axes[view], positions, frame - chunk.start_frame, chunk.n_objects,
+                                    chunk.batched, chunk.colors);
+                    }
+                });
+
+                var time = chunk.t0 + frame * chunk.period;
+                state = Object.assign({}, state, {frame: frame, time: time});
+                return [state, request, "t = " + time.toFixed(2) + " s"];
+            }
+        }
+    });
+})();
@@ -1,3 +1,4 @@
+import io
 import os
 import platform
 import subprocess
@@ -10,11 +11,12 @@ import sys
 import json
 
 from dash import html, dcc, dash_table
-from dash import Input, Output, State, callback_context, callback
+from dash import Input, Output, State, ALL, MATCH, ClientsideFunction, callback_context, callback, no_update
 import dash_bootstrap_components as dbc
 
 from .utils import *
 from .utils import parse_contents
+from .ingest import write_tables_zip
 from .layout import *
 from .generate_video import VideoRecorderApp, render_frame, ajuster_temps
 from dash import Input, Output, State, callback
@@ -22,28 +24,88 @@ from dash import Input, Output, State, callback
 
 random.seed(42)
 
+def dataset_outputs(allow_duplicate=False):
+    """
+    Sorties alimentées au chargement d'un jeu de données, par téléversement (update_output) ou
+    depuis le dossier de données (poll_local_load).
+    """
+    return [
+        Output('upload-data-storage', 'data', allow_duplicate=True),
+        Output('object-colors-storage', 'data', allow_duplicate=allow_duplicate),
+        Output('axis-ranges-storage', 'data', allow_duplicate=allow_duplicate),
+        Output('upload-status', 'children', allow_duplicate=allow_duplicate),
+        Output('time-slider', 'min', allow_duplicate=allow_duplicate),
+        Output('time-slider', 'max', allow_duplicate=allow_duplicate),
+        Output('time-slider', 'value', allow_duplicate=allow_duplicate),
+        Output('time-slider', 'disabled', allow_duplicate=allow_duplicate),
+        Output('manual-time', 'disabled', allow_duplicate=allow_duplicate),
+        Output('manual-time', 'value', allow_duplicate=allow_duplicate),
+        Output('start-stop-button', 'disabled', allow_duplicate=allow_duplicate),
+        Output('analyze-couples', 'disabled', allow_duplicate=allow_duplicate),
+        Output('download-button', 'disabled', allow_duplicate=allow_duplicate),
+        Output('select-all', 'disabled', allow_duplicate=allow_duplicate),
+        Output('deselect-all', 'disabled', allow_duplicate=allow_duplicate),
+        Output('object-checklist', 'options', allow_duplicate=allow_duplicate),
+        Output('object-checklist', 'value', allow_duplicate=True),
+        Output('file-info', 'children', allow_duplicate=allow_duplicate),
+        Output('frame-grid-storage', 'data', allow_duplicate=allow_duplicate),
+        Output('time-slider', 'step', allow_duplicate=allow_duplicate),
+        Output('manual-time', 'step', allow_duplicate=allow_duplicate),
+        Output('group-traces', 'value', allow_duplicate=allow_duplicate)
+    ]
+
+
+def empty_dataset_values(status_message=""):
+    """Valeurs de dataset_outputs sans jeu de données (aucun fichier ou erreur de chargement)."""
+    return None, None, None, status_message, 0, 10, 0, True, True, 0, True, True, True, True, True, "", "", None, None, 0.02, 0.02, []
+
+
+def dataset_values(dataset_id, df, obj_colors, status_message, filename):
+    """Valeurs de dataset_outputs pour un jeu de données chargé et conservé sous dataset_id."""
+    # Grille de frames : le curseur et la lecture avancent d'une période d'échantillonnage
+    grid = prepared_grid(df)
+    t_min = grid.to_time(int(df['frame'].min()))
+    t_max = grid.to_time(int(df['frame'].max()))
+
+    # Calcul des limites des axes
+    axis_ranges = {
+        'x_min': df['XSplined'].min(), 'x_max': df['XSplined'].max(),
+        'y_min': df['YSplined'].min(), 'y_max': df['YSplined'].max(),
+        'z_min': df['ZSplined'].min(), 'z_max': df['ZSplined'].max()
+    }
+
+    # Préparer la liste des objets uniques triés
+    sorted_objects = sorted(df['object'].unique(), key=lambda x: int(x))
+
+    # Informations sur le fichier
+    file_info = html.Div([
+        html.P(f"File: {filename}"),
+        html.P(f"Number of objects: {len(sorted_objects)}"),
+        html.P(f"Time range: {df['time'].min():.2f} à {df['time'].max():.2f}")
+    ])
+
+    return (dataset_id,
+            obj_colors,
+            axis_ranges,
+            status_message,
+            t_min,
+            t_max,
+            t_min,
+            False, False, t_min,
+            False, False, False, False, False,
+            [{"label": str(obj), "value": obj} for obj in sorted_objects],
+            sorted_objects,
+            file_info,
+            grid.to_dict(),
+            grid.step,
+            grid.step,
+            # Rendu groupé coché d'office pour les grands jeux de données (l'option reste décochable)
+            ["group"] if len(sorted_objects) >= BATCH_OBJECT_THRESHOLD else [])
+
+
 def register_callbacks(app):
     @app.callback(
-        [
-            Output('upload-data-storage', 'data', allow_duplicate=True),
-            Output('object-colors-storage', 'data'),
-            Output('axis-ranges-storage', 'data'),
-            Output('upload-status', 'children'),
-            Output('time-slider', 'min'),
-            Output('time-slider', 'max'),
-            Output('time-slider', 'value'),
-            Output('time-slider', 'disabled'),
-            Output('manual-time', 'disabled'),
-            Output('manual-time', 'value'),
-            Output('start-stop-button', 'disabled'),
-            Output('analyze-couples', 'disabled'),
-            Output('download-button', 'disabled'),
-            Output('select-all', 'disabled'),
-            Output('deselect-all', 'disabled'),
-            Output('object-checklist', 'options'),
-            Output('object-checklist', 'value', allow_duplicate=True),
-            Output('file-info', 'children')
-        ],
+        dataset_outputs(),
         Input('upload-data', 'contents'),
         State('upload-data', 'filename'),
         prevent_initial_call=True
@@ -51,52 +113,78 @@ def register_callbacks(app):
     def update_output(contents, filename):
         if contents is None:
             # Valeurs par défaut si aucun fichier n'est chargé
-            return None, None, None, "", 0, 10, 0, True, True, 0, True, True, True, True, True, "", ""
+            return empty_dataset_values()
 
-        df, obj_colors, status_message = parse_contents(contents, filename)
+        df, obj_colors, status_message, dataset_id = parse_contents(contents, filename)
 
         if df is None:
             # En cas d'erreur lors du chargement du fichier
-            return None, None, None, status_message, 0, 10, 0, True, True, 0, True, True, True, True, True, "", ""
-
-        # Calcul des limites des axes
-        axis_ranges = {
-            'x_min': df['XSplined'].min(), 'x_max': df['XSplined'].max(),
-            'y_min': df['YSplined'].min(), 'y_max': df['YSplined'].max(),
-            'z_min': df['ZSplined'].min(), 'z_max': df['ZSplined'].max()
-        }
-
-        # Préparer la liste des objets uniques triés
-        sorted_objects = sorted(df['object'].unique(), key=lambda x: int(x))
-
-        # Création de la checklist des objets
-        object_checklist = dbc.Checklist(
-            id="object-checklist",
-            options=[{"label": str(obj), "value": obj} for obj in sorted_objects],
-            value=sorted_objects,  # Tous cochés par défaut
-            inline=False,
-            style={"maxHeight": "400px", "overflowY": "auto", "fontSize": "0.85em"}
-        )
+            return empty_dataset_values(status_message)
 
-        # Informations sur le fichier
-        file_info = html.Div([
-            html.P(f"File: {filename}"),
-            html.P(f"Number of objects: {len(sorted_objects)}"),
-            html.P(f"Time range: {df['time'].min():.2f} à {df['time'].max():.2f}")
-        ])
+        # Le DataFrame reste côté serveur : seul son identifiant est stocké dans le navigateur
+        put_dataset(dataset_id, df)
+        return dataset_values(dataset_id, df, obj_colors, status_message, filename)
 
-        return (df.to_json(),
-                obj_colors,
-                axis_ranges,
-                status_message,
-                df['time'].min(),
-                df['time'].max(),
-                df['time'].min(),
-                False, False, df['time'].min(),
-                False, False, False, False, False,
-                [{"label": str(obj), "value": obj} for obj in sorted_objects],
-                sorted_objects,
-                file_info)
+    @app.callback(
+        Output('local-load-job', 'data'),
+        Output('local-load-interval', 'disabled'),
+        Output('local-load-progress', 'value'),
+        Output('local-load-progress', 'label'),
+        Output('local-load-status', 'children'),
+        Input('load-local-button', 'n_clicks'),
+        State('local-file-path', 'value'),
+        prevent_initial_call=True
+    )
+    def start_local_file_load(n_clicks, name):
+        # Le fichier est lu côté serveur, dans un fil d'exécution : le navigateur ne fait que suivre l'avancement
+        if not name:
+            return None, True, 0, "", "Please choose a file of the data folder."
+        try:
+            job_id = start_local_load(name)
+        except ValueError as e:
+            return None, True, 0, "", str(e)
+        return job_id, False, 0, "0 %", ""
+
+    @app.callback(
+        Output('local-file-path', 'options'),
+        Input('refresh-local-files', 'n_clicks'),
+        prevent_initial_call=True
+    )
+    def refresh_local_files(n_clicks):
+        return list_data_files()
+
+    @app.callback(
+        dataset_outputs(allow_duplicate=True) + [
+            Output('local-load-interval', 'disabled', allow_duplicate=True),
+            Output('local-load-progress', 'value', allow_duplicate=True),
+            Output('local-load-progress', 'label', allow_duplicate=True),
+            Output('local-load-status', 'children', allow_duplicate=True),
+        ],
+        Input('local-load-interval', 'n_intervals'),
+        State('local-load-job', 'data'),
+        State('local-file-path', 'value'),
+        prevent_initial_call=True
+    )
+    def poll_local_load(n_intervals, job_id, name):
+        n_outputs = len(dataset_outputs())
+        job = get_load_job(job_id) if job_id else None
+
+        if job is None:
+            return (no_update,) * n_outputs + (True, 0, "", "")
+
+        percent = int(round(100 * job["progress"]))
+        if not job["done"]:
+            return (no_update,) * n_outputs + (False, percent, f"{percent} %", job["stage"])
+
+        if job["error"]:
+            return (no_update,) * n_outputs + (True, 0, "", job["error"])
+
+        dataset_id, obj_colors, status_message = job["result"]
+        df = get_dataset(dataset_id)
+        if df is None:
+            return (no_update,) * n_outputs + (True, 0, "", "The dataset is no longer in server memory, please load it again.")
+
+        return dataset_values(dataset_id, df, obj_colors, status_message, name) + (True, 100, "100 %", "")
 
     @app.callback(
         Output("video-status", "children"),
@@ -133,11 +221,12 @@ def register_callbacks(app):
         [State("time-slider", "value"),
          State("time-slider", "max"),
          State("start-stop-button", "children"),
-         State("time-slider", "disabled")],
+         State("time-slider", "disabled"),
+         State("frame-grid-storage", "data")],
         prevent_initial_call='initial_duplicate'  # Modifié ici
     )
     def sync_time_slider_and_input(manual_value, slider_value, n_intervals, current_time, max_time, button_text,
-                                   slider_disabled):
+                                   slider_disabled, grid_data):
         if slider_disabled:
             return current_time, current_time
 
@@ -146,13 +235,22 @@ def register_callbacks(app):
             return current_time, current_time
 
         triggered_id = ctx.triggered[0]['prop_id'].split('.')[0]
+        grid = FrameGrid.from_dict(grid_data) if grid_data else None
 
         if triggered_id == "manual-time":
+            if grid is not None and manual_value is not None:
+                manual_value = grid.snap(manual_value)
             return manual_value, manual_value
         elif triggered_id == "time-slider":
+            if grid is not None and slider_value is not None:
+                slider_value = grid.snap(slider_value)
             return slider_value, slider_value
-        elif triggered_id == "interval" and button_text == "⏸️ Pause":
-            next_time = round(current_time + 0.02, 2)
+        elif triggered_id == "interval" and button_text == "⏸️ Break":
+            # Période d'échantillonnage suivante sur la grille (indice entier), sans cumul d'erreurs d'arrondi
+            if grid is not None:
+                next_time = grid.to_time((grid.to_sample(current_time) + 1) * grid.stride)
+            else:
+                next_time = round(current_time + 0.02, 2)
             if next_time > max_time:
                 return max_time, max_time
             return next_time, next_time
@@ -211,19 +309,78 @@ def register_callbacks(app):
 
     @app.callback(
         [Output("interval", "disabled"),
-         Output("start-stop-button", "children")],
+         Output("start-stop-button", "children"),
+         Output("client-interval", "disabled"),
+         Output("playback-state", "data"),
+         Output("time-slider", "value", allow_duplicate=True)],
         Input("start-stop-button", "n_clicks"),
-        State("interval", "disabled"),
+        [State("interval", "disabled"),
+         State("client-interval", "disabled"),
+         State("client-playback", "value"),
+         State("playback-state", "data")],
         prevent_initial_call=True
     )
-    def toggle_interval(n_clicks, disabled):
+    def toggle_interval(n_clicks, disabled, client_disabled, client_playback, playback_state):
         if n_clicks is None:
-            return dash.no_update, dash.no_update
+            return no_update, no_update, no_update, no_update, no_update
 
-        if disabled:
-            return False, "⏸️ Break"
-        else:
-            return True, "▶️ Start"
+        if disabled and client_disabled:
+            if client_playback:
+                # Lecture dans le navigateur : le serveur n'est plus sollicité à chaque frame
+                return True, "⏸️ Break", False, None, no_update
+            return False, "⏸️ Break", True, no_update, no_update
+
+        # Pause d'une lecture dans le navigateur : le serveur reprend à l'instant atteint
+        # (couleurs, vecteurs et étoiles recalculés par update_graph_frame)
+        if not client_disabled and playback_state:
+            return True, "▶️ Start", True, no_update, playback_state["time"]
+        return True, "▶️ Start", True, no_update, no_update
+
+    @app.callback(
+        Output("playback-data", "data"),
+        [Input("client-interval", "disabled"),
+         Input("object-checklist", "value"),
+         Input("playback-request", "data")],
+        [State("time-slider", "value"),
+         State("playback-state", "data"),
+         State("upload-data-storage", "data"),
+         State("object-colors-storage", "data"),
+         State("group-traces", "value")],
+        prevent_initial_call=True
+    )
+    def send_playback_chunk(client_disabled, selected_objects, request, selected_time, playback_state,
+                            dataset_id, obj_colors_data, group_traces):
+        # Positions envoyées une fois par bloc : au départ, au changement de sélection et à la
+        # demande du navigateur quand il approche de la fin du bloc courant
+        if client_disabled:
+            return None
+        df = get_dataset(dataset_id)
+        if df is None or not selected_objects:
+            return None
+
+        store = get_detection_cache(dataset_id, lambda: df).store
+        obj_colors = obj_colors_data if isinstance(obj_colors_data, dict) else {}
+        batched = batched_rendering(selected_objects, group_traces)
+        triggered_id = callback_context.triggered[0]['prop_id'].split('.')[0]
+        if triggered_id == "playback-request" and request:
+            return playback_chunk(store, selected_objects, request["frame"], session=request["session"],
+                                  obj_colors=obj_colors, batched=batched)
+        if triggered_id == "object-checklist" and playback_state:
+            return playback_chunk(store, selected_objects, playback_state["frame"], obj_colors=obj_colors,
+                                  batched=batched)
+        return playback_chunk(store, selected_objects, store.grid.to_sample(selected_time or store.times[0]),
+                              obj_colors=obj_colors, batched=batched)
+
+    app.clientside_callback(
+        ClientsideFunction(namespace="moustic", function_name="playbackTick"),
+        [Output("playback-state", "data", allow_duplicate=True),
+         Output("playback-request", "data"),
+         Output("client-playback-time", "children")],
+        Input("client-interval", "n_intervals"),
+        [State("playback-data", "data"),
+         State("playback-state", "data")],
+        prevent_initial_call=True
+    )
 
     @app.callback(
         Output("object-sidebar", "is_open"),
@@ -261,268 +418,119 @@ def register_callbacks(app):
 
 
 
+    @app.callback(
+        [Output("time-slider", "value", allow_duplicate=True),
+         Output("star-timeline-status", "children")],
+        [Input("previous-star-button", "n_clicks"),
+         Input("next-star-button", "n_clicks")],
+        [State("time-slider", "value"),
+         State("upload-data-storage", "data"),
+         State("object-checklist", "value"),
+         State("distance-threshold-input", "value"),
+         State("min-vectors-input", "value")],
+        prevent_initial_call=True
+    )
+    def jump_to_star(previous_clicks, next_clicks, current_time, dataset_id, selected_objects, distance_threshold,
+                     min_vectors):
+        df = get_dataset(dataset_id)
+        if df is None:
+            return no_update, "Please upload a CSV file."
+
+        min_vectors = int(min_vectors) if min_vectors is not None else 2
+        distance_threshold = float(distance_threshold) if distance_threshold is not None else 0.1
+
+        # Chronologie des étoiles, lue dans la table des pointages de tout l'enregistrement
+        detections = get_detection_cache(dataset_id, lambda: df)
+        stars = star_events(detections.pointing_events(distance_threshold), min_vectors, selected_objects or [])
+        star_frames = np.unique(stars["frame"].to_numpy())
+        if len(star_frames) == 0:
+            return no_update, "No star event with these parameters."
+
+        store = detections.store
+        current_frame = store.grid.to_frame(current_time if current_time is not None else store.times[0])
+        triggered_id = callback_context.triggered[0]['prop_id'].split('.')[0]
+
+        if triggered_id == "next-star-button":
+            idx = np.searchsorted(star_frames, current_frame, side="right")
+        else:
+            idx = np.searchsorted(star_frames, current_frame, side="left") - 1
+        if idx < 0 or idx >= len(star_frames):
+            return no_update, f"No other star event ({len(star_frames)} frames with stars)."
+
+        frame = star_frames[idx]
+        n_stars = int((stars["frame"] == frame).sum())
+        return (float(store.times[frame]),
+                f"Star frame {idx + 1} of {len(star_frames)} at t = {store.times[frame]:.2f} s "
+                f"({n_stars} star(s)).")
+
     @app.callback(
         Output("graphs-output", "children"),
-        [Input("time-slider", "value"),
-         Input("graph-selection", "value"),
+        [Input("graph-selection", "value"),
          Input("object-checklist", "value"),
          Input("show-trajectory", "value"),
          Input("show-vectors", "value"),
          Input("color-by-speed", "value"),
          Input("min-vectors-input", "value"),
          Input("distance-threshold-input", "value"),
-         Input("color-by-neighbors", "value")     ],
-        [State("upload-data-storage", "data"),
+         Input("color-by-neighbors", "value"),
+         Input("group-traces", "value")],
+        [State("time-slider", "value"),
+         State("upload-data-storage", "data"),
          State("object-colors-storage", "data"),
          State("axis-ranges-storage", "data")],
         prevent_initial_call=True,
         allow_duplicate=True
     )
-    def update_graphs(selected_time, selected_graphs, selected_objects, show_trajectory, show_vectors,
-                      color_by_speed, min_vectors, distance_threshold, color_by_neighbors,
-                      df_json, obj_colors_data, axis_ranges_data):
+    def update_graphs(selected_graphs, selected_objects, show_trajectory, show_vectors,
+                      color_by_speed, min_vectors, distance_threshold, color_by_neighbors, group_traces,
+                      selected_time, dataset_id, obj_colors_data, axis_ranges_data):
+        # Construction complète des figures ; un changement d'instant seul passe par update_graph_frame
 
 
-        if not df_json:
+        if not dataset_id:
             return html.Div("Please upload a CSV file and select objects.")
 
 
-        df, obj_colors, axis_ranges = load_inputs(df_json, obj_colors_data, axis_ranges_data)
+        df, obj_colors, axis_ranges = load_inputs(dataset_id, obj_colors_data, axis_ranges_data)
 
+        if df is None:
+            return html.Div("The dataset is no longer in server memory, please upload the file again.")
 
-        if df is None or not selected_objects:
+        if not selected_objects:
             return html.Div("Please upload a CSV file and select objects.")
-        # Étape 2 : Préparer les DataFrames utiles
-        df_t, df_selected_objects, df_all_times = prepare_dataframes(df, selected_objects, selected_time)
+        # Étape 2 : Préparer les DataFrames utiles (store et tables de pointages conservés par jeu de données)
+        detections = get_detection_cache(dataset_id, lambda: df)
+        store = detections.store
+        df_t, df_selected_objects, _ = prepare_dataframes(df, selected_objects, selected_time, store=store)
 
         if df_selected_objects.empty:
             return html.Div("None of the selected objects were found in the data.")
 
-        # Étape 3 : Ajouter colonnes de vitesse et de voisins
-        df_t, max_neighbors = compute_speed_and_neighbors(df_t, color_by_neighbors)
-
-        # Étape 4 : Calcul des bornes de vitesse
-        speed_min, speed_max = (0, 1.3) if "by_speed" in color_by_speed else (None, None)
-
-        # Étape 5 : Traitement des vecteurs (si demandés)
-        if show_vectors and "vectors" in show_vectors:
-            min_vectors = int(min_vectors) if min_vectors is not None else 2
-            distance_threshold = float(distance_threshold) if distance_threshold is not None else 0.1
-
-            objects_with_star_3d, pointing_pairs = get_objects_with_star_3d(
-                df, selected_objects, selected_time,
-                distance_threshold=distance_threshold,
-                min_vectors=min_vectors
-            )
-            pointing_sources = {source for source, target in pointing_pairs if target in objects_with_star_3d}
-        else:
-            objects_with_star_3d = []
-            pointing_sources = set()
-
-        plots = []
-
-        if "xy" in selected_graphs:
-            fig_xy = go.Figure()
-            for obj in selected_objects:
-                df_obj = df_t[df_t['object'] == obj]
-                if df_obj.empty:
-                    continue
-
-                marker, showlegend, name = create_marker(df_obj, obj, obj_colors, color_by_neighbors, color_by_speed,
-                                                         max_neighbors, speed_min, speed_max)
-                add_scatter_trace(fig_xy, df_obj["YSplined"], df_obj["XSplined"], marker, name, showlegend)
-
-                if "trajectory" in show_trajectory:
-                    color = obj_colors.get(str(obj), "#000000")
-                    add_trajectory_trace(fig_xy, df_all_times, obj, "YSplined", "XSplined", color)
-
-                if show_vectors and "vectors" in show_vectors:
-                    add_direction_vector(fig_xy, df, obj, selected_time, "YSplined", "XSplined")
-
-            update_layout(fig_xy, "X as a function of Y", "Y", "X",
-                          [axis_ranges['y_min'], axis_ranges['y_max']],
-                          [axis_ranges['x_min'], axis_ranges['x_max']])
-            plots.append(dcc.Graph(figure=fig_xy))
-
-        if "xz" in selected_graphs:
-            fig_xz = go.Figure()
-            for obj in selected_objects:
-                df_obj = df_t[df_t['object'] == obj]
-                if df_obj.empty:
-                    continue
-
-                marker, showlegend, name = create_marker(df_obj, obj, obj_colors, color_by_neighbors, color_by_speed,
-                                                         max_neighbors, speed_min, speed_max)
-                add_scatter_trace(fig_xz, df_obj["ZSplined"], df_obj["XSplined"], marker, name, showlegend)
-
-                if "trajectory" in show_trajectory:
-                    color = obj_colors.get(str(obj), "#000000")
-                    add_trajectory_trace(fig_xz, df_all_times, obj, "ZSplined", "XSplined", color)
-
-                if show_vectors and "vectors" in show_vectors:
-                    add_direction_vector(fig_xz, df, obj, selected_time, "ZSplined", "XSplined")
-
-            update_layout(fig_xz, "X as a function of Z", "Z", "X",
-                          [axis_ranges['z_min'], axis_ranges['z_max']],
-                          [axis_ranges['x_min'], axis_ranges['x_max']])
-            plots.append(dcc.Graph(figure=fig_xz))
-
-        if "yz" in selected_graphs:
-            fig_yz = go.Figure()
-            for obj in selected_objects:
-                df_obj = df_t[df_t['object'] == obj]
-                if df_obj.empty:
-                    continue
-
-                marker, showlegend, name = create_marker(df_obj, obj, obj_colors, color_by_neighbors, color_by_speed,
-                                                         max_neighbors, speed_min, speed_max)
-                add_scatter_trace(fig_yz, df_obj["ZSplined"], df_obj["YSplined"], marker, name, showlegend)
-
-                if "trajectory" in show_trajectory:
-                    color = obj_colors.get(str(obj), "#000000")
-                    add_trajectory_trace(fig_yz, df_all_times, obj, "ZSplined", "YSplined", color)
-
-                if show_vectors and "vectors" in show_vectors:
-                    add_direction_vector(fig_yz, df, obj, selected_time, "ZSplined", "YSplined")
-
-            update_layout(fig_yz, "Y as a function of Z", "Z", "Y",
-                          [axis_ranges['z_min'], axis_ranges['z_max']],
-                          [axis_ranges['y_min'], axis_ranges['y_max']])
-            plots.append(dcc.Graph(figure=fig_yz))
-
-
-        
-        
-
-        if "3d" in selected_graphs:
-            fig3d = go.Figure()
-            present_objects = set(df_t['object'].unique())
-
-            for obj in selected_objects:
-                if obj not in present_objects:
-                    continue
-
-                df_obj = df_t[df_t['object'] == obj]
-                is_star = obj in objects_with_star_3d
-
-                marker, showlegend, name = create_marker_3d(df_obj, obj, obj_colors, color_by_neighbors,
-                                                            color_by_speed, max_neighbors,
-                                                            speed_min, speed_max, is_star)
-
-                fig3d.add_trace(go.Scatter3d(
-                    x=df_obj["XSplined"],
-                    y=df_obj["YSplined"],
-                    z=df_obj["ZSplined"],
-                    mode="markers",
-                    marker=marker,
-                    name=name,
-                    showlegend=showlegend
-                ))
-
-                if show_trajectory and "trajectory" in show_trajectory:
-                    color = obj_colors.get(str(obj), "#000000")
-                    add_trajectory_3d(fig3d, df_all_times, obj, color)
-
-                if show_vectors and "vectors" in show_vectors:
-                    add_vector_3d(fig3d, df, obj, selected_time, pointing_sources)
-
-            fig3d.update_layout(
-                title="3D position of objects",
-                scene=dict(
-                    xaxis=dict(title="X(m)", range=[axis_ranges["x_min"], axis_ranges["x_max"]], autorange=False),
-                    yaxis=dict(title="Y(m)", range=[axis_ranges["y_min"], axis_ranges["y_max"]], autorange=False),
-                    zaxis=dict(title="Z(m)", range=[axis_ranges["z_min"], axis_ranges["z_max"]], autorange=False),
-                    aspectmode='manual',
-                    aspectratio=dict(x=1, y=1, z=1)
-                ),
-                height=600,
-                margin=dict(l=0, r=0, b=0, t=40)
-            )
-
-            plots.append(dcc.Graph(figure=fig3d))
-
-        if "xyzt" in selected_graphs:
-            fig_time_series = go.Figure()
-            gap_threshold = 0.05
-
-            for obj in selected_objects:
-                df_obj = df_selected_objects[df_selected_objects['object'] == obj]
-                if df_obj.empty:
-                    continue
-
-                color = obj_colors.get(str(obj), "#000000")
-                df_obj = df_obj.sort_values(by='time')
-                segments = split_trajectory_segments(df_obj, gap_threshold)
-
-                for i, segment in enumerate(segments):
-                    if len(segment) < 2:
-                        continue
-                    show_legend = (i == 0)
-                    add_time_series_trace(fig_time_series, segment, obj, color, coords=['X', 'Y', 'Z'], show_legend=show_legend)
-
-
-            fig_time_series.update_layout(
-                title="X, Y, Z versus time",
-                xaxis_title="Time (s)",
-                yaxis_title="Position (m)",
-                legend_title="Object - Coordinates",
-                height=500,
-                plot_bgcolor='white',
-                paper_bgcolor='white',
-                xaxis=dict(gridcolor='lightgray'),
-                yaxis=dict(gridcolor='lightgray'),
-            )
-
-            plots.append(dcc.Graph(figure=fig_time_series))
-
-        if any(coord in selected_graphs for coord in ["xt", "yt", "zt"]):
-            gap_threshold = 0.05
-            figs = {'X': None, 'Y': None, 'Z': None}
-            coord_map = {'X': 'xt', 'Y': 'yt', 'Z': 'zt'}
-
-            # Créer les figures nécessaires
-            for coord, key in coord_map.items():
-                if key in selected_graphs:
-                    figs[coord] = go.Figure()
-
-            for obj in selected_objects:
-                df_obj = df_selected_objects[df_selected_objects['object'] == obj]
-                if df_obj.empty:
-                    continue
-
-                color = obj_colors.get(str(obj), "#000000")
-                df_obj = df_obj.sort_values(by='time')
-                segments = split_trajectory_segments(df_obj, gap_threshold)
-
-                for i, segment in enumerate(segments):
-                    if len(segment) < 2:
-                        continue
-                    show_legend = (i == 0)
-
-                    for coord, fig in figs.items():
-                        if fig is not None:
-                            add_time_series_trace(fig, segment, obj, color, coords=coord, show_legend=show_legend)
-
-            for coord, fig in figs.items():
-                if fig is not None:
-                    update_coord_figure_layout(fig, f"{coord} versus time", coord)
-                    plots.append(dcc.Graph(figure=fig))
+        # Étapes 3 à 5 : données de l'instant (couleurs, étoiles, vecteurs), partagées avec la lecture
+        frame = frame_context(df, detections, selected_objects, selected_time, color_by_neighbors,
+                              color_by_speed, show_vectors, min_vectors, distance_threshold, group_traces)
 
+        # Vues spatiales : trajectoires (statiques) puis marqueurs et vecteurs de l'instant
         other_graphs = []
-        time_series_basic = []  # xt, yt, zt
+        for view in SPATIAL_VIEWS:
+            if view in selected_graphs:
+                trajectories = detections.trajectory_layer(view, selected_objects, obj_colors, frame["batched"]) \
+                    if "trajectory" in show_trajectory else None
+                fig = spatial_figure(view, df, frame, selected_objects, obj_colors, axis_ranges,
+                                     trajectories=trajectories)
+                other_graphs.append(dcc.Graph(id=view_graph_id(view), figure=fig))
+
+        # Graphiques temporels : traces WebGL sous-échantillonnées, rechargées au zoom (zoom_time_series),
+        # rangés par vue
+        time_series = {}
+        for view in TIME_SERIES_VIEWS:
+            if view in selected_graphs:
+                fig = time_series_figure(store, view, selected_objects, obj_colors)
+                time_series[view] = dcc.Graph(id=time_series_graph_id(view), figure=fig)
+
+        time_series_basic = [time_series[view] for view in ("xt", "yt", "zt") if view in time_series]
+        xyzt_graph = time_series.get("xyzt")
         dt_graph = None
-        xyzt_graph = None
-
-        for graph in plots:
-            title = graph.figure.layout.title.text.lower() if hasattr(graph.figure.layout, "title") else ""
-
-            if "x, y, y versus time" in title:
-                xyzt_graph = graph
-            elif any(coord in title for coord in
-                     ["x versus time", "y versus time", "z versus time"]):
-                time_series_basic.append(graph)
-            else:
-                other_graphs.append(graph)
 
         # Générer dt si demandé et <= 5 objets
         if "dt" in selected_graphs and len(selected_objects) <= 5:
@@ -530,12 +538,11 @@ def register_callbacks(app):
             color_cycle = px.colors.qualitative.Plotly
             from itertools import combinations
             for idx, (obj1, obj2) in enumerate(combinations(selected_objects, 2)):
-                df1 = df_selected_objects[df_selected_objects['object'] == obj1].sort_values(by='time')
-                df2 = df_selected_objects[df_selected_objects['object'] == obj2].sort_values(by='time')
-                if df1.empty or df2.empty:
+                times, distances = pair_distances(store, obj1, obj2)
+                if len(times) == 0:
                     continue
                 color = color_cycle[idx % len(color_cycle)]
-                add_distance_trace(fig_distance, df1, df2, obj1, obj2, color)
+                add_distance_trace(fig_distance, times, distances, obj1, obj2, color)
 
             fig_distance.update_layout(
                 title="Distance between pairs of objects as a function of time",
@@ -578,6 +585,61 @@ def register_callbacks(app):
         return rows
 
 
+    @app.callback(
+        Output(view_graph_id(ALL), "figure"),
+        Input("time-slider", "value"),
+        [State("object-checklist", "value"),
+         State("show-trajectory", "value"),
+         State("show-vectors", "value"),
+         State("color-by-speed", "value"),
+         State("min-vectors-input", "value"),
+         State("distance-threshold-input", "value"),
+         State("color-by-neighbors", "value"),
+         State("group-traces", "value"),
+         State("upload-data-storage", "data"),
+         State("object-colors-storage", "data")],
+        prevent_initial_call=True
+    )
+    def update_graph_frame(selected_time, selected_objects, show_trajectory, show_vectors, color_by_speed,
+                           min_vectors, distance_threshold, color_by_neighbors, group_traces, dataset_id,
+                           obj_colors_data):
+        # Lecture : seules les traces de l'instant changent, envoyées en mises à jour partielles
+        views = [output["id"]["view"] for output in callback_context.outputs_list]
+        df = get_dataset(dataset_id)
+        if df is None or not selected_objects or selected_time is None:
+            return [no_update] * len(views)
+
+        obj_colors = obj_colors_data if isinstance(obj_colors_data, dict) else {}
+        detections = get_detection_cache(dataset_id, lambda: df)
+        frame = frame_context(df, detections, selected_objects, selected_time, color_by_neighbors,
+                              color_by_speed, show_vectors, min_vectors, distance_threshold, group_traces)
+
+        show_trajectory = "trajectory" in (show_trajectory or [])
+        return [spatial_frame_patch(view, df, frame, selected_objects, obj_colors,
+                                    detections.trajectory_layer(view, selected_objects, obj_colors, frame["batched"])
+                                    if show_trajectory else None)
+                for view in views]
+
+    @app.callback(
+        Output(time_series_graph_id(MATCH), "figure"),
+        Input(time_series_graph_id(MATCH), "relayoutData"),
+        [State("object-checklist", "value"),
+         State("upload-data-storage", "data"),
+         State("object-colors-storage", "data")],
+        prevent_initial_call=True
+    )
+    def zoom_time_series(relayout_data, selected_objects, dataset_id, obj_colors_data):
+        # Zoom ou retour à la vue complète : points de l'intervalle affiché, à pleine résolution si possible
+        time_range = relayout_time_range(relayout_data)
+        df = get_dataset(dataset_id)
+        if time_range is None or df is None or not selected_objects:
+            return no_update
+
+        view = callback_context.outputs_list["id"]["view"]
+        obj_colors = obj_colors_data if isinstance(obj_colors_data, dict) else {}
+        store = get_detection_cache(dataset_id, lambda: df).store
+        return time_series_figure(store, view, selected_objects, obj_colors, time_range=time_range)
+
     @app.callback(
         Output("store-interactions", "data"),
         Output("store-fusions", "data"),
@@ -592,26 +654,33 @@ def register_callbacks(app):
         State("distance-threshold-unionrupture-slider", "value"),
         State("detect-couples-check", "value"),
         State("min-duration-threshold", "value"),  # <-- attention ici, `min-duration-slider` est renommé
+        State("detection-workers", "value"),
+        State("detection-coarse-stride", "value"),
         prevent_initial_call=True
     )
-    def run_all_detections(n_clicks, df_json, threshold_inter, threshold_union, checkbox_values, min_duration):
-
-        if df_json is None:
-            return None, None, None, None, None
-
-        df = pd.read_json(df_json)
+    def run_all_detections(n_clicks, dataset_id, threshold_inter, threshold_union, checkbox_values, min_duration,
+                           n_workers, coarse_stride):
 
+        df = get_dataset(dataset_id)
+        if df is None:
+            return None, None, None, None, None, False, "Please upload a CSV file."
 
         inter_df, union_df, rupture_df, couples_df, rupture_fusion_df = None, None, None, None, None
 
+        # Produits intermédiaires conservés par jeu de données : changer un seuil ne fait que
+        # refiltrer les candidats déjà calculés
+        detections = get_detection_cache(dataset_id, lambda: df,
+                                         n_workers=int(n_workers) if n_workers else 1,
+                                         coarse_stride=int(coarse_stride) if coarse_stride else 1)
+
         if "detect_interaction" in checkbox_values:
-            inter_df = detect_interactions(df, distance_threshold=threshold_inter, min_duration=min_duration)
+            inter_df = detections.interactions(distance_threshold=threshold_inter, min_duration=min_duration)
 
         if "detect_union" in checkbox_values:
-            union_df = detect_union(df, distance_seuil=threshold_union)
+            union_df = detections.unions(distance_seuil=threshold_union)
 
         if "detect_rupture" in checkbox_values:
-            rupture_df = detect_rupture(df, distance_seuil=threshold_union)
+            rupture_df = detections.ruptures(distance_seuil=threshold_union)
 
         if all(k in checkbox_values for k in ["detect_interaction", "detect_union", "detect_rupture"]):
             if inter_df is not None and not inter_df.empty and union_df is not None and rupture_df is not None:
@@ -620,6 +689,11 @@ def register_callbacks(app):
                 if "detect_rupture_fusion" in checkbox_values:
                     rupture_fusion_df = detect_rupture_fusion(inter_df, union_df, rupture_df)
 
+        # Bilan de l'élagage des paires d'objets qui ne coexistent jamais
+        pruning = detections.store.lifetimes.report()
+        pruning_status = (f"{pruning['overlapping_pairs']} of {pruning['total_pairs']} object pairs coexist in time "
+                          f"({pruning['pruned_pairs']} pruned, {pruning['pruned_ratio']:.0%}).")
+
         return (
             inter_df.to_json(date_format="iso", orient="split") if inter_df is not None else None,
             union_df.to_json(date_format="iso", orient="split") if union_df is not None else None,
@@ -627,9 +701,77 @@ def register_callbacks(app):
             couples_df.to_json(date_format="iso", orient="split") if couples_df is not None else None,
             rupture_fusion_df.to_json(date_format="iso", orient="split") if rupture_fusion_df is not None else None,
             True,
-            ""
+            pruning_status
+        )
+
+
+    @app.callback(
+        Output("sweep-output", "children"),
+        Input("run-sweep-button", "n_clicks"),
+        State("upload-data-storage", "data"),
+        State("sweep-distance-range", "value"),
+        State("sweep-distance-steps", "value"),
+        State("sweep-min-durations", "value"),
+        State("sweep-gap-thresholds", "value"),
+        State("detection-workers", "value"),
+        prevent_initial_call=True
+    )
+    def run_threshold_sweep(n_clicks, dataset_id, distance_range, distance_steps, min_durations, gap_thresholds,
+                            n_workers):
+        df = get_dataset(dataset_id)
+        if df is None:
+            return html.Div("Please upload a CSV file.")
+
+        if not min_durations or not gap_thresholds:
+            return html.Div("Please select at least one minimum duration and one time gap tolerance.")
+
+        # Grille de seuils : une seule recherche de paires jusqu'au plus grand seuil
+        steps = max(int(distance_steps), 2) if distance_steps else 10
+        distance_thresholds = [round(d, 4) for d in np.linspace(distance_range[0], distance_range[1], steps)]
+        results = sweep_interactions(df, distance_thresholds, min_durations, gap_thresholds,
+                                     store=get_detection_cache(dataset_id, lambda: df).store,
+                                     n_workers=int(n_workers) if n_workers else 1)
+        summary_df = summarize_sweep(results)
+
+        fig_sweep = go.Figure()
+        for (min_duration, gap), group in summary_df.groupby(["min_duration", "time_gap_threshold"]):
+            fig_sweep.add_trace(go.Scatter(
+                x=group["distance_threshold"],
+                y=group["interaction_count"],
+                mode="lines+markers",
+                name=f"min {min_duration}s - gap {gap}s"
+            ))
+
+        fig_sweep.update_layout(
+            title="Number of rapprochements as a function of the distance threshold",
+            xaxis_title="Distance threshold (m)",
+            yaxis_title="Number of rapprochements",
+            legend_title="Minimum duration - Time gap",
+            height=500,
+            plot_bgcolor='white',
+            paper_bgcolor='white',
+            xaxis=dict(gridcolor='lightgray'),
+            yaxis=dict(gridcolor='lightgray'),
         )
 
+        return html.Div([
+            html.H4("📈 Threshold sensitivity", className="text-primary fw-bold mt-4"),
+            dcc.Graph(figure=fig_sweep),
+            dbc.Card(
+                dbc.CardBody([
+                    dash_table.DataTable(
+                        id='sweep-table',
+                        columns=[{"name": col, "id": col} for col in summary_df.columns],
+                        data=summary_df.to_dict("records"),
+                        page_size=10,
+                        sort_action='native',
+                        style_table={'overflowX': 'auto'},
+                        style_cell={'textAlign': 'left'}
+                    )
+                ]),
+                className="shadow-sm bg-light rounded mb-4"
+            )
+        ])
 
     @app.callback(
         Output("couples-table-output", "children"),
@@ -647,7 +789,7 @@ def register_callbacks(app):
         status_messages = []
 
         if inter_json:
-            inter_df = pd.read_json(inter_json, orient="split")
+            inter_df = pd.read_json(io.StringIO(inter_json), orient="split")
             results.append(
                 html.Div([
                     html.H4("💬 Rapprochements detected", className="text-info fw-bold mt-4"),
@@ -669,7 +811,7 @@ def register_callbacks(app):
             )
 
         if fusion_json:
-            fusion_df = pd.read_json(fusion_json, orient="split")
+            fusion_df = pd.read_json(io.StringIO(fusion_json), orient="split")
             results.append(
                 html.Div([
                     html.H4("🔗 Mergers detected", className="text-success fw-bold mt-4"),
@@ -691,7 +833,7 @@ def register_callbacks(app):
             )
 
         if rupture_json:
-            rupture_df = pd.read_json(rupture_json, orient="split")
+            rupture_df = pd.read_json(io.StringIO(rupture_json), orient="split")
             results.append(
                 html.Div([
                     html.H4("💔 Breakages detected", className="text-danger fw-bold mt-4"),
@@ -713,7 +855,7 @@ def register_callbacks(app):
             )
 
         if couples_json:
-            couples_df = pd.read_json(couples_json, orient="split")
+            couples_df = pd.read_json(io.StringIO(couples_json), orient="split")
             results.append(
                 html.Div([
                     html.H4("💑 merger ➜ breakup", className="text-warning fw-bold mt-4"),
@@ -735,7 +877,7 @@ def register_callbacks(app):
             )
 
         if rupture_fusion_json:
-            rf_df = pd.read_json(rupture_fusion_json, orient="split")
+            rf_df = pd.read_json(io.StringIO(rupture_fusion_json), orient="split")
             results.append(
                 html.Div([
                     html.H4("♻️ breakup ➜ merger", className="text-secondary fw-bold mt-4"),
@@ -769,39 +911,34 @@ def register_callbacks(app):
         State("store-ruptures", "data"),
         State("store-couples", "data"),
         State("store-rupture-fusion", "data"),
+        State("export-format", "value"),
         prevent_initial_call=True
     )
-    def export_csv(n_clicks, inter_json, fusion_json, rupture_json, couples_json, rupture_fusion_json):
-        output_dfs = []
-
-        if inter_json:
-            df = pd.read_json(inter_json, orient="split")
-            df["type"] = "interaction"
-            output_dfs.append(df)
-
-        if fusion_json:
-            df = pd.read_json(fusion_json, orient="split")
-            df["type"] = "fusion"
-            output_dfs.append(df)
-
-        if rupture_json:
-            df = pd.read_json(rupture_json, orient="split")
-            df["type"] = "rupture"
-            output_dfs.append(df)
-
-        if couples_json:
-            df = pd.read_json(couples_json, orient="split")
-            df["type"] = "couple_fusion_to_rupture"
-            output_dfs.append(df)
-
-        if rupture_fusion_json:
-            df = pd.read_json(rupture_fusion_json, orient="split")
-            df["type"] = "couple_rupture_to_fusion"
-            output_dfs.append(df)
-
-        if output_dfs:
-            final_df = pd.concat(output_dfs, ignore_index=True)
-            return dcc.send_data_frame(final_df.to_csv, "resultats_detection.csv", index=False)
-
-        return None
+    def export_csv(n_clicks, inter_json, fusion_json, rupture_json, couples_json, rupture_fusion_json,
+                   export_format):
+        # Une table par type de détection, dans l'ordre de l'export CSV historique
+        tables = {}
+        for name, table_type, table_json in [("interactions", "interaction", inter_json),
+                                             ("fusions", "fusion", fusion_json),
+                                             ("ruptures", "rupture", rupture_json),
+                                             ("couples", "couple_fusion_to_rupture", couples_json),
+                                             ("rupture_fusion", "couple_rupture_to_fusion", rupture_fusion_json)]:
+            if table_json:
+                df = pd.read_json(io.StringIO(table_json), orient="split")
+                df["type"] = table_type
+                tables[name] = df
+
+        if not tables:
+            return None
+
+        if export_format in ("parquet", "feather"):
+            # Types conservés, un fichier par table (colonnes différentes d'une table à l'autre)
+            try:
+                content = write_tables_zip(tables, fmt=export_format, prefix="resultats_detection_")
+            except ImportError:
+                return no_update
+            return dcc.send_bytes(content, f"resultats_detection_{export_format}.zip")
+
+        final_df = pd.concat(tables.values(), ignore_index=True)
+        return dcc.send_data_frame(final_df.to_csv, "resultats_detection.csv", index=False)
 
@@ -0,0 +1,200 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+######################CACHE DISQUE DES JEUX DE DONNEES #####################################
+
+# Répertoire du cache (un sous-répertoire par fichier), modifiable par la variable MOUSTIC_CACHE_DIR
+CACHE_DIR = os.environ.get(
+    "MOUSTIC_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache")
+)
+
+# À incrémenter quand les colonnes dérivées ou le format changent : les anciennes entrées sont ignorées
+CACHE_FORMAT_VERSION = 3
+
+# Taille maximale du cache sur disque ; les entrées les moins récemment lues sont supprimées au-delà
+MAX_DISK_CACHE_BYTES = 4 * 1024 * 2 ** 20
+
+_META_FILE = "meta.json"
+_cache_lock = threading.Lock()
+
+
+def content_hash(data):
+    """Empreinte SHA-1 du contenu brut d'un fichier : la clé du cache (et l'identifiant du jeu de données)."""
+    return hashlib.sha1(data).hexdigest()
+
+
+def content_hash_file(path, chunk_bytes=8 * 2 ** 20, on_chunk=None):
+    """
+    Empreinte d'un fichier lu par blocs, identique à content_hash de son contenu, sans le charger
+    en entier en mémoire.
+
+    Paramètres :
+        path (str) : chemin du fichier
+        chunk_bytes (int) : taille des blocs lus
+        on_chunk (callable) : appelée après chaque bloc avec le nombre d'octets lus depuis le début
+    """
+    digest = hashlib.sha1()
+    read = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_bytes), b""):
+            digest.update(chunk)
+            read += len(chunk)
+            if on_chunk is not None:
+                on_chunk(read)
+    return digest.hexdigest()
+
+
+def _entry_dir(key, cache_dir=None):
+    return os.path.join(cache_dir or CACHE_DIR, key)
+
+
+def save_dataset(key, df, cache_dir=None):
+    """
+    Enregistre un DataFrame analysé dans le cache disque, une colonne par fichier .npy.
+
+    Les colonnes numériques sont écrites telles quelles, les colonnes catégorielles (et les
+    chaînes, factorisées) sous forme de codes entiers et de catégories. L'entrée est écrite dans
+    un répertoire temporaire puis renommée, pour qu'une lecture concurrente ne voie jamais
+    d'entrée incomplète.
+
+    Paramètres :
+        key (str) : empreinte du fichier source (content_hash)
+        df (pd.DataFrame) : trajectoires analysées, colonnes dérivées comprises
+        cache_dir (str) : répertoire du cache (CACHE_DIR par défaut)
+
+    Retour :
+        bool : True si l'entrée a été écrite (False si le disque n'est pas accessible en écriture)
+    """
+    final_dir = _entry_dir(key, cache_dir)
+    tmp_dir = f"{final_dir}.tmp-{os.getpid()}-{threading.get_ident()}"
+
+    try:
+        os.makedirs(tmp_dir, exist_ok=True)
+        columns = []
+        for i, col in enumerate(df.columns):
+            series = df[col]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                codes, categories, kind = series.cat.codes.to_numpy(), series.cat.categories, "category"
+            elif series.dtype.kind in "biuf":
+                np.save(os.path.join(tmp_dir, f"{i}.npy"), series.to_numpy())
+                columns.append({"name": str(col), "kind": "array"})
+                continue
+            else:
+                codes, categories = pd.factorize(series, use_na_sentinel=True)
+                kind = "string"
+
+            # Catégories non numériques en chaînes de longueur fixe (pas de pickle dans les .npy)
+            categories = pd.Index(categories)
+            categories = categories.to_numpy() if categories.dtype.kind in "biuf" else categories.to_numpy(dtype=str)
+            np.save(os.path.join(tmp_dir, f"{i}.codes.npy"), codes)
+            np.save(os.path.join(tmp_dir, f"{i}.categories.npy"), categories)
+            columns.append({"name": str(col), "kind": kind})
+
+        meta = {"version": CACHE_FORMAT_VERSION, "rows": len(df), "columns": columns}
+        with open(os.path.join(tmp_dir, _META_FILE), "w") as f:
+            json.dump(meta, f)
+
+        with _cache_lock:
+            if os.path.isdir(final_dir):
+                shutil.rmtree(final_dir, ignore_errors=True)
+            os.replace(tmp_dir, final_dir)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return False
+
+    prune_cache(cache_dir=cache_dir, keep=key)
+    return True
+
+
+def load_dataset(key, cache_dir=None, mmap=True):
+    """
+    Relit un DataFrame du cache disque, None si l'entrée est absente, incomplète ou d'une
+    autre version du format.
+
+    Avec mmap=True les colonnes numériques sont projetées en mémoire (np.load en mmap_mode='r') :
+    seules les pages réellement lues sont chargées et le système les partage entre processus.
+
+    Paramètres :
+        key (str) : empreinte du fichier source (content_hash)
+        cache_dir (str) : répertoire du cache (CACHE_DIR par défaut)
+        mmap (bool) : projeter les colonnes en mémoire plutôt que les copier
+
+    Retour :
+        pd.DataFrame | None : trajectoires analysées
+    """
+    entry_dir = _entry_dir(key, cache_dir)
+    meta_path = os.path.join(entry_dir, _META_FILE)
+    mmap_mode = "r" if mmap else None
+
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get("version") != CACHE_FORMAT_VERSION:
+            return None
+
+        data = {}
+        for i, column in enumerate(meta["columns"]):
+            if column["kind"] == "array":
+                data[column["name"]] = np.load(os.path.join(entry_dir, f"{i}.npy"), mmap_mode=mmap_mode)
+                continue
+            codes = np.load(os.path.join(entry_dir, f"{i}.codes.npy"))
+            categories = np.load(os.path.join(entry_dir, f"{i}.categories.npy"))
+            if column["kind"] == "category":
+                data[column["name"]] = pd.Categorical.from_codes(codes, categories=categories)
+            else:
+                values = categories.astype(object)[np.maximum(codes, 0)]
+                values[codes < 0] = None
+                data[column["name"]] = values
+
+        # Marquer l'entrée comme récemment utilisée (ordre d'éviction de prune_cache)
+        os.utime(meta_path)
+    except (OSError, ValueError, KeyError):
+        return None
+
+    df = pd.DataFrame(data, copy=False)
+    return df if len(df) == meta["rows"] else None
+
+
+def _entry_size(entry_dir):
+    return sum(entry.stat().st_size for entry in os.scandir(entry_dir) if entry.is_file())
+
+
+def prune_cache(max_bytes=None, cache_dir=None, keep=None):
+    """
+    Supprime les entrées les moins récemment lues tant que le cache dépasse max_bytes
+    (MAX_DISK_CACHE_BYTES par défaut) ; l'entrée `keep` n'est jamais supprimée.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    max_bytes = MAX_DISK_CACHE_BYTES if max_bytes is None else max_bytes
+
+    with _cache_lock:
+        try:
+            entries = []
+            for entry in os.scandir(cache_dir):
+                meta_path = os.path.join(entry.path, _META_FILE)
+                if entry.is_dir() and os.path.exists(meta_path):
+                    entries.append((os.stat(meta_path).st_mtime, entry.name, _entry_size(entry.path)))
+        except OSError:
+            return
+
+        total = sum(size for _, _, size in entries)
+        for _, name, size in sorted(entries):
+            if total <= max_bytes:
+                break
+            if name == keep:
+                continue
+            shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+            total -= size
+
+
+def clear_cache(cache_dir=None):
+    """Vide entièrement le cache disque."""
+    shutil.rmtree(cache_dir or CACHE_DIR, ignore_errors=True)
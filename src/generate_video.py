@@ -16,6 +16,16 @@ from mpl_toolkits.mplot3d.art3d import Line3DCollection
 from matplotlib.lines import Line2D
 import multiprocessing
 
+try:
+    from .store import FrameGrid
+    from .utils import load_trajectories
+except ImportError:
+    # Exécution directe du script (python3 src/generate_video.py) : importer via le paquet src
+    import sys
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+    from src.store import FrameGrid
+    from src.utils import load_trajectories
+
 matplotlib.use('Agg')
 
 # --- CHEMIN FFMPEG ---
@@ -30,8 +40,14 @@ try:
 except Exception:
     print(" FFmpeg could not be found. To access the video recording functionality, please place it in the 'bin/' folder or add it to the PATH.")
 
-def ajuster_temps(df):
-    df["time"] = (np.ceil(df["time"] / 0.02) * 0.02).round(4)
+def ajuster_temps(df, grid=None):
+    """
+    Ramène les temps sur la grille de frames (une image par période d'échantillonnage, détectée
+    si elle n'est pas fournie) et ajoute la colonne 'frame' (indice entier de frame).
+    """
+    grid = grid if grid is not None else FrameGrid.from_times(df["time"], merge=True).sampling_grid()
+    df["frame"] = grid.to_frame(df["time"].to_numpy(dtype=float))
+    df["time"] = grid.to_time(df["frame"].to_numpy())
     return df
 
 
@@ -246,6 +262,7 @@ class VideoRecorderApp:
 
         # Variables pour données et limites (remplies après chargement fichier)
         self.df = None
+        self.grid = None
         self.all_objects = None
         self.x_min = self.x_max = None
         self.y_min = self.y_max = None
@@ -262,7 +279,8 @@ class VideoRecorderApp:
         print(f"Fichier sélectionné : {filename}")  # DEBUG
 
         try:
-            df = pd.read_csv(filename, sep=";")
+            # Même cache disque que l'application Dash : un fichier déjà ouvert n'est pas réanalysé
+            df, _, _ = load_trajectories(filename)
             print("Fichier chargé avec succès")  # DEBUG
             print("Colonnes du fichier :", df.columns.tolist())  # DEBUG
         except Exception as e:
@@ -275,7 +293,9 @@ class VideoRecorderApp:
             print("Colonnes manquantes !")  # DEBUG
             return
 
-        self.df = ajuster_temps(df)
+        # Une image par période d'échantillonnage : les échantillons décalés y sont fusionnés
+        self.grid = FrameGrid.from_times(df["time"], merge=True).sampling_grid()
+        self.df = ajuster_temps(df, self.grid)
 
 
 
@@ -375,26 +395,20 @@ class VideoRecorderApp:
             messagebox.showerror("Erreur", "Aucune donnée dans l'intervalle spécifié.")
             return
 
-        object_data_dict = {}
-        for obj in selected_objs:
-            subset = df[df["object"] == obj]
-            obj_dict = {}
-            for t in time_values:
-                sub_t = subset[subset["time"] == t]
-                if sub_t.empty:
-                    continue
-                x = sub_t["XSplined"].values[0]
-                y = sub_t["YSplined"].values[0]
-                z = sub_t["ZSplined"].values[0]
-                obj_dict[t] = {
-                    "XY": (x, y),
-                    "XZ": (x, z)
-                }
-            object_data_dict[obj] = obj_dict
+        # Positions par objet et par temps : les temps sont déjà sur la grille, un seul
+        # regroupement remplace les filtres par égalité de temps
+        object_data_dict = {obj: {} for obj in selected_objs}
+        subset = df[df["object"].isin(selected_objs) & df["time"].isin(time_values)]
+        subset = subset.drop_duplicates(subset=["object", "frame"])
+        for obj, sub in subset.groupby("object"):
+            object_data_dict[obj] = {
+                t: {"XY": (x, y), "XZ": (x, z)}
+                for t, x, y, z in zip(sub["time"], sub["XSplined"], sub["YSplined"], sub["ZSplined"])
+            }
 
         # Création des données trace
         trace_data = {}
-        n_trace_frames = int(trace_duration / 0.02)
+        n_trace_frames = int(round(trace_duration / self.grid.period))
 
         for obj in selected_objs:
             trace_data[obj] = {}
@@ -474,7 +488,7 @@ class VideoRecorderApp:
         video_name = output_dir_final
 
         ffmpeg_cmd = [
-            "ffmpeg", "-y", "-r", "50", "-i",
+            "ffmpeg", "-y", "-r", str(round(1 / self.grid.period)), "-i",
             os.path.join(output_dir, "frame_%04d.png"),
             "-c:v", "libx264", "-pix_fmt", "yuv420p", video_name
         ]
@@ -0,0 +1,255 @@
+import io
+import os
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    HAS_PYARROW = False
+    CSV_ENGINE = "c"
+
+
+######################LECTURE DES TRAJECTOIRES #############################################
+
+# Colonnes de coordonnées lues directement en float32 (moitié moins de mémoire que float64)
+FLOAT32_COLS = ["XSplined", "YSplined", "ZSplined", "VXSplined", "VYSplined", "VZSplined"]
+
+# Colonnes lues dans un fichier Parquet/Feather (les autres ne sont pas décodées) ; les vitesses
+# ne sont lues que si elles sont présentes
+TRAJECTORY_COLUMNS = ["time", "object", "XSplined", "YSplined", "ZSplined"]
+OPTIONAL_TRAJECTORY_COLUMNS = ["VXSplined", "VYSplined", "VZSplined"]
+
+# Formats de fichiers reconnus (extension -> format)
+FILE_FORMATS = {".csv": "csv", ".parquet": "parquet", ".pq": "parquet", ".feather": "feather",
+                ".arrow": "feather"}
+
+
+def read_trajectories_csv(source, sep=";"):
+    """
+    Lit un fichier de trajectoires CSV directement depuis ses octets (ou son chemin), avec un
+    schéma explicite : coordonnées et vitesses en float32, temps en float64, objets en catégories.
+
+    Le moteur multi-thread pyarrow est utilisé s'il est installé, le moteur C de pandas sinon.
+
+    Paramètres :
+        source (bytes | str) : contenu du fichier ou chemin
+        sep (str) : séparateur de colonnes
+
+    Retour :
+        pd.DataFrame : trajectoires avec les types compacts
+    """
+    is_bytes = isinstance(source, (bytes, bytearray))
+    if is_bytes:
+        end = source.find(b"\n")
+        header = bytes(source[:end] if end >= 0 else source)
+    else:
+        with open(source, "rb") as f:
+            header = f.readline()
+
+    columns = [col.strip().strip('"') for col in header.decode("utf-8-sig").strip().split(sep)]
+    dtype = {col: np.float32 for col in FLOAT32_COLS if col in columns}
+    if "time" in columns:
+        dtype["time"] = np.float64
+
+    try:
+        df = pd.read_csv(io.BytesIO(source) if is_bytes else source, sep=sep, dtype=dtype, engine=CSV_ENGINE)
+    except (ValueError, ImportError):
+        # Valeurs non numériques ou moteur indisponible : lecture sans schéma, conversions ensuite
+        df = pd.read_csv(io.BytesIO(source) if is_bytes else source, sep=sep)
+        for col in dtype:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype(dtype[col])
+
+    if "object" in df.columns:
+        df["object"] = df["object"].astype("category")
+    return df
+
+
+def detect_format(source, filename=None):
+    """
+    Format d'un fichier de trajectoires : d'après l'extension de filename (ou du chemin), sinon
+    d'après les octets magiques de Parquet ('PAR1') et Feather ('ARROW1', 'FEA1'), CSV par défaut.
+
+    Retour :
+        str | None : 'csv', 'parquet', 'feather', ou None pour une extension non reconnue
+    """
+    name = filename if filename is not None else (source if isinstance(source, str) else None)
+    if name is not None:
+        return FILE_FORMATS.get(os.path.splitext(name)[1].lower())
+
+    if isinstance(source, (bytes, bytearray)):
+        if source[:4] == b"PAR1":
+            return "parquet"
+        if source[:6] == b"ARROW1" or source[:4] == b"FEA1":
+            return "feather"
+    return "csv"
+
+
+def _compact_dtypes(df):
+    """Applique le schéma de read_trajectories_csv (float32, temps float64, objets en catégories)."""
+    for col in FLOAT32_COLS:
+        if col in df.columns and df[col].dtype != np.float32:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype(np.float32)
+    if "time" in df.columns:
+        df["time"] = pd.to_numeric(df["time"], errors="coerce").astype(np.float64)
+    if "object" in df.columns and not isinstance(df["object"].dtype, pd.CategoricalDtype):
+        df["object"] = df["object"].astype("category")
+    return df
+
+
+def read_trajectories_arrow(source, fmt="parquet", columns=None):
+    """
+    Lit un fichier de trajectoires Parquet ou Feather (octets ou chemin) en ne décodant que les
+    colonnes utiles : les types enregistrés sont conservés, puis ramenés au schéma compact.
+
+    Paramètres :
+        source (bytes | str) : contenu du fichier ou chemin
+        fmt (str) : 'parquet' ou 'feather'
+        columns (list) : colonnes à lire (TRAJECTORY_COLUMNS et vitesses présentes par défaut)
+
+    Retour :
+        pd.DataFrame : trajectoires avec les types compacts
+    """
+    if not HAS_PYARROW:
+        raise ImportError("Reading Parquet/Feather files requires pyarrow (pip install pyarrow).")
+
+    import pyarrow.feather as feather
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+
+    buffer = pyarrow.BufferReader(source) if isinstance(source, (bytes, bytearray)) else source
+    if columns is None:
+        if fmt == "parquet":
+            available = pq.read_schema(buffer).names
+        else:
+            available = pyarrow.ipc.open_file(buffer).schema.names
+        columns = [col for col in TRAJECTORY_COLUMNS + OPTIONAL_TRAJECTORY_COLUMNS if col in available]
+        if isinstance(buffer, pyarrow.BufferReader):
+            buffer.seek(0)
+
+    if fmt == "parquet":
+        table = pq.read_table(buffer, columns=columns)
+    else:
+        table = feather.read_table(buffer, columns=columns)
+    return _compact_dtypes(table.to_pandas())
+
+
+def read_trajectories(source, filename=None, columns=None):
+    """
+    Lit un fichier de trajectoires CSV, Parquet ou Feather selon son format (voir detect_format).
+
+    Paramètres :
+        source (bytes | str) : contenu du fichier ou chemin
+        filename (str) : nom du fichier d'origine, pour reconnaître son extension
+        columns (list) : colonnes à lire (Parquet/Feather seulement)
+
+    Retour :
+        pd.DataFrame : trajectoires avec les types compacts
+    """
+    fmt = detect_format(source, filename)
+    if fmt is None:
+        raise ValueError("Le fichier doit être au format CSV, Parquet ou Feather.")
+    if fmt == "csv":
+        return read_trajectories_csv(source, sep=";")
+    return read_trajectories_arrow(source, fmt=fmt, columns=columns)
+
+
+######################DOSSIER DE DONNEES ##################################################
+
+# Seul dossier dont l'application peut lire des fichiers côté serveur, modifiable par MOUSTIC_DATA_DIR
+DATA_DIR = os.environ.get(
+    "MOUSTIC_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+)
+
+
+def list_data_files(data_dir=None):
+    """Fichiers de trajectoires du dossier de données (chemins relatifs triés, sous-dossiers compris)."""
+    data_dir = data_dir or DATA_DIR
+    files = []
+    for root, _, names in os.walk(data_dir):
+        for name in names:
+            if os.path.splitext(name)[1].lower() in FILE_FORMATS:
+                files.append(os.path.relpath(os.path.join(root, name), data_dir))
+    return sorted(files)
+
+
+def resolve_data_path(name, data_dir=None):
+    """
+    Chemin absolu d'un fichier du dossier de données, en refusant tout chemin qui en sort
+    (chemin absolu, '..', lien symbolique vers l'extérieur).
+
+    Paramètres :
+        name (str) : chemin relatif au dossier de données
+        data_dir (str) : dossier de données (DATA_DIR par défaut)
+
+    Retour :
+        str : chemin absolu du fichier
+
+    Lève :
+        ValueError : chemin hors du dossier, fichier absent ou format non reconnu
+    """
+    root = os.path.realpath(data_dir or DATA_DIR)
+    path = os.path.realpath(os.path.join(root, name or ""))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError("Only files inside the data folder can be loaded.")
+    if not os.path.isfile(path):
+        raise ValueError(f"File not found in the data folder: {name}")
+    if detect_format(path) is None:
+        raise ValueError("Le fichier doit être au format CSV, Parquet ou Feather.")
+    return path
+
+
+######################EXPORT DES TABLES ###################################################
+
+EXPORT_FORMATS = ["csv", "parquet", "feather"]
+
+
+def write_table(df, target, fmt="parquet"):
+    """
+    Écrit un DataFrame au format CSV, Parquet ou Feather ; Parquet et Feather conservent les
+    types des colonnes.
+
+    Paramètres :
+        df (pd.DataFrame) : table à écrire
+        target (str | file) : chemin ou fichier binaire ouvert
+        fmt (str) : 'csv', 'parquet' ou 'feather'
+    """
+    if fmt == "csv":
+        df.to_csv(target, index=False)
+    elif fmt == "parquet":
+        df.to_parquet(target, index=False)
+    elif fmt == "feather":
+        df.reset_index(drop=True).to_feather(target)
+    else:
+        raise ValueError(f"Format d'export inconnu : {fmt}")
+
+
+def write_tables_zip(tables, fmt="parquet", prefix=""):
+    """
+    Archive zip contenant une table par fichier (ex. interactions.parquet, fusions.parquet).
+
+    Paramètres :
+        tables (dict) : nom -> DataFrame
+        fmt (str) : format de chaque fichier (voir write_table)
+        prefix (str) : préfixe des noms de fichiers
+
+    Retour :
+        bytes : contenu de l'archive
+    """
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, df in tables.items():
+            buffer = io.BytesIO()
+            write_table(df, buffer, fmt)
+            zf.writestr(f"{prefix}{name}.{fmt}", buffer.getvalue())
+    return archive.getvalue()
+
+
+def memory_usage_mb(df):
+    """Mémoire occupée par le DataFrame, en Mo."""
+    return df.memory_usage(deep=True).sum() / 2 ** 20
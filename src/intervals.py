@@ -0,0 +1,178 @@
+import numpy as np
+import pandas as pd
+
+from .neighbors import _expand_ranges
+
+
+######################EXTRACTION D'INTERVALLES (RUN-LENGTH) ################################
+
+def extract_intervals(keys, times, gap_threshold, min_duration=0.0, breaks=None):
+    """
+    Regroupe des événements (clé, temps) en intervalles continus, en opérations NumPy groupées.
+
+    Un nouvel intervalle commence à chaque changement de clé, lorsque l'écart avec
+    l'événement précédent de la même clé dépasse gap_threshold, ou lorsque `breaks` l'impose.
+    Les intervalles sont numérotés par clé (rank = 1, 2, ...) avant le filtrage sur la durée,
+    comme les suffixes a, b, c... de detect_interactions.
+
+    Paramètres :
+        keys (np.ndarray) : clé entière de chaque événement (ex. identifiant de paire)
+        times (np.ndarray) : temps de chaque événement, trié par (clé, temps)
+        gap_threshold (float) : écart maximal entre deux événements d'un même intervalle
+        min_duration (float) : durée minimale (end - start) d'un intervalle conservé
+        breaks (np.ndarray) : booléens, True si l'événement doit ouvrir un nouvel intervalle
+
+    Retour :
+        pd.DataFrame : colonnes 'key', 'rank', 'start', 'end', 'duration', triées par (clé, start)
+    """
+    keys = np.asarray(keys)
+    times = np.asarray(times, dtype=float)
+
+    if len(keys) == 0:
+        return pd.DataFrame({
+            "key": keys, "rank": np.empty(0, dtype=np.int64),
+            "start": times, "end": times, "duration": times
+        })
+
+    new_key = np.empty(len(keys), dtype=bool)
+    new_key[0] = True
+    new_key[1:] = keys[1:] != keys[:-1]
+
+    starts_run = new_key.copy()
+    starts_run[1:] |= (times[1:] - times[:-1]) > gap_threshold
+    if breaks is not None:
+        starts_run |= np.asarray(breaks, dtype=bool)
+
+    run_first = np.flatnonzero(starts_run)
+    run_last = np.append(run_first[1:], len(keys)) - 1
+
+    # Rang de chaque intervalle parmi ceux de sa clé
+    key_first_run = np.maximum.accumulate(np.where(new_key[run_first], np.arange(len(run_first)), 0))
+    rank = np.arange(len(run_first)) - key_first_run + 1
+
+    start = times[run_first]
+    end = times[run_last]
+    duration = end - start
+    keep = duration >= min_duration
+
+    return pd.DataFrame({
+        "key": keys[run_first][keep],
+        "rank": rank[keep],
+        "start": start[keep],
+        "end": end[keep],
+        "duration": duration[keep]
+    })
+
+
+def intervals_from_signal(keys, times, signal, gap_threshold, min_duration=0.0):
+    """
+    Intervalles où un signal booléen par (clé, temps) reste vrai.
+
+    Une observation fausse interrompt l'intervalle en cours de sa clé, même si l'observation
+    vraie suivante arrive dans la tolérance gap_threshold.
+
+    Paramètres :
+        keys (np.ndarray) : clé entière de chaque observation
+        times (np.ndarray) : temps de chaque observation
+        signal (np.ndarray) : booléens, valeur du signal à chaque observation
+        gap_threshold (float) : écart maximal entre deux observations vraies d'un même intervalle
+        min_duration (float) : durée minimale d'un intervalle conservé
+
+    Retour :
+        pd.DataFrame : voir extract_intervals
+    """
+    keys = np.asarray(keys)
+    times = np.asarray(times, dtype=float)
+    signal = np.asarray(signal, dtype=bool)
+
+    order = np.lexsort((times, keys))
+    keys, times, signal = keys[order], times[order], signal[order]
+
+    # Une observation vraie précédée (même clé) d'une observation fausse rouvre un intervalle
+    after_false = np.zeros(len(keys), dtype=bool)
+    after_false[1:] = (keys[1:] == keys[:-1]) & ~signal[:-1]
+
+    return extract_intervals(keys[signal], times[signal], gap_threshold, min_duration, breaks=after_false[signal])
+
+
+######################INDEX DES DUREES DE VIE ##############################################
+
+class LifetimeIndex:
+    """
+    Index des durées de vie [début, fin] d'objets, pour n'énumérer que les paires qui coexistent.
+
+    Les durées de vie sont triées par début : parmi les objets qui commencent après l'objet i,
+    ceux qui le chevauchent commencent avant sa fin et forment donc une plage contiguë,
+    trouvée par recherche dichotomique.
+
+    Attributs :
+        starts (np.ndarray) : début de vie de chaque objet (indexé par code)
+        ends (np.ndarray) : fin de vie de chaque objet
+    """
+
+    def __init__(self, starts, ends):
+        self.starts = np.asarray(starts)
+        self.ends = np.asarray(ends)
+        self._order = np.argsort(self.starts, kind="stable")
+        self._sorted_starts = self.starts[self._order]
+        self._pairs = None
+
+    @classmethod
+    def from_events(cls, keys, times, n_keys=None):
+        """Durées de vie à partir des observations (clé entière 0..n_keys-1, temps ou frame)."""
+        keys = np.asarray(keys, dtype=np.int64)
+        times = np.asarray(times)
+        if n_keys is None:
+            n_keys = int(keys.max()) + 1 if len(keys) else 0
+        starts = np.full(n_keys, np.inf)
+        ends = np.full(n_keys, -np.inf)
+        np.minimum.at(starts, keys, times)
+        np.maximum.at(ends, keys, times)
+        return cls(starts, ends)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def overlaps(self, a, b):
+        """Indique, de manière vectorisée, si les durées de vie des objets a et b se chevauchent."""
+        a = np.asarray(a)
+        b = np.asarray(b)
+        return (self.starts[a] <= self.ends[b]) & (self.starts[b] <= self.ends[a])
+
+    def overlapping_pairs(self):
+        """
+        Paires d'objets dont les durées de vie se chevauchent (calculées une seule fois).
+
+        Retour :
+            tuple : (a, b) codes des objets de chaque paire, a < b, triés par (a, b)
+        """
+        if self._pairs is None:
+            n = len(self)
+            first = np.arange(n) + 1
+            last = np.searchsorted(self._sorted_starts, self.ends[self._order], side="right")
+            counts = np.maximum(last - first, 0)
+
+            src = self._order[np.repeat(np.arange(n), counts)]
+            dst = self._order[_expand_ranges(first, counts)]
+            a, b = np.minimum(src, dst), np.maximum(src, dst)
+            order = np.lexsort((b, a))
+            self._pairs = (a[order], b[order])
+        return self._pairs
+
+    def report(self):
+        """
+        Bilan de l'élagage : nombre de paires possibles, de paires qui coexistent et de paires écartées.
+
+        Retour :
+            dict : 'objects', 'total_pairs', 'overlapping_pairs', 'pruned_pairs', 'pruned_ratio'
+        """
+        n = len(self)
+        total = n * (n - 1) // 2
+        overlapping = len(self.overlapping_pairs()[0])
+        return {
+            "objects": n,
+            "total_pairs": total,
+            "overlapping_pairs": overlapping,
+            "pruned_pairs": total - overlapping,
+            "pruned_ratio": (total - overlapping) / total if total else 0.0
+        }
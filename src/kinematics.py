@@ -0,0 +1,117 @@
+import numpy as np
+
+from .store import POSITION_COLS, VELOCITY_COLS, ensure_store
+
+
+######################CINEMATIQUE ##########################################################
+
+KINEMATIC_COLS = ["speed", "acceleration", "heading", "turning_angle"]
+
+
+def _object_neighbors(store):
+    """
+    Ordre des lignes par (objet, frame) et, pour chaque position de cet ordre, l'observation
+    précédente et suivante du même objet (elle-même en début ou fin de trajectoire).
+    """
+    order = np.lexsort((store.frames, store.codes))
+    codes = store.codes[order]
+    same = codes[1:] == codes[:-1]
+
+    idx = np.arange(len(order))
+    prev = idx.copy()
+    prev[1:][same] -= 1
+    nxt = idx.copy()
+    nxt[:-1][same] += 1
+    return order, prev, nxt
+
+
+def _derivative(values, times, prev, nxt):
+    """
+    Dérivée par différences finies le long de chaque trajectoire : centrée à l'intérieur,
+    décentrée aux extrémités, nulle pour un objet observé une seule fois.
+    """
+    dt = times[nxt] - times[prev]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        derivative = (values[nxt] - values[prev]) / dt[:, None]
+    derivative[dt == 0] = 0.0
+    return derivative
+
+
+def compute_kinematics(df, store=None):
+    """
+    Cinématique de chaque observation, en une passe vectorisée groupée par objet.
+
+    La vitesse est celle des colonnes VXSplined/VYSplined/VZSplined si elles existent, sinon
+    elle est dérivée des positions par différences finies sur chaque trajectoire. Les temps
+    utilisés sont ceux de la grille de frames.
+
+    Paramètres :
+        df (pd.DataFrame) : trajectoires issues de parse_contents
+        store (TrajectoryStore) : trajectoires indexées par frame, construites si absentes
+
+    Retour :
+        dict : tableaux dans l'ordre des lignes du store
+            'velocity' (n, 3), 'speed' (m/s), 'acceleration' (norme, m/s²),
+            'heading' (cap horizontal, degrés dans [-180, 180]),
+            'turning_angle' (angle entre deux vitesses successives, degrés dans [0, 180],
+            NaN à la première observation ou à vitesse nulle)
+    """
+    store = ensure_store(df, store)
+    order, prev, nxt = _object_neighbors(store)
+    times = store.times[store.frames[order]]
+
+    velocity = np.empty((len(store), 3))
+    if store.vxyz is not None:
+        velocity[:] = store.vxyz
+    else:
+        velocity[order] = _derivative(store.xyz[order], times, prev, nxt)
+
+    acceleration = np.empty((len(store), 3))
+    acceleration[order] = _derivative(velocity[order], times, prev, nxt)
+
+    speed = np.sqrt((velocity ** 2).sum(axis=1))
+
+    # Angle entre la vitesse précédente et la vitesse courante du même objet
+    v_prev = velocity[order][prev]
+    v_curr = velocity[order]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cosine = (v_prev * v_curr).sum(axis=1) / (speed[order][prev] * speed[order])
+    turning = np.degrees(np.arccos(np.clip(cosine, -1.0, 1.0)))
+    turning[prev == np.arange(len(order))] = np.nan
+
+    turning_angle = np.empty(len(store))
+    turning_angle[order] = turning
+
+    return {
+        "velocity": velocity,
+        "speed": speed,
+        "acceleration": np.sqrt((acceleration ** 2).sum(axis=1)),
+        "heading": np.degrees(np.arctan2(velocity[:, 1], velocity[:, 0])),
+        "turning_angle": turning_angle
+    }
+
+
+def add_kinematics(df, store=None):
+    """
+    Ajoute au DataFrame les colonnes de compute_kinematics (vitesse dérivée si elle manque,
+    'speed', 'acceleration', 'heading', 'turning_angle'), dans l'ordre de ses lignes.
+
+    Retour :
+        pd.DataFrame : le DataFrame complété
+    """
+    if not all(col in df.columns for col in POSITION_COLS):
+        return df
+
+    store = ensure_store(df, store)
+    kinematics = compute_kinematics(store, store=store)
+
+    if not all(col in df.columns for col in VELOCITY_COLS):
+        velocity = store.to_source_order(kinematics["velocity"])
+        for axis, col in enumerate(VELOCITY_COLS):
+            df[col] = velocity[:, axis].astype(df[POSITION_COLS[axis]].dtype)
+
+    # Même précision que les positions (float32 à la lecture)
+    dtype = np.result_type(*df[POSITION_COLS].dtypes)
+    for col in KINEMATIC_COLS:
+        df[col] = store.to_source_order(kinematics[col]).astype(dtype)
+    return df
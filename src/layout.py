@@ -13,7 +13,7 @@ layout = dbc.Container([
         dbc.Col([
             html.Img(src="/assets/moustic.png", style={'height': '80px'}, className="my-3"),
 
-            html.H3("Upload a CSV file", className="mt-4 text-secondary"),
+            html.H3("Upload a CSV, Parquet or Feather file", className="mt-4 text-secondary"),
             dcc.Upload(
                 id='upload-data',
                 children=html.Div(['📁 Drag and drop ou ', html.A('select a file')]),
@@ -29,6 +29,15 @@ layout = dbc.Container([
                 },
                 multiple=False
             ),
+            html.Label("Or load a file from the data folder :", className="text-secondary"),
+            dcc.Dropdown(id="local-file-path", options=list_data_files(), placeholder="Choose a file..."),
+            dbc.ButtonGroup([
+                dbc.Button("📂 Load", id="load-local-button", color="secondary", size="sm"),
+                dbc.Button("🔄 Refresh list", id="refresh-local-files", color="light", size="sm"),
+            ], className="mt-2"),
+            dbc.Progress(id="local-load-progress", value=0, label="", className="mt-2"),
+            html.Div(id="local-load-status", style={"fontSize": "0.85rem", "color": "gray"}),
+            dcc.Interval(id="local-load-interval", interval=300, n_intervals=0, disabled=True),
             html.Div(id='upload-status', style={'color': 'green'}),
             html.Div(id='file-info', style={
                 'margin': '10px 0',
@@ -65,6 +74,13 @@ layout = dbc.Container([
                           className="mt-2"),
                 dbc.Button("▶️ Start", id="start-stop-button", color="primary", className="mt-3 w-100", disabled=True),
                 dcc.Interval(id="interval", interval=500, n_intervals=0, disabled=True),
+                dbc.Checklist(
+                    id="client-playback",
+                    options=[{"label": "Animate in the browser (real time, 50 Hz)", "value": "client"}],
+                    value=[], className="mt-2"
+                ),
+                html.Div(id="client-playback-time", className="text-muted"),
+                dcc.Interval(id="client-interval", interval=20, n_intervals=0, disabled=True),
 
                 html.Label("⏱️ Read speed (ms between frames) :"),
                 dcc.Slider(
@@ -112,6 +128,12 @@ layout = dbc.Container([
                     options=[{"label": "Show continuous trajectory", "value": "trajectory"}],
                     value=[], inline=True
                 ),
+                dbc.Checklist(
+                    id="group-traces",
+                    options=[{"label": "Group traces from 100 objects (faster, checked automatically for large datasets)",
+                              "value": "group"}],
+                    value=[], inline=True
+                ),
                 dbc.Checklist(
                     id="show-vectors",
                     options=[{"label": "Show direction vectors", "value": "vectors"}],
@@ -122,7 +144,12 @@ layout = dbc.Container([
                     dbc.Label("Minimum number of vectors"),
                     dbc.Input(id="min-vectors-input", type="number", min=1, step=1, value=2),
                     dbc.Label("Maximum distance"),
-                    dbc.Input(id="distance-threshold-input", type="number", step=0.01, value=0.1),
+                    dbc.Input(id="distance-threshold-input", type="number", min=0, max=MAX_POINTING_DISTANCE, step=0.01, value=0.1),
+                    dbc.ButtonGroup([
+                        dbc.Button("⏮️ Previous star", id="previous-star-button", color="secondary", size="sm"),
+                        dbc.Button("Next star ⏭️", id="next-star-button", color="secondary", size="sm"),
+                    ], className="mt-2"),
+                    html.Div(id="star-timeline-status", style={"fontSize": "0.85rem", "color": "gray"}),
                 ], style={"marginLeft": "20px", "marginTop": "10px", "maxWidth": "300px"}),
 
                 dbc.Checklist(
@@ -185,15 +212,44 @@ layout = dbc.Container([
                            marks={i: str(i) for i in [0, 0.02, 0.04, 0.06, 0.08, 0.1]},
                            tooltip={"placement": "bottom", "always_visible": True}),
 
+                html.Label("Number of parallel processes for rapprochements :"),
+                dbc.Input(id="detection-workers", type="number", min=1, step=1, value=1),
+                html.Label("Coarse scan stride for rapprochements (frames, 1 = every frame) :", className="mt-2"),
+                dbc.Input(id="detection-coarse-stride", type="number", min=1, step=1, value=1),
+
                 dbc.Button("Analyze couples", id="analyze-couples", color="primary", className="mt-3 w-100"),
                 dcc.Loading(id="loading-analyze", type="circle", fullscreen=True,
                             children=html.Div(id="loading-status")),
-                dbc.Button("Download CSV", id="download-button", color="secondary", className="mt-2 w-100",
+                html.Label("Export format :", className="mt-2"),
+                dcc.Dropdown(id="export-format",
+                             options=[{"label": "CSV (single file)", "value": "csv"},
+                                      {"label": "Parquet (one file per table, zip)", "value": "parquet"},
+                                      {"label": "Feather (one file per table, zip)", "value": "feather"}],
+                             value="csv", clearable=False),
+                dbc.Button("Download results", id="download-button", color="secondary", className="mt-2 w-100",
                            disabled=False),
                 dcc.Download(id="download-csv"),
 
                 dbc.Button("Show tables", id="show-tables-button", color="info", className="mt-2 w-100"),
                 html.Div(id="status-message", style={"marginTop": "10px", "color": "red"}),
+
+                html.H5("Threshold sensitivity", className="mt-4 text-secondary"),
+                html.Label("Range of distance thresholds for rapprochements :"),
+                dcc.RangeSlider(id="sweep-distance-range", min=0, max=0.1, step=0.001, value=[0.01, 0.1],
+                                marks={i: str(i) for i in [0, 0.02, 0.04, 0.06, 0.08, 0.1]},
+                                tooltip={"placement": "bottom", "always_visible": True}),
+                html.Label("Number of distance values :"),
+                dbc.Input(id="sweep-distance-steps", type="number", min=2, step=1, value=10),
+                html.Label("Minimum durations to test (s) :", className="mt-2"),
+                dcc.Dropdown(id="sweep-min-durations",
+                             options=[{"label": f"{v}s", "value": v} for v in [0, 0.5, 1, 1.5, 2, 3, 4, 5]],
+                             value=[0, 0.5, 1, 2, 5], multi=True),
+                html.Label("Time gap tolerances to test (s) :", className="mt-2"),
+                dcc.Dropdown(id="sweep-gap-thresholds",
+                             options=[{"label": f"{v}s", "value": v} for v in [0.02, 0.05, 0.1, 0.2]],
+                             value=[0.05], multi=True),
+                dbc.Button("Run sensitivity analysis", id="run-sweep-button", color="primary",
+                           className="mt-3 w-100"),
             ]),
         ], width=3, style={"backgroundColor": "#f8f9fa", "padding": "20px", "borderRight": "1px solid #dee2e6"}),
         
@@ -205,7 +261,8 @@ layout = dbc.Container([
             html.Div(dbc.Button("🧾 Objects to display", id="toggle-objects-sidebar", color="info", size="sm"),
                      style={"textAlign": "right", "marginBottom": "10px"}),
             html.Div(id="graphs-output"),
-            html.Div(id="couples-table-output", className="mt-4")
+            html.Div(id="couples-table-output", className="mt-4"),
+            dcc.Loading(type="circle", children=html.Div(id="sweep-output", className="mt-4"))
         ], width=9)
     ]),
 
@@ -234,6 +291,11 @@ layout = dbc.Container([
     dcc.Store(id='upload-data-storage'),
     dcc.Store(id='object-colors-storage'),
     dcc.Store(id='axis-ranges-storage'),
+    dcc.Store(id='frame-grid-storage'),
+    dcc.Store(id='local-load-job'),
+    dcc.Store(id='playback-data'),
+    dcc.Store(id='playback-state'),
+    dcc.Store(id='playback-request'),
     dcc.Store(id="analysis-complete", data=False),
     dcc.Store(id='store-interactions'),
     dcc.Store(id='store-fusions'),
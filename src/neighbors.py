@@ -0,0 +1,156 @@
+import numpy as np
+from multiprocessing import Pool
+
+
+######################RECHERCHE DE VOISINS (GRILLE SPATIALE) ###############################
+
+# Demi-coquille des cellules voisines : chaque paire de cellules adjacentes n'est visitée
+# qu'une seule fois, la cellule elle-même étant traitée à part (paires i < j).
+HALF_SHELL_OFFSETS = [
+    (dx, dy, dz)
+    for dx in (-1, 0, 1)
+    for dy in (-1, 0, 1)
+    for dz in (-1, 0, 1)
+    if (dx, dy, dz) > (0, 0, 0)
+]
+
+# Limite de la clé de cellule encodée sur un int64 (frame, cx, cy, cz)
+MAX_CELL_KEY = 2 ** 62
+
+
+def _cell_keys(frames, xyz, cell_size):
+    """
+    Encode chaque point dans une clé entière unique (frame, cellule x, cellule y, cellule z).
+
+    Une marge d'une cellule est ajoutée sur chaque axe pour que les décalages de -1/+1
+    ne débordent jamais sur la frame voisine.
+
+    Retour :
+        tuple : (clés int64, dimensions de la grille (nx, ny, nz))
+    """
+    origin = xyz.min(axis=0)
+    extent = xyz.max(axis=0) - origin
+    n_frames = int(frames.max()) + 1
+
+    # Agrandir la cellule si la grille ne tient pas sur un int64 (résultat inchangé,
+    # seules les paires candidates sont plus nombreuses)
+    while True:
+        dims = np.floor(extent / cell_size).astype(np.int64) + 3
+        if n_frames * int(np.prod(dims)) < MAX_CELL_KEY:
+            break
+        cell_size *= 2
+
+    cells = np.floor((xyz - origin) / cell_size).astype(np.int64) + 1
+    keys = ((frames.astype(np.int64) * dims[0] + cells[:, 0]) * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+    return keys, dims
+
+
+def _expand_ranges(starts, counts):
+    """Concatène les plages [start, start + count) en un seul tableau d'indices."""
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(starts, counts) + (np.arange(total) - offsets)
+
+
+def find_close_pairs(frames, xyz, cutoff):
+    """
+    Trouve toutes les paires de points d'une même frame séparés d'une distance < cutoff.
+
+    Les points sont rangés dans une grille uniforme de pas `cutoff` : seules les cellules
+    identiques ou adjacentes sont comparées, de manière vectorisée pour toutes les frames.
+
+    Paramètres :
+        frames (np.ndarray) : indice entier de la frame de chaque point
+        xyz (np.ndarray) : positions (n, 3)
+        cutoff (float) : distance maximale (stricte) entre deux points
+
+    Retour :
+        tuple : (i, j, dist) indices des points de chaque paire (i < j dans une même cellule)
+                et distances associées
+    """
+    frames = np.asarray(frames)
+    xyz = np.asarray(xyz, dtype=np.float64)
+    empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
+
+    if cutoff is None or cutoff <= 0:
+        return empty
+
+    # Les points sans position (NaN) ne peuvent être proches de personne
+    valid = np.flatnonzero(np.isfinite(xyz).all(axis=1))
+    if len(valid) < 2:
+        return empty
+
+    keys, dims = _cell_keys(frames[valid], xyz[valid], float(cutoff))
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+
+    pairs_i, pairs_j, pairs_d = [], [], []
+    for dx, dy, dz in [(0, 0, 0)] + HALF_SHELL_OFFSETS:
+        target = keys + (dx * dims[1] + dy) * dims[2] + dz
+        lo = np.searchsorted(sorted_keys, target, side="left")
+        hi = np.searchsorted(sorted_keys, target, side="right")
+        counts = hi - lo
+
+        src = np.repeat(np.arange(len(keys)), counts)
+        dst = order[_expand_ranges(lo, counts)]
+
+        if (dx, dy, dz) == (0, 0, 0):
+            keep = src < dst
+            src, dst = src[keep], dst[keep]
+
+        dist = np.sqrt(((xyz[valid[src]] - xyz[valid[dst]]) ** 2).sum(axis=1))
+        close = dist < cutoff
+
+        pairs_i.append(valid[src[close]])
+        pairs_j.append(valid[dst[close]])
+        pairs_d.append(dist[close])
+
+    return np.concatenate(pairs_i), np.concatenate(pairs_j), np.concatenate(pairs_d)
+
+
+def _shard_close_pairs(args):
+    """Tâche d'un processus : paires proches d'une tranche de frames consécutives."""
+    start, frames, xyz, cutoff = args
+    i, j, dist = find_close_pairs(frames - frames[0], xyz, cutoff)
+    return i + start, j + start, dist
+
+
+def find_close_pairs_parallel(frames, xyz, cutoff, n_workers=1, shards_per_worker=4):
+    """
+    Version parallèle de find_close_pairs : la chronologie est découpée en tranches de frames
+    consécutives traitées par un pool de processus.
+
+    Une paire ne reliant que deux points d'une même frame, les tranches sont coupées aux
+    changements de frame et le résultat est exactement celui de find_close_pairs.
+
+    Paramètres :
+        frames (np.ndarray) : indice de frame de chaque point, trié par ordre croissant
+        xyz (np.ndarray) : positions (n, 3)
+        cutoff (float) : distance maximale (stricte) entre deux points
+        n_workers (int) : nombre de processus (1 = calcul dans le processus courant)
+        shards_per_worker (int) : nombre de tranches par processus, pour équilibrer la charge
+
+    Retour :
+        tuple : (i, j, dist) comme find_close_pairs
+    """
+    frames = np.asarray(frames)
+    n_workers = int(n_workers or 1)
+    n_shards = min(n_workers * shards_per_worker, len(frames))
+
+    if n_workers <= 1 or n_shards <= 1:
+        return find_close_pairs(frames, xyz, cutoff)
+
+    # Coupures réparties sur les lignes, ramenées au début de la frame correspondante
+    cuts = np.linspace(0, len(frames), n_shards + 1).astype(np.int64)
+    cuts[1:-1] = np.searchsorted(frames, frames[cuts[1:-1]], side="left")
+    cuts = np.unique(cuts)
+
+    tasks = [(start, frames[start:end], xyz[start:end], cutoff)
+             for start, end in zip(cuts[:-1], cuts[1:]) if end > start]
+
+    with Pool(processes=n_workers) as pool:
+        results = pool.map(_shard_close_pairs, tasks)
+
+    return tuple(np.concatenate([res[k] for res in results]) for k in range(3))
@@ -0,0 +1,566 @@
+import os
+import shutil
+import tempfile
+import warnings
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from .intervals import LifetimeIndex
+
+
+POSITION_COLS = ["XSplined", "YSplined", "ZSplined"]
+VELOCITY_COLS = ["VXSplined", "VYSplined", "VZSplined"]
+
+# Taux de remplissage (lignes / (frames x objets)) à partir duquel le tenseur dense est utilisé
+DENSE_OCCUPANCY_THRESHOLD = 0.5
+
+# Taille au-delà de laquelle le tenseur dense est projeté sur disque (np.memmap)
+DENSE_MEMMAP_BYTES = 256 * 2 ** 20
+
+# Nombre maximal de distances calculées à la fois par DenseTrajectories.close_pairs
+DENSE_CHUNK_DISTANCES = 2 ** 21
+
+# Résolution (s) à laquelle les temps sont comparés à la grille de frames
+GRID_RESOLUTION = 1e-6
+
+# Subdivision maximale de la période d'échantillonnage pour placer chaque temps sur une frame
+MAX_GRID_STRIDE = 1000
+
+
+######################GRILLE DE FRAMES ####################################################
+
+def detect_sampling_period(times):
+    """
+    Détecte la période d'échantillonnage : écart médian entre deux temps distincts consécutifs.
+
+    La médiane ignore les trous de suivi (écarts multiples de la période) ; elle est arrondie
+    au micro-seconde pour absorber les erreurs d'arrondi des flottants (0.020000000000000018).
+    """
+    times = np.asarray(times, dtype=float)
+    unique_times = np.unique(times[np.isfinite(times)])
+    if len(unique_times) < 2:
+        return 1.0
+    return float(np.round(np.median(np.diff(unique_times)), 6)) or 1.0
+
+
+def grid_stride(offsets, period, max_stride=MAX_GRID_STRIDE):
+    """
+    Vérifie le résidu de chaque temps sur la grille de période `period`.
+
+    Paramètres :
+        offsets (np.ndarray) : écarts des temps à l'origine de la grille
+        period (float) : période d'échantillonnage détectée
+
+    Retour :
+        int | None : 1 si tous les temps tombent sur la grille ; sinon le nombre de frames par
+                     période nécessaire pour que chacun tombe exactement sur une frame (2.546 sur
+                     une grille de 0.02 partant de 0.18 -> 10) ; None au-delà de max_stride
+    """
+    steps = int(round(period / GRID_RESOLUTION))
+    if steps <= 1 or len(offsets) == 0:
+        return 1
+    residues = np.unique(np.rint(np.asarray(offsets) / GRID_RESOLUTION).astype(np.int64) % steps)
+    stride = steps // int(np.gcd.reduce(np.append(residues, steps)))
+    return stride if stride <= max_stride else None
+
+
+class FrameGrid:
+    """
+    Grille régulière de frames : la frame k correspond au temps t0 + k * period.
+
+    Les temps sont convertis une seule fois en indices entiers ; toutes les recherches
+    se font ensuite par indice, sans comparaison de flottants. Quand des échantillons sont
+    décalés par rapport à la période d'échantillonnage, la période des frames en est une
+    subdivision : `stride` frames par période (`step`), de sorte que deux observations sont
+    à la même frame si et seulement si leurs temps enregistrés sont égaux.
+    """
+
+    def __init__(self, t0, period, stride=1):
+        self.t0 = float(t0)
+        self.period = float(period)
+        self.stride = int(stride)
+        # Assez de décimales pour représenter exactement la grille (0.02 -> 6 décimales)
+        self.decimals = max(6, int(np.ceil(-np.log10(self.period))) + 4)
+
+    @classmethod
+    def from_times(cls, times, merge=False):
+        """
+        Grille dont l'origine est le premier temps et la période celle détectée dans les données.
+
+        Les temps hors de la grille ne sont jamais fusionnés en silence : la période des frames
+        est subdivisée (voir grid_stride). Si les temps sont trop irréguliers pour cela, la fusion
+        sur la frame la plus proche doit être demandée explicitement.
+
+        Paramètres :
+            times (array-like) : temps des observations
+            merge (bool) : ramener les temps irréguliers sur la grille (avec un avertissement)
+                           au lieu de lever une erreur
+
+        Retour :
+            FrameGrid : grille des données
+
+        Erreurs :
+            ValueError : temps irréguliers et merge=False
+        """
+        times = np.asarray(times, dtype=float)
+        finite = times[np.isfinite(times)]
+        t0 = finite.min() if len(finite) else 0.0
+        period = detect_sampling_period(finite)
+
+        stride = grid_stride(finite - t0, period)
+        if stride is None:
+            if not merge:
+                raise ValueError(
+                    f"Times are not on a regular grid (sampling period {period} s): "
+                    "pass merge=True to round them to the nearest frame.")
+            warnings.warn(f"Irregular times merged onto the nearest frame of a {period} s grid.")
+            stride = 1
+        return cls(t0, period / stride, stride)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["t0"], data["period"], data.get("stride", 1))
+
+    def to_dict(self):
+        """Forme sérialisable (dcc.Store)."""
+        return {"t0": self.t0, "period": self.period, "stride": self.stride}
+
+    @property
+    def step(self):
+        """Période d'échantillonnage (stride frames) : pas du curseur, de la lecture et de la vidéo."""
+        return float(np.round(self.period * self.stride, self.decimals))
+
+    def to_frame(self, t):
+        """Indice de la frame la plus proche du temps t (scalaire ou tableau)."""
+        frames = np.rint((np.asarray(t, dtype=float) - self.t0) / self.period).astype(np.int64)
+        return int(frames) if frames.ndim == 0 else frames
+
+    def to_time(self, k):
+        """Temps de la frame k (scalaire ou tableau)."""
+        times = np.round(self.t0 + np.asarray(k, dtype=float) * self.period, self.decimals)
+        return float(times) if times.ndim == 0 else times
+
+    def to_sample(self, t):
+        """Indice de la période d'échantillonnage (groupe de stride frames) du temps t."""
+        return self.to_frame(t) // self.stride
+
+    def snap(self, t):
+        """Ramène un temps sur la grille."""
+        return self.to_time(self.to_frame(t))
+
+    def sampling_grid(self):
+        """Grille d'une frame par période d'échantillonnage : les échantillons décalés y sont fusionnés."""
+        return FrameGrid(self.t0, self.step)
+
+
+def prepared_grid(df):
+    """
+    Grille d'un DataFrame dont la colonne 'frame' est déjà calculée (prepare_trajectories) :
+    la fusion éventuelle des temps irréguliers y a déjà été signalée.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return FrameGrid.from_times(df["time"], merge=True)
+
+
+######################STOCKAGE DES TRAJECTOIRES ############################################
+
+class TrajectoryStore:
+    """
+    Trajectoires triées par frame, sous forme de tableaux NumPy indexés par frame.
+
+    Construit une seule fois à partir du DataFrame de parse_contents, il remplace les
+    filtres `df[df["time"] == t]` (parcours complet de la colonne) par des tranches :
+    les lignes de la frame k sont `frame_offsets[k]:frame_offsets[k + 1]`. Les frames
+    sont celles de la grille régulière (FrameGrid) : colonne 'frame' si elle existe,
+    calculée à partir de 'time' sinon.
+
+    Seules les colonnes utilisées par les calculs sont copiées, en tableaux NumPy ; les autres
+    colonnes sont lues dans le DataFrame d'origine, référencé sans copie, via source_rows.
+
+    Attributs :
+        source (pd.DataFrame) : DataFrame d'origine (non copié, non trié)
+        source_rows (np.ndarray) : position dans le DataFrame d'origine de chaque ligne du store
+        grid (FrameGrid) : grille de frames des données
+        times (np.ndarray) : temps de chaque frame de la grille
+        frame_offsets (np.ndarray) : début de chaque frame dans les lignes (taille n_frames + 1)
+        frames (np.ndarray) : indice de frame de chaque ligne
+        objects (np.ndarray) : identifiants d'objets distincts triés
+        codes (np.ndarray) : indice de l'objet de chaque ligne dans `objects`
+        row_times (np.ndarray) : temps enregistré de chaque ligne (colonne 'time')
+        xyz (np.ndarray) : positions (n, 3)
+        vxyz (np.ndarray | None) : vitesses (n, 3), None si le fichier n'en contient pas
+    """
+
+    # Référencé sans copie : compté avec le jeu de données, pas dans nbytes (voir nbytes_of)
+    _shared_attributes = ("source",)
+
+    def __init__(self, df, grid=None):
+        if grid is not None:
+            self.grid = grid
+        elif "frame" in df.columns:
+            self.grid = prepared_grid(df)
+        else:
+            self.grid = FrameGrid.from_times(df["time"])
+
+        if "frame" in df.columns:
+            frames = df["frame"].to_numpy(dtype=np.int64)
+        else:
+            frames = self.grid.to_frame(df["time"].to_numpy(dtype=float))
+        codes, objects = pd.factorize(df["object"], sort=True)
+
+        order = np.lexsort((codes, frames))
+        self.source = df
+        self.source_rows = order
+        self.frames = frames[order]
+        self.codes = codes[order]
+        self.objects = np.asarray(objects)
+
+        n_frames = int(self.frames.max()) + 1 if len(self.frames) else 0
+        self.times = self.grid.to_time(np.arange(n_frames))
+        self.frame_offsets = np.searchsorted(self.frames, np.arange(n_frames + 1))
+
+        self.row_times = df["time"].to_numpy(dtype=float)[order]
+        self.xyz = df[POSITION_COLS].to_numpy(dtype=float)[order]
+        if all(col in df.columns for col in VELOCITY_COLS):
+            self.vxyz = df[VELOCITY_COLS].to_numpy(dtype=float)[order]
+        else:
+            self.vxyz = None
+        self._dense = None
+        self._lifetimes = None
+        self._next_rows = None
+        self._object_order = None
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def nbytes(self):
+        """Mémoire occupée : colonnes NumPy, tableaux d'index et tenseur dense s'il est construit."""
+        return nbytes_of(self)
+
+    @property
+    def n_frames(self):
+        return len(self.times)
+
+    def frame_index(self, t):
+        """Indice de la frame du temps t sur la grille, None s'il est hors de l'enregistrement."""
+        if t is None:
+            return None
+        k = self.grid.to_frame(t)
+        if 0 <= k < self.n_frames:
+            return k
+        return None
+
+    @property
+    def n_samples(self):
+        """Nombre de périodes d'échantillonnage (groupes de grid.stride frames)."""
+        return -(-self.n_frames // self.grid.stride)
+
+    @property
+    def sample_offsets(self):
+        """Début de chaque période d'échantillonnage dans les lignes (taille n_samples + 1)."""
+        bounds = np.minimum(np.arange(self.n_samples + 1) * self.grid.stride, self.n_frames)
+        return self.frame_offsets[bounds]
+
+    def frame_slice(self, k, n=1):
+        """Tranche des lignes des frames k à k + n - 1 (O(1))."""
+        return slice(int(self.frame_offsets[k]), int(self.frame_offsets[min(k + n, self.n_frames)]))
+
+    def recorded_times(self, rows):
+        """Temps enregistrés dans le fichier (colonne 'time') des lignes `rows`."""
+        return self.row_times[rows]
+
+    def take(self, rows):
+        """Lignes `rows` du store (tranche ou indices), lues dans le DataFrame d'origine."""
+        return self.source.iloc[self.source_rows[rows]]
+
+    def time_slice(self, t0, t1):
+        """Tranche des lignes dont le temps est dans [t0, t1) (O(log n))."""
+        lo = np.searchsorted(self.times, t0, side="left")
+        hi = np.searchsorted(self.times, t1, side="left")
+        return slice(int(self.frame_offsets[lo]), int(self.frame_offsets[max(lo, hi)]))
+
+    def rows_at_frame(self, k):
+        """Lignes (DataFrame) de la frame k."""
+        return self.take(self.frame_slice(k))
+
+    def rows_between(self, t0, t1):
+        """Lignes (DataFrame) dont le temps est dans [t0, t1)."""
+        return self.take(self.time_slice(t0, t1))
+
+    def row_index(self, frames, codes, span=1):
+        """
+        Ligne de l'observation de l'objet `codes[i]` à la frame `frames[i]`, -1 s'il est absent.
+
+        Les lignes étant triées par (frame, object), la clé frame * n_objets + code est croissante :
+        une recherche dichotomique suffit. Avec span > 1, c'est la première observation de l'objet
+        dans les frames [frames[i], frames[i] + span) (recherche dans l'ordre par objet).
+        """
+        if span > 1:
+            return self._first_row_within(frames, codes, span)
+        n_objects = len(self.objects)
+        row_keys = self.frames.astype(np.int64) * n_objects + self.codes
+        keys = np.asarray(frames, dtype=np.int64) * n_objects + np.asarray(codes, dtype=np.int64)
+        pos = np.searchsorted(row_keys, keys)
+        rows = np.full(len(keys), -1, dtype=np.int64)
+        inside = pos < len(row_keys)
+        found = np.zeros(len(keys), dtype=bool)
+        found[inside] = row_keys[pos[inside]] == keys[inside]
+        rows[found] = pos[found]
+        return rows
+
+    def _first_row_within(self, frames, codes, span):
+        """Première ligne de l'objet `codes[i]` dans les frames [frames[i], frames[i] + span), -1 sinon."""
+        rows = self.next_row_from(frames, codes)
+        found = rows >= 0
+        found[found] = self.frames[rows[found]] < np.asarray(frames, dtype=np.int64)[found] + span
+        return np.where(found, rows, -1)
+
+    def next_row_from(self, frames, codes):
+        """Ligne de la première observation de l'objet `codes[i]` à partir de la frame `frames[i]`, -1 s'il n'y en a plus."""
+        order = self.object_order
+        row_keys = self.codes[order].astype(np.int64) * self.n_frames + self.frames[order]
+        codes = np.asarray(codes, dtype=np.int64)
+        pos = np.searchsorted(row_keys, codes * self.n_frames + np.asarray(frames, dtype=np.int64))
+        rows = np.full(len(pos), -1, dtype=np.int64)
+        inside = pos < len(row_keys)
+        candidates = order[pos[inside]]
+        found = self.codes[candidates] == codes[inside]
+        rows[np.flatnonzero(inside)[found]] = candidates[found]
+        return rows
+
+    def is_present(self, frames, codes):
+        """Indique, de manière vectorisée, si l'objet `codes[i]` est observé à la frame `frames[i]`."""
+        return self.row_index(frames, codes) >= 0
+
+    def max_step(self):
+        """
+        Déplacement maximal d'un objet par frame.
+
+        C'est le plus grand des deux : vitesse maximale (colonnes V*Splined) x période, et plus grand
+        déplacement entre deux observations successives d'un même objet, divisé par leur écart en
+        frames. La distance parcourue en n frames est donc toujours <= n * max_step().
+        """
+        valid = np.isfinite(self.xyz).all(axis=1)
+        order = self.object_order
+        order = order[valid[order]]
+        same = self.codes[order[1:]] == self.codes[order[:-1]]
+        prev, nxt = order[:-1][same], order[1:][same]
+        steps = np.sqrt(((self.xyz[nxt] - self.xyz[prev]) ** 2).sum(axis=1)) / np.maximum(
+            self.frames[nxt] - self.frames[prev], 1)
+
+        step = float(steps.max()) if len(steps) else 0.0
+        if self.vxyz is not None:
+            speed = np.sqrt((self.vxyz ** 2).sum(axis=1))
+            if np.isfinite(speed).any():
+                step = max(step, float(np.nanmax(speed)) * self.grid.period)
+        return step
+
+    def to_source_order(self, values):
+        """Remet des valeurs calculées ligne à ligne sur le store dans l'ordre du DataFrame d'origine."""
+        result = np.empty_like(values)
+        result[self.source_rows] = values
+        return result
+
+    def object_codes(self, selected_objects):
+        """Codes des objets sélectionnés (les objets absents des données sont ignorés)."""
+        selected_codes = pd.Index(self.objects).get_indexer(pd.Index(selected_objects))
+        return selected_codes[selected_codes >= 0]
+
+    def object_mask(self, selected_objects):
+        """Masque booléen des lignes appartenant aux objets sélectionnés."""
+        return np.isin(self.codes, self.object_codes(selected_objects))
+
+    @property
+    def lifetimes(self):
+        """Index des durées de vie (première et dernière frame) de chaque objet, construit au premier appel."""
+        if self._lifetimes is None:
+            self._lifetimes = LifetimeIndex.from_events(self.codes, self.frames, n_keys=len(self.objects))
+        return self._lifetimes
+
+    @property
+    def object_order(self):
+        """Ordre des lignes par (objet, frame), construit au premier appel."""
+        if self._object_order is None:
+            self._object_order = np.lexsort((self.frames, self.codes))
+        return self._object_order
+
+    @property
+    def next_rows(self):
+        """Ligne de l'observation suivante du même objet pour chaque ligne (-1 pour la dernière), construite au premier appel."""
+        if self._next_rows is None:
+            order = self.object_order
+            same = self.codes[order[1:]] == self.codes[order[:-1]]
+            next_rows = np.full(len(self), -1, dtype=np.int64)
+            next_rows[order[:-1][same]] = order[1:][same]
+            self._next_rows = next_rows
+        return self._next_rows
+
+    @property
+    def occupancy(self):
+        """Part des cases (frame, objet) occupées par une observation."""
+        cells = self.n_frames * len(self.objects)
+        return len(self) / cells if cells else 0.0
+
+    def prefers_dense(self, threshold=DENSE_OCCUPANCY_THRESHOLD):
+        """Indique si le tenseur dense est plus avantageux que le format long (remplissage élevé)."""
+        return len(self) > 0 and self.occupancy >= threshold
+
+    def dense(self, directory=None):
+        """
+        Tenseur dense (frames x objets x 3) des trajectoires, construit au premier appel.
+
+        Paramètres :
+            directory (str) : dossier des fichiers .npy projetés en mémoire ; par défaut un
+                              dossier temporaire, utilisé seulement pour les gros tenseurs
+        """
+        if self._dense is None:
+            self._dense = DenseTrajectories(self, directory=directory)
+        return self._dense
+
+
+######################TENSEUR DENSE ########################################################
+
+def _allocate(shape, dtype, fill, directory, name):
+    """Tableau rempli de `fill`, en mémoire ou projeté sur disque (fichier .npy) si directory est fourni."""
+    if directory is None:
+        return np.full(shape, fill, dtype=dtype)
+    array = np.lib.format.open_memmap(os.path.join(directory, f"{name}.npy"), mode="w+", dtype=dtype, shape=shape)
+    array[...] = fill
+    return array
+
+
+class DenseTrajectories:
+    """
+    Trajectoires au format dense : une case par (frame, objet), NaN si l'objet est absent.
+
+    Construit en une seule dispersion à partir du TrajectoryStore (positions[frames, codes] = xyz).
+    Quand la plupart des objets sont présents à chaque frame, les calculs entre objets deviennent
+    de simples opérations sur des tableaux alignés, sans jointure sur le temps.
+
+    Attributs :
+        times (np.ndarray) : temps de chaque frame
+        objects (np.ndarray) : identifiants d'objets (même ordre que les codes du store)
+        positions (np.ndarray) : positions (n_frames, n_objets, 3)
+        velocities (np.ndarray | None) : vitesses (n_frames, n_objets, 3), None sans colonnes de vitesse
+        present (np.ndarray) : booléens (n_frames, n_objets), True si l'objet est observé
+        rows (np.ndarray) : ligne du store de chaque case, -1 si absent
+    """
+
+    def __init__(self, store, directory=None):
+        shape = (store.n_frames, len(store.objects))
+        n_bytes = int(np.prod(shape)) * 3 * 8 * (1 if store.vxyz is None else 2)
+        if directory is None and n_bytes > DENSE_MEMMAP_BYTES:
+            directory = tempfile.mkdtemp(prefix="moustic_dense_")
+            # Répertoire temporaire créé ici : supprimé avec le tenseur (ou à la sortie du programme)
+            weakref.finalize(self, shutil.rmtree, directory, ignore_errors=True)
+        self.directory = directory
+
+        self.times = store.times
+        self.objects = store.objects
+
+        self.positions = _allocate(shape + (3,), np.float64, np.nan, directory, "positions")
+        self.positions[store.frames, store.codes] = store.xyz
+        if store.vxyz is not None:
+            self.velocities = _allocate(shape + (3,), np.float64, np.nan, directory, "velocities")
+            self.velocities[store.frames, store.codes] = store.vxyz
+        else:
+            self.velocities = None
+
+        self.present = np.zeros(shape, dtype=bool)
+        self.present[store.frames, store.codes] = True
+        self.rows = np.full(shape, -1, dtype=np.int64)
+        self.rows[store.frames, store.codes] = np.arange(len(store))
+
+    @property
+    def n_frames(self):
+        return self.positions.shape[0]
+
+    @property
+    def n_objects(self):
+        return self.positions.shape[1]
+
+    @property
+    def nbytes(self):
+        """Mémoire occupée, hors tableaux projetés sur disque (np.memmap)."""
+        return nbytes_of(self)
+
+    def pair_distance(self, code1, code2):
+        """
+        Distance entre deux objets à chaque frame où ils sont tous deux observés.
+
+        Retour :
+            tuple : (indices des frames, distances)
+        """
+        frames = np.flatnonzero(self.present[:, code1] & self.present[:, code2])
+        diff = self.positions[frames, code1] - self.positions[frames, code2]
+        return frames, np.sqrt((diff ** 2).sum(axis=1))
+
+    def close_pairs(self, cutoff, pairs=None):
+        """
+        Toutes les paires d'objets d'une même frame séparés d'une distance < cutoff.
+
+        Les paires d'objets (toutes, ou celles de `pairs`) sont comparées par blocs de frames ;
+        les cases absentes (NaN) ne sont jamais retenues.
+
+        Paramètres :
+            cutoff (float) : distance maximale (stricte)
+            pairs (tuple) : (code1, code2) paires d'objets à comparer, toutes si None
+
+        Retour :
+            tuple : (i, j, dist) lignes du store de chaque paire et distances, comme find_close_pairs
+        """
+        code1, code2 = pairs if pairs is not None else np.triu_indices(self.n_objects, k=1)
+        if cutoff is None or cutoff <= 0 or len(code1) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+        pairs_i, pairs_j, pairs_d = [], [], []
+        chunk = max(1, DENSE_CHUNK_DISTANCES // len(code1))
+        for start in range(0, self.n_frames, chunk):
+            block = self.positions[start:start + chunk]
+            dist = np.sqrt(((block[:, code1] - block[:, code2]) ** 2).sum(axis=2))
+            frames, pairs = np.nonzero(dist < cutoff)
+            pairs_i.append(self.rows[start + frames, code1[pairs]])
+            pairs_j.append(self.rows[start + frames, code2[pairs]])
+            pairs_d.append(dist[frames, pairs])
+
+        return np.concatenate(pairs_i), np.concatenate(pairs_j), np.concatenate(pairs_d)
+
+
+def nbytes_of(obj, seen=None):
+    """
+    Mémoire occupée (octets) par un objet et tout ce qu'il référence : tableaux NumPy, DataFrame,
+    conteneurs et attributs d'objets, chaque tableau n'étant compté qu'une fois. Les tableaux
+    projetés sur disque (np.memmap) et les attributs partagés d'un objet (_shared_attributes)
+    ne sont pas comptés.
+    """
+    seen = set() if seen is None else seen
+    if obj is None or id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, np.memmap):
+        return 0
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(obj, pd.DataFrame) else usage)
+    if isinstance(obj, dict):
+        return sum(nbytes_of(value, seen) for value in obj.values())
+    if isinstance(obj, (list, tuple, set)):
+        return sum(nbytes_of(value, seen) for value in obj)
+    if hasattr(obj, "__dict__"):
+        shared = getattr(obj, "_shared_attributes", ())
+        return nbytes_of({name: value for name, value in vars(obj).items() if name not in shared}, seen)
+    return 0
+
+
+def ensure_store(df, store=None):
+    """Renvoie le TrajectoryStore fourni, ou le construit à partir du DataFrame."""
+    if isinstance(df, TrajectoryStore):
+        return df
+    return store if store is not None else TrajectoryStore(df)
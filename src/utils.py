@@ -3,8 +3,21 @@ import random
 import numpy as np
 import base64
 import io
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
 import plotly.graph_objs as go
 import plotly.express as px
+from dash import Patch
+
+from .neighbors import _expand_ranges, find_close_pairs, find_close_pairs_parallel
+from .store import POSITION_COLS, FrameGrid, TrajectoryStore, ensure_store, nbytes_of, prepared_grid
+from .intervals import extract_intervals
+from .kinematics import add_kinematics
+from .ingest import detect_format, list_data_files, memory_usage_mb, read_trajectories, resolve_data_path
+from .dataset_cache import content_hash, content_hash_file, load_dataset, save_dataset
 
 
 
@@ -22,41 +35,142 @@ def assign_colors_to_objects(objects):
     objects_str = [str(obj) for obj in objects]
     return {obj: color_palette[i % len(color_palette)] for i, obj in enumerate(sorted(objects_str))}
 
+# Colonnes indispensables d'un fichier de trajectoires
+REQUIRED_COLUMNS = ['time', 'object', 'XSplined', 'YSplined', 'ZSplined']
+
+
+def missing_columns(df):
+    """Colonnes de REQUIRED_COLUMNS absentes du DataFrame."""
+    return [col for col in REQUIRED_COLUMNS if col not in df.columns]
+
+
+def prepare_trajectories(df):
+    """
+    Complète des trajectoires fraîchement lues : nettoyage du temps, indice de frame, cinématique
+    et couleur de chaque ligne. Le nombre de voisins n'est calculé qu'à la première demande
+    (DetectionCache.neighbors_count).
+
+    Paramètres :
+        df (pd.DataFrame) : trajectoires lues par read_trajectories
+
+    Retour :
+        pd.DataFrame : le DataFrame complété
+    """
+    # Traiter les données comme dans votre code original
+    df['time'] = pd.to_numeric(df['time'], errors='coerce')
+    df.dropna(subset=['time'], inplace=True)
+    df['object'] = df['object'].cat.remove_unused_categories()
+
+    # Indice entier de frame sur la grille détectée, calculé une seule fois ; des temps trop
+    # irréguliers pour tomber sur une frame y sont fusionnés, avec un avertissement
+    df['frame'] = FrameGrid.from_times(df['time'], merge=True).to_frame(df['time'].to_numpy())
+
+    # Cinématique (vitesse dérivée si absente, vitesse scalaire, accélération, cap, virage)
+    df = add_kinematics(df, TrajectoryStore(df))
+
+    # Couleur de chaque ligne par les codes de catégorie (une couleur par objet, pas par ligne)
+    categories = df['object'].cat.categories
+    obj_colors = assign_colors_to_objects(categories)
+    colors = [obj_colors.get(str(obj), "#000000") for obj in categories]
+    color_categories = pd.unique(np.array(colors))
+    color_codes = pd.Index(color_categories).get_indexer(colors)
+    object_codes = df['object'].cat.codes.to_numpy()
+    df['color'] = pd.Categorical.from_codes(np.where(object_codes >= 0, color_codes[object_codes], -1),
+                                            categories=color_categories)
+    return df.reset_index(drop=True)
+
+
+def load_trajectories(source, filename=None, use_cache=True, cache_dir=None, progress=None, key=None):
+    """
+    Charge un fichier de trajectoires CSV, Parquet ou Feather (octets ou chemin) et ses colonnes
+    dérivées, en passant par le cache disque : un fichier déjà analysé est relu en mémoire
+    projetée, sans analyse.
+
+    Utilisée par l'application Dash, l'outil vidéo et les scripts, pour qu'un même fichier ne
+    soit analysé qu'une fois sur la machine.
+
+    Paramètres :
+        source (bytes | str) : contenu du fichier ou chemin
+        filename (str) : nom du fichier d'origine, pour reconnaître son format (voir detect_format)
+        use_cache (bool) : lire et alimenter le cache disque
+        cache_dir (str) : répertoire du cache (dataset_cache.CACHE_DIR par défaut)
+        progress (callable) : appelée avec le nom de chaque étape ('parsing', 'deriving', 'caching')
+        key (str) : empreinte du contenu si elle est déjà connue (content_hash_file) ; un chemin est
+                    alors analysé directement, sans charger le fichier en mémoire
+
+    Retour :
+        tuple : (DataFrame, empreinte du contenu, True si lu depuis le cache). Si des colonnes
+                de REQUIRED_COLUMNS manquent, le DataFrame est renvoyé tel que lu (voir missing_columns).
+    """
+    if not isinstance(source, (bytes, bytearray)):
+        filename = filename or source
+        if key is None:
+            with open(source, "rb") as f:
+                source = f.read()
+    if key is None:
+        key = content_hash(source)
+
+    if use_cache:
+        df = load_dataset(key, cache_dir=cache_dir)
+        if df is not None:
+            return df, key, True
+
+    progress = progress or (lambda stage: None)
+
+    # CSV avec séparateur point-virgule, ou Parquet/Feather limité aux colonnes utiles
+    progress('parsing')
+    df = read_trajectories(source, filename=filename)
+    if missing_columns(df):
+        return df, key, False
+
+    progress('deriving')
+    df = prepare_trajectories(df)
+    if use_cache:
+        progress('caching')
+        save_dataset(key, df, cache_dir=cache_dir)
+    return df, key, False
+
+
 def parse_contents(contents, filename):
-    """Analyse le contenu du fichier téléchargé"""
+    """
+    Analyse le contenu du fichier téléchargé.
+
+    Le fichier (CSV, Parquet ou Feather) est lu directement depuis les octets décodés, avec les
+    types compacts de read_trajectories, ou relu depuis le cache disque s'il a déjà été analysé ;
+    le message de retour indique le temps de chargement et la mémoire occupée.
+
+    Retour :
+        tuple : (DataFrame, couleurs des objets, message, identifiant du jeu de données) ; l'identifiant
+                est l'empreinte du contenu calculée par load_trajectories (clé du cache disque), si
+                bien qu'un même fichier garde le même identifiant. DataFrame et identifiant valent
+                None en cas d'erreur.
+    """
     content_type, content_string = contents.split(',')
     decoded = base64.b64decode(content_string)
 
     try:
-        if 'csv' in filename:
-            # Assume que le fichier est un CSV avec séparateur point-virgule
-            df = pd.read_csv(io.StringIO(decoded.decode('utf-8')), sep=';')
+        start = time.perf_counter()
+        if detect_format(decoded, filename) is not None:
+            df, dataset_id, from_cache = load_trajectories(decoded, filename=filename)
         else:
-            return None, "Le fichier doit être au format CSV."
+            return None, None, "Le fichier doit être au format CSV, Parquet ou Feather.", None
 
         # Vérifier si les colonnes nécessaires sont présentes
-        required_cols = ['time', 'object', 'XSplined', 'YSplined', 'ZSplined']
-        if not all(col in df.columns for col in required_cols):
-            missing_cols = [col for col in required_cols if col not in df.columns]
-            return None, f"Colonnes manquantes dans le fichier: {', '.join(missing_cols)}"
-
-        # Traiter les données comme dans votre code original
-        df['time'] = pd.to_numeric(df['time'], errors='coerce')
-        df.dropna(subset=['time'], inplace=True)
-        # Modifier cette partie
-        df['object'] = df['object'].astype('category')  # Les objets sont déjà traités comme des chaînes
+        missing_cols = missing_columns(df)
+        if missing_cols:
+            return None, None, f"Colonnes manquantes dans le fichier: {', '.join(missing_cols)}", None
 
         # Attribuer des couleurs aux objets de manière cohérente
-        unique_objects = sorted(df['object'].unique())  # Pas besoin de conversion ici
-        obj_colors = assign_colors_to_objects(unique_objects)
-
-        # Assurez-vous que les clés dans obj_colors sont du même type que les valeurs dans df['object']
-        df['color'] = df['object'].map(lambda x: obj_colors.get(str(x), "#000000"))
+        obj_colors = assign_colors_to_objects(df['object'].cat.categories)
 
-        return df, obj_colors, "File uploaded successfully"
+        elapsed = time.perf_counter() - start
+        origin = "read from cache" if from_cache else "parsed"
+        status = (f"File uploaded successfully ({len(df)} rows, {origin} in {elapsed:.2f} s, "
+                  f"{memory_usage_mb(df):.1f} MB in memory)")
+        return df, obj_colors, status, dataset_id
 
     except Exception as e:
-        return None, None, f"Error loading file: {str(e)}"
+        return None, None, f"Error loading file: {str(e)}", None
 
 # Liste de couleurs spécifiques 
 color_palette = [
@@ -68,141 +182,412 @@ color_palette = [
 
 ####################FONCTIONS DETECTION DE COUPLES #########################################
 
-def detect_interactions(df, distance_threshold=0.055, time_gap_threshold=0.05, min_duration=1.0):
-    """Détecte les couples d'objets proches, filtre ceux dont la durée < min_duration."""
-    df_sorted = df.sort_values(by="time")
-    all_times = df_sorted["time"].unique()
-    active_collisions = {}
-    collision_records = []
-    interaction_counters = {}
-
-    for t in all_times:
-        df_t = df_sorted[df_sorted["time"] == t]
-        objs = df_t["object"].tolist()
-        positions = df_t[["XSplined", "YSplined", "ZSplined"]].values
-
-        for i in range(len(objs)):
-            for j in range(i + 1, len(objs)):
-                o1, o2 = sorted([objs[i], objs[j]])
-                pos1, pos2 = positions[i], positions[j]
-                dist = np.linalg.norm(pos1 - pos2)
-                key = (o1, o2)
-
-                if dist < distance_threshold:
-                    if key not in active_collisions:
-                        if key not in interaction_counters:
-                            interaction_counters[key] = 0
-                        interaction_counters[key] += 1
-                        suffix = chr(96 + interaction_counters[key])
-                        interaction_id = f"{o1}-{o2}-{suffix}"
-                        active_collisions[key] = {
-                            "interaction_id": interaction_id,
-                            "start": t,
-                            "end": t,
-                            "last_time": t
-                        }
-                    else:
-                        last_time = active_collisions[key]["last_time"]
-                        if t - last_time > time_gap_threshold:
-                            duration = active_collisions[key]["end"] - active_collisions[key]["start"]
-                            if duration >= min_duration:
-                                record = {
-                                    "interaction_id": active_collisions[key]["interaction_id"],
-                                    "object1": o1,
-                                    "object2": o2,
-                                    "start": active_collisions[key]["start"],
-                                    "end": active_collisions[key]["end"],
-                                    "duration": round(duration, 2)
-                                }
-                                collision_records.append(record)
-                            interaction_counters[key] += 1
-                            suffix = chr(96 + interaction_counters[key])
-                            interaction_id = f"{o1}-{o2}-{suffix}"
-                            active_collisions[key] = {
-                                "interaction_id": interaction_id,
-                                "start": t,
-                                "end": t,
-                                "last_time": t
-                            }
-                        else:
-                            active_collisions[key]["end"] = t
-                            active_collisions[key]["last_time"] = t
-                else:
-                    if key in active_collisions:
-                        duration = active_collisions[key]["end"] - active_collisions[key]["start"]
-                        if duration >= min_duration:
-                            record = {
-                                "interaction_id": active_collisions[key]["interaction_id"],
-                                "object1": o1,
-                                "object2": o2,
-                                "start": active_collisions[key]["start"],
-                                "end": active_collisions[key]["end"],
-                                "duration": round(duration, 2)
-                            }
-                            collision_records.append(record)
-                        del active_collisions[key]
-
-    for (o1, o2), vals in active_collisions.items():
-        duration = vals["end"] - vals["start"]
-        if duration >= min_duration:
-            record = {
-                "interaction_id": vals["interaction_id"],
-                "object1": o1,
-                "object2": o2,
-                "start": vals["start"],
-                "end": vals["end"],
-                "duration": round(duration, 2)
-            }
-            collision_records.append(record)
-
-    return pd.DataFrame(collision_records)
-
-
-def detect_union(df, distance_seuil=0.02):
+# Nombre maximal d'objets pour comparer toutes les paires sur le tenseur dense
+DENSE_MAX_OBJECTS = 64
+
+# Nombre maximal de paires (qui coexistent) comparées sur le tenseur dense
+DENSE_MAX_PAIRS = DENSE_MAX_OBJECTS * (DENSE_MAX_OBJECTS - 1) // 2
+
+
+def _observed_apart(store, pair_codes, frames, times, time_gap_threshold):
     """
-    Détecte les objets qui pourraient avoir fusionné avec un autre
-    en se basant sur la proximité lors de leur dernier instant de vie.
+    Pour chaque contact (trié par paire puis frame), indique si la paire a été vue ensemble
+    sans être en contact depuis son contact précédent : l'interaction en cours est alors close.
+
+    Seuls les contacts qui prolongeraient l'interaction (écart <= time_gap_threshold) sont
+    vérifiés, sur les frames intermédiaires.
+    """
+    breaks = np.zeros(len(frames), dtype=bool)
+    if len(frames) < 2:
+        return breaks
+
+    skipped = frames[1:] - frames[:-1] - 1
+    to_check = np.flatnonzero(
+        (pair_codes[1:] == pair_codes[:-1]).all(axis=1)
+        & (skipped > 0)
+        & (times[1:] - times[:-1] <= time_gap_threshold)
+    )
+    if len(to_check) == 0:
+        return breaks
+
+    counts = skipped[to_check]
+    owner = np.repeat(np.arange(len(to_check)), counts)
+    offsets = np.arange(len(owner)) - np.repeat(np.cumsum(counts) - counts, counts)
+    between = frames[to_check][owner] + 1 + offsets
+
+    both_present = (store.is_present(between, pair_codes[to_check + 1, 0][owner])
+                    & store.is_present(between, pair_codes[to_check + 1, 1][owner]))
+    breaks[to_check + 1] = np.bincount(owner, weights=both_present, minlength=len(to_check)) > 0
+    return breaks
+
+
+def _use_dense(store):
+    """Indique si les comparaisons entre objets passent par le tenseur dense (objets peu nombreux et presque toujours présents)."""
+    return store.prefers_dense() and len(store.objects) <= DENSE_MAX_OBJECTS
+
+
+def _coarse_close_pairs(store, cutoff, coarse_stride, n_workers=1):
+    """
+    Recherche des paires proches en deux temps : balayage grossier puis affinage.
+
+    1. La chronologie est découpée en fenêtres de coarse_stride frames ; chaque objet y est
+       représenté par sa première observation. Deux objets à moins de cutoff à une frame de la
+       fenêtre sont, à leurs représentants, à moins de cutoff + 2 * (coarse_stride - 1) * max_step
+       (déplacement maximal par frame) : ce seuil gonflé donne les (paire, fenêtre) candidates.
+    2. Seules les frames des fenêtres candidates sont examinées pour la paire, à pleine résolution.
+
+    Le résultat contient exactement les mêmes contacts que la recherche exhaustive.
+
+    Retour :
+        tuple : (i, j, dist) lignes de chaque contact et distances, comme find_close_pairs
+    """
+    n_objects = max(len(store.objects), 1)
+    windows = store.frames // coarse_stride
+
+    # Représentant : première observation (de position connue) de chaque objet dans chaque fenêtre
+    valid = np.flatnonzero(np.isfinite(store.xyz).all(axis=1))
+    _, first = np.unique(windows[valid] * n_objects + store.codes[valid], return_index=True)
+    reps = valid[first]
+
+    inflated = cutoff + 2 * (coarse_stride - 1) * store.max_step()
+    ci, cj, _ = find_close_pairs_parallel(windows[reps], store.xyz[reps], inflated * (1 + 1e-9),
+                                          n_workers=n_workers)
+
+    # Affinage : toutes les frames de chaque fenêtre candidate, pour la paire candidate
+    offsets = np.arange(coarse_stride)
+    frames = (windows[reps[ci]][:, None] * coarse_stride + offsets).ravel()
+    code1 = np.repeat(store.codes[reps[ci]], coarse_stride)
+    code2 = np.repeat(store.codes[reps[cj]], coarse_stride)
+    inside = frames < store.n_frames
+    frames, code1, code2 = frames[inside], code1[inside], code2[inside]
+
+    i = store.row_index(frames, code1)
+    j = store.row_index(frames, code2)
+    both = (i >= 0) & (j >= 0)
+    i, j = i[both], j[both]
+    dist = np.sqrt(((store.xyz[i] - store.xyz[j]) ** 2).sum(axis=1))
+    close = dist < cutoff
+    return i[close], j[close], dist[close]
+
+
+def _close_pairs(store, cutoff, n_workers=1, coarse_stride=1):
+    """
+    Paires de lignes d'une même frame séparées d'une distance < cutoff.
+
+    Avec coarse_stride > 1, la recherche passe par le balayage grossier de _coarse_close_pairs.
+    Sur le tenseur dense, seules les paires d'objets dont les durées de vie se chevauchent sont
+    comparées ; sinon la grille spatiale est utilisée (elle ne compare que des points d'une même
+    frame, donc d'objets qui coexistent).
+    """
+    if coarse_stride and coarse_stride > 1 and cutoff is not None and cutoff > 0 and len(store):
+        return _coarse_close_pairs(store, cutoff, int(coarse_stride), n_workers=n_workers)
+
+    if store.prefers_dense():
+        pairs = store.lifetimes.overlapping_pairs()
+        if len(pairs[0]) <= DENSE_MAX_PAIRS:
+            return store.dense().close_pairs(cutoff, pairs=pairs)
+    return find_close_pairs_parallel(store.frames, store.xyz, cutoff, n_workers=n_workers)
+
+
+def _contact_events(store, i, j):
+    """
+    Contacts (paire, frame) uniques, triés par paire puis par frame.
+
+    La paire est codée o1 * n_objets + o2 avec o1 < o2, l'ordre des codes suivant celui des objets.
+    """
+    n_objects = max(len(store.objects), 1)
+    n_frames = max(store.n_frames, 1)
+    code1 = np.minimum(store.codes[i], store.codes[j]).astype(np.int64)
+    code2 = np.maximum(store.codes[i], store.codes[j]).astype(np.int64)
+    return np.unique((code1 * n_objects + code2) * n_frames + store.frames[i])
+
+
+def _contact_intervals(store, events, time_gap_threshold):
+    """
+    Intervalles de contact (non filtrés sur la durée) à partir des contacts de _contact_events.
+
+    Retour :
+        pd.DataFrame : colonnes de extract_intervals, dans l'ordre de _closure_order
+    """
+    n_objects = max(len(store.objects), 1)
+    pair_ids, frames = np.divmod(events, max(store.n_frames, 1))
+    pair_codes = np.column_stack(np.divmod(pair_ids, n_objects))
+    times = store.recorded_times(store.row_index(frames, pair_codes[:, 0]))
+
+    breaks = _observed_apart(store, pair_codes, frames, times, time_gap_threshold)
+    intervals = extract_intervals(pair_ids, times, time_gap_threshold, breaks=breaks)
+    return intervals.iloc[_closure_order(store, intervals)]
+
+
+def _next_joint_frame(store, code1, code2, frames):
+    """Première frame >= frames[i] où les objets code1[i] et code2[i] sont tous deux observés, -1 s'il n'y en a pas."""
+    result = np.full(len(frames), -1, dtype=np.int64)
+    pending = np.arange(len(frames))
+    frames = np.asarray(frames, dtype=np.int64).copy()
+    while len(pending):
+        rows1 = store.next_row_from(frames[pending], code1[pending])
+        rows2 = store.next_row_from(frames[pending], code2[pending])
+        alive = (rows1 >= 0) & (rows2 >= 0)
+        pending, rows1, rows2 = pending[alive], rows1[alive], rows2[alive]
+        frame1, frame2 = store.frames[rows1], store.frames[rows2]
+        joint = frame1 == frame2
+        result[pending[joint]] = frame1[joint]
+        # Sinon, reprendre à la plus tardive des deux observations suivantes
+        pending = pending[~joint]
+        frames[pending] = np.maximum(frame1, frame2)[~joint]
+    return result
+
+
+def _closure_order(store, intervals):
+    """
+    Ordre des interactions tel que detect_interactions l'a toujours rendu : celui de leur clôture
+    en parcourant l'enregistrement instant par instant.
+
+    Une interaction est close au premier instant après sa fin où les deux objets sont de nouveau
+    observés ensemble (éloignés, ou en contact après un écart trop long), les paires d'un même
+    instant dans l'ordre où la boucle les parcourait (lignes de l'instant dans l'ordre du tri par
+    temps, df.sort_values(by="time")). Les interactions jamais closes suivent, dans l'ordre de
+    leur ouverture ; une interaction ouverte juste à la clôture par écart de la précédente de la
+    même paire garde la place de celle-ci.
 
     Paramètres :
-        df (pd.DataFrame) : contient 'object', 'time', 'XSplined', 'YSplined', 'ZSplined'
-        distance_seuil (float) : distance maximale pour considérer une fusion
+        store (TrajectoryStore) : trajectoires indexées par frame
+        intervals (pd.DataFrame) : intervalles de extract_intervals, triés par (paire, start)
 
     Retour :
-        pd.DataFrame : lignes indiquant les fusions possibles
+        np.ndarray : permutation des lignes de intervals
+    """
+    if len(intervals) == 0:
+        return np.arange(0)
+    n_objects = max(len(store.objects), 1)
+    code1, code2 = np.divmod(intervals["key"].to_numpy(), n_objects)
+    start = store.grid.to_frame(intervals["start"].to_numpy())
+    closure = _next_joint_frame(store, code1, code2, store.grid.to_frame(intervals["end"].to_numpy()) + 1)
+
+    # Chaînes d'interactions d'une même paire closes par écart : même place que la première
+    same_pair = np.zeros(len(intervals), dtype=bool)
+    same_pair[1:] = code1[1:] * n_objects + code2[1:] == code1[:-1] * n_objects + code2[:-1]
+    continued = same_pair & (np.r_[-1, closure[:-1]] == start)
+    head = np.maximum.accumulate(np.where(continued, 0, np.arange(len(intervals))))
+    is_open = closure < 0
+    frame = np.where(is_open, start[head], closure)
+
+    # Rang de chaque ligne dans le tri par temps (quicksort, comme df.sort_values) du DataFrame d'origine
+    source_rank = np.empty(len(store), dtype=np.int64)
+    source_rank[np.argsort(store.to_source_order(store.row_times), kind="quicksort")] = np.arange(len(store))
+    rank1 = source_rank[store.source_rows[store.row_index(frame, code1)]]
+    rank2 = source_rank[store.source_rows[store.row_index(frame, code2)]]
+
+    return np.lexsort((np.maximum(rank1, rank2), np.minimum(rank1, rank2), np.where(is_open, frame, 0),
+                       np.where(is_open, store.n_frames, closure)))
+
+
+def _format_interactions(store, intervals):
+    """Met les intervalles de contact au format du tableau des interactions."""
+    n_objects = max(len(store.objects), 1)
+    o1 = store.objects[intervals["key"].to_numpy() // n_objects]
+    o2 = store.objects[intervals["key"].to_numpy() % n_objects]
+
+    return pd.DataFrame({
+        "interaction_id": [f"{a}-{b}-{chr(96 + r)}" for a, b, r in zip(o1, o2, intervals["rank"])],
+        "object1": o1,
+        "object2": o2,
+        "start": intervals["start"].to_numpy(),
+        "end": intervals["end"].to_numpy(),
+        "duration": [round(d, 2) for d in intervals["duration"].tolist()]
+    })
+
+
+def detect_interactions(df, distance_threshold=0.055, time_gap_threshold=0.05, min_duration=1.0, store=None,
+                        n_workers=1, coarse_stride=1):
     """
-    df_sorted = df.sort_values(by=["object", "time"])
-    fusion_records = []
+    Détecte les couples d'objets proches, filtre ceux dont la durée < min_duration.
+
+    Les paires proches sont obtenues en une passe (grille spatiale, ou tenseur dense restreint aux
+    paires d'objets qui coexistent, voir _close_pairs), puis regroupées en intervalles de contact par extract_intervals. Une interaction se
+    termine si l'écart entre deux contacts dépasse time_gap_threshold ou si les deux objets
+    sont vus ensemble mais éloignés. Un TrajectoryStore déjà construit peut être fourni.
+
+    Avec n_workers > 1, la recherche de paires est répartie par tranches de temps sur plusieurs
+    processus ; les contacts de toutes les tranches sont réunis avant l'extraction des
+    intervalles, si bien que les interactions à cheval sur deux tranches sont recousues et
+    que le résultat est identique au calcul séquentiel.
+
+    Avec coarse_stride = k > 1, seule une frame sur k est balayée, avec un seuil gonflé par le
+    déplacement maximal possible en k frames, puis les fenêtres candidates sont affinées à pleine
+    résolution : le résultat est identique au balayage exhaustif, pour bien moins de calculs sur
+    les essaims clairsemés.
+    """
+    store = ensure_store(df, store)
+    i, j, _ = _close_pairs(store, distance_threshold, n_workers=n_workers, coarse_stride=coarse_stride)
+
+    intervals = _contact_intervals(store, _contact_events(store, i, j), time_gap_threshold)
+    return _format_interactions(store, intervals[intervals["duration"] >= min_duration])
 
-    # Dernière observation pour chaque objet
-    last_obs = df_sorted.groupby("object").tail(1)
 
-    for idx, row in last_obs.iterrows():
-        obj_a = row["object"]
-        t_final = row["time"]
-        pos_a = np.array([row["XSplined"], row["YSplined"], row["ZSplined"]])
+def sweep_interactions(df, distance_thresholds, min_durations, time_gap_thresholds=(0.05,), store=None,
+                       n_workers=1, coarse_stride=1):
+    """
+    Calcule les tableaux d'interactions pour une grille de paramètres en une seule recherche de paires.
 
-        # Tous les objets présents au moment t_final (sauf A)
-        df_at_t = df_sorted[(df_sorted["time"] == t_final) & (df_sorted["object"] != obj_a)]
+    Les distances entre paires sont calculées une fois jusqu'au plus grand seuil ; chaque seuil
+    de distance ne fait ensuite que filtrer ces paires, et chaque durée minimale filtre les
+    intervalles déjà extraits. Chaque tableau est identique à celui de detect_interactions.
 
-        for _, row_b in df_at_t.iterrows():
-            obj_b = row_b["object"]
-            pos_b = np.array([row_b["XSplined"], row_b["YSplined"], row_b["ZSplined"]])
-            dist = np.linalg.norm(pos_a - pos_b)
+    Paramètres :
+        df (pd.DataFrame) : trajectoires issues de parse_contents
+        distance_thresholds (list) : seuils de distance à tester
+        min_durations (list) : durées minimales à tester
+        time_gap_thresholds (list) : tolérances de coupure à tester
+        store (TrajectoryStore) : trajectoires indexées par frame, construites si absentes
+        n_workers (int) : nombre de processus pour la recherche de paires
+        coarse_stride (int) : pas du balayage grossier (1 = balayage exhaustif)
 
-            if dist < distance_seuil:
-                fusion_records.append({
-                    "fusion_id": f"{obj_a}-{obj_b}",
-                    "object1": obj_a,
-                    "object2": obj_b,
-                    "fusion_time": t_final,
-                    "distance": round(dist, 5),
-                    "fusion_name" : obj_b
-                })
+    Retour :
+        dict : {(distance_threshold, min_duration, time_gap_threshold): pd.DataFrame}
+    """
+    store = ensure_store(df, store)
+    results = {}
+    if not distance_thresholds:
+        return results
+
+    i, j, dist = _close_pairs(store, max(distance_thresholds), n_workers=n_workers, coarse_stride=coarse_stride)
+
+    for distance_threshold in sorted(set(distance_thresholds)):
+        close = dist < distance_threshold
+        events = _contact_events(store, i[close], j[close])
+
+        for time_gap_threshold in sorted(set(time_gap_thresholds)):
+            intervals = _contact_intervals(store, events, time_gap_threshold)
+
+            for min_duration in sorted(set(min_durations)):
+                results[(distance_threshold, min_duration, time_gap_threshold)] = _format_interactions(
+                    store, intervals[intervals["duration"] >= min_duration]
+                )
+
+    return results
+
+
+def summarize_sweep(sweep_results):
+    """
+    Résume les résultats de sweep_interactions : une ligne par jeu de paramètres.
+
+    Retour :
+        pd.DataFrame : seuils testés, nombre d'interactions, de paires et durées totale/moyenne
+    """
+    rows = []
+    for (distance_threshold, min_duration, time_gap_threshold), inter_df in sweep_results.items():
+        rows.append({
+            "distance_threshold": distance_threshold,
+            "min_duration": min_duration,
+            "time_gap_threshold": time_gap_threshold,
+            "interaction_count": len(inter_df),
+            "pair_count": len(inter_df[["object1", "object2"]].drop_duplicates()),
+            "total_duration": round(inter_df["duration"].sum(), 3),
+            "mean_duration": round(inter_df["duration"].mean(), 3) if len(inter_df) else 0.0
+        })
+    return pd.DataFrame(rows)
+
+
+def _boundary_neighbors(store, distance_seuil, last):
+    """
+    Joint la première (ou dernière) observation de chaque objet aux positions de tous les
+    autres objets présents dans la même frame, en une seule passe vectorisée.
+
+    Paramètres :
+        store (TrajectoryStore) : trajectoires indexées par frame
+        distance_seuil (float) : distance maximale (stricte) retenue
+        last (bool) : True pour la dernière observation, False pour la première
+
+    Retour :
+        tuple : (lignes de l'objet A, lignes de l'objet B, distances), dans l'ordre des objets
+    """
+    # Les lignes étant triées par temps, la première occurrence d'un code est sa première observation
+    if last:
+        _, rev_index = np.unique(store.codes[::-1], return_index=True)
+        anchors = len(store) - 1 - rev_index
+    else:
+        _, anchors = np.unique(store.codes, return_index=True)
+
+    frame_of_anchor = store.frames[anchors]
+
+    # Tenseur dense : distances de chaque observation à tous les objets de sa frame
+    if _use_dense(store):
+        dense = store.dense()
+        diff = dense.positions[frame_of_anchor] - store.xyz[anchors][:, None, :]
+        dist = np.sqrt((diff ** 2).sum(axis=2))
+        dist[np.arange(len(anchors)), store.codes[anchors]] = np.nan
+        owner, code_b = np.nonzero(dist < distance_seuil)
+        return anchors[owner], dense.rows[frame_of_anchor[owner], code_b], dist[owner, code_b]
+
+    # Toutes les lignes de la frame de chaque observation
+    starts = store.frame_offsets[frame_of_anchor]
+    counts = store.frame_offsets[frame_of_anchor + 1] - starts
+    rows_a = np.repeat(anchors, counts)
+    rows_b = np.repeat(starts, counts) + (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts))
+
+    other = store.codes[rows_b] != store.codes[rows_a]
+    rows_a, rows_b = rows_a[other], rows_b[other]
+
+    dist = np.sqrt(((store.xyz[rows_a] - store.xyz[rows_b]) ** 2).sum(axis=1))
+    close = dist < distance_seuil
+    return rows_a[close], rows_b[close], dist[close]
+
+
+def _format_unions(store, rows_a, rows_b, dist):
+    """Met les fusions candidates (lignes A, lignes B, distances) au format du tableau des fusions."""
+    if len(dist) == 0:
+        return pd.DataFrame()
+
+    obj_a = store.objects[store.codes[rows_a]]
+    obj_b = store.objects[store.codes[rows_b]]
+
+    return pd.DataFrame({
+        "fusion_id": [f"{a}-{b}" for a, b in zip(obj_a, obj_b)],
+        "object1": obj_a,
+        "object2": obj_b,
+        "fusion_time": store.recorded_times(rows_a),
+        "distance": [round(d, 5) for d in dist.tolist()],
+        "fusion_name": obj_b
+    })
+
+
+def _format_ruptures(store, rows_a, rows_b, dist):
+    """Met les ruptures candidates (lignes A, lignes B, distances) au format du tableau des ruptures."""
+    if len(dist) == 0:
+        return pd.DataFrame()
+
+    obj_a = store.objects[store.codes[rows_a]]
+    obj_b = store.objects[store.codes[rows_b]]
+
+    return pd.DataFrame({
+        "rupture_id": [f"{b}-{a}" for a, b in zip(obj_a, obj_b)],
+        "object1": obj_a,
+        "object2": obj_b,
+        "rupture_time": store.recorded_times(rows_a),
+        "distance": [round(d, 5) for d in dist.tolist()],
+        "rupture_name": obj_b
+    })
+
+
+def detect_union(df, distance_seuil=0.02, store=None):
+    """
+    Détecte les objets qui pourraient avoir fusionné avec un autre
+    en se basant sur la proximité lors de leur dernier instant de vie.
+
+    Paramètres :
+        df (pd.DataFrame) : contient 'object', 'time', 'XSplined', 'YSplined', 'ZSplined'
+        distance_seuil (float) : distance maximale pour considérer une fusion
+        store (TrajectoryStore) : trajectoires indexées par frame, construites si absentes
 
-    return pd.DataFrame(fusion_records)
+    Retour :
+        pd.DataFrame : lignes indiquant les fusions possibles
+    """
+    store = ensure_store(df, store)
+    return _format_unions(store, *_boundary_neighbors(store, distance_seuil, last=True))
 
 
-def detect_rupture(df, distance_seuil=0.02):
+def detect_rupture(df, distance_seuil=0.02, store=None):
     """
     Détecte les objets qui pourraient être issus d'une rupture (apparition soudaine proche d'un autre objet)
     en se basant sur la proximité lors de leur premier instant de vie.
@@ -210,145 +595,516 @@ def detect_rupture(df, distance_seuil=0.02):
     Paramètres :
         df (pd.DataFrame) : contient 'object', 'time', 'XSplined', 'YSplined', 'ZSplined'
         distance_seuil (float) : distance maximale pour considérer une rupture
+        store (TrajectoryStore) : trajectoires indexées par frame, construites si absentes
 
     Retour :
         pd.DataFrame : lignes indiquant les ruptures possibles
     """
-    df_sorted = df.sort_values(by=["object", "time"])
-    rupture_records = []
+    store = ensure_store(df, store)
+    return _format_ruptures(store, *_boundary_neighbors(store, distance_seuil, last=False))
 
-    # Première observation pour chaque objet
-    first_obs = df_sorted.groupby("object").head(1)
 
-    for idx, row in first_obs.iterrows():
-        obj_a = row["object"]
-        t_initial = row["time"]
-        pos_a = np.array([row["XSplined"], row["YSplined"], row["ZSplined"]])
+def _pair_interaction_index(inter_df):
+    """
+    Index des interactions par paire d'objets (sans ordre) : nombre d'interactions et durée totale.
 
-        # Tous les objets présents au même moment (sauf A)
-        df_at_t = df_sorted[(df_sorted["time"] == t_initial) & (df_sorted["object"] != obj_a)]
+    Retour :
+        pd.DataFrame : index (pair_low, pair_high), colonnes 'interaction_count', 'total_duration'
+    """
+    if inter_df is None or inter_df.empty:
+        return pd.DataFrame(
+            {"interaction_count": [], "total_duration": []},
+            index=pd.MultiIndex.from_arrays([[], []], names=["pair_low", "pair_high"])
+        )
 
-        for _, row_b in df_at_t.iterrows():
-            obj_b = row_b["object"]
-            pos_b = np.array([row_b["XSplined"], row_b["YSplined"], row_b["ZSplined"]])
-            dist = np.linalg.norm(pos_a - pos_b)
+    pairs = pd.DataFrame({
+        "pair_low": np.minimum(inter_df["object1"].to_numpy(), inter_df["object2"].to_numpy()),
+        "pair_high": np.maximum(inter_df["object1"].to_numpy(), inter_df["object2"].to_numpy()),
+        "duration": inter_df["duration"].to_numpy()
+    })
+    return pairs.groupby(["pair_low", "pair_high"]).agg(
+        interaction_count=("duration", "size"),
+        total_duration=("duration", "sum")
+    )
 
-            if dist < distance_seuil:
-                rupture_records.append({
-                    "rupture_id": f"{obj_b}-{obj_a}",
-                    "object1": obj_a,
-                    "object2": obj_b,
-                    "rupture_time": t_initial,
-                    "distance": round(dist, 5),
-                    "rupture_name": obj_b
-                })
 
-    return pd.DataFrame(rupture_records)
+def _match_couples(inter_df, union_df, rupture_df, rupture_after_fusion):
+    """
+    Associe chaque fusion aux ruptures du même objet (fusion_name == rupture_name) en une jointure,
+    puis y ajoute le bilan des interactions de la paire d'objets ayant fusionné.
 
+    Paramètres :
+        rupture_after_fusion (bool) : True pour fusion ➜ rupture, False pour rupture ➜ fusion
+    """
+    if union_df is None or rupture_df is None or union_df.empty or rupture_df.empty:
+        return pd.DataFrame()
+
+    # Jointure triée sur le nom, dans l'ordre des fusions puis des ruptures
+    fusions = union_df[["fusion_name", "fusion_time", "object1", "object2"]].reset_index(drop=True)
+    ruptures = rupture_df[["rupture_name", "rupture_time", "object1", "object2"]].reset_index(drop=True)
+    matches = fusions.reset_index().merge(
+        ruptures.reset_index(), left_on="fusion_name", right_on="rupture_name", suffixes=("_f", "_r")
+    ).sort_values(by=["index_f", "index_r"])
+
+    if rupture_after_fusion:
+        matches = matches[matches["rupture_time"] > matches["fusion_time"]]
+        durations = matches["rupture_time"] - matches["fusion_time"]
+    else:
+        matches = matches[matches["rupture_time"] < matches["fusion_time"]]
+        durations = matches["fusion_time"] - matches["rupture_time"]
+
+    if matches.empty:
+        return pd.DataFrame()
+
+    # Bilan des interactions de la paire, quel que soit l'ordre des deux objets
+    pair_index = _pair_interaction_index(inter_df)
+    keys = pd.MultiIndex.from_arrays([
+        np.minimum(matches["object1_f"].to_numpy(), matches["object2_f"].to_numpy()),
+        np.maximum(matches["object1_f"].to_numpy(), matches["object2_f"].to_numpy())
+    ])
+    pair_stats = pair_index.reindex(keys)
+
+    return pd.DataFrame({
+        "name_couple": matches["fusion_name"].to_numpy(),
+        "obj1preF": matches["object1_f"].to_numpy(),
+        "obj2preF": matches["object2_f"].to_numpy(),
+        "obj3postR": matches["object1_r"].to_numpy(),
+        "obj4postR": matches["object2_r"].to_numpy(),
+        "timeF": matches["fusion_time"].to_numpy(),
+        "timeR": matches["rupture_time"].to_numpy(),
+        "duration_couple": [round(d, 3) for d in durations.tolist()],
+        "interaction_count": pair_stats["interaction_count"].fillna(0).astype(int).to_numpy(),
+        "total_duration": [round(d, 3) for d in pair_stats["total_duration"].fillna(0).tolist()]
+    })
+
+
+def detect_couples(inter_df, union_df, rupture_df):
+    """
+    Détecte les couples fusion ➜ rupture : un objet disparaît près d'un autre (fusion)
+    puis réapparaît plus tard près de lui (rupture du même objet).
+
+    Retour :
+        pd.DataFrame : un couple par association fusion / rupture
+    """
+    return _match_couples(inter_df, union_df, rupture_df, rupture_after_fusion=True)
+
+
+def detect_rupture_fusion(inter_df, union_df, rupture_df):
+    """
+    Détecte les couples rupture ➜ fusion : un objet apparaît près d'un autre (rupture)
+    puis disparaît plus tard près de lui (fusion du même objet).
+
+    Retour :
+        pd.DataFrame : un couple par association rupture / fusion
+    """
+    return _match_couples(inter_df, union_df, rupture_df, rupture_after_fusion=False)
 
-def detect_couples (inter_df, union_df, rupture_df):
-    couples_records = []
 
-    for _, fusion in union_df.iterrows():
-        fusion_name = fusion["fusion_name"]
-        fusion_time = fusion["fusion_time"]
-        obj1_preF = fusion["object1"]
-        obj2_preF = fusion["object2"]
 
-        matching_ruptures = rupture_df[rupture_df["rupture_name"] == fusion_name]
+####################CHARGEMENT DEPUIS LE DOSSIER DE DONNEES ################################
 
-        for _, rupture in matching_ruptures.iterrows():
-            rupture_time = rupture["rupture_time"]
-            if rupture_time > fusion_time:
-                obj3_postR = rupture["object1"]
-                obj4_postR = rupture["object2"]
-                duration_couple = round(rupture_time - fusion_time, 3)
+# Taille des blocs lus sur le disque entre deux mises à jour de la progression
+LOCAL_READ_CHUNK_BYTES = 8 * 2 ** 20
 
-                # Identifier le couple peu importe l'ordre
-                couple_id_1 = f"{obj1_preF}-{obj2_preF}"
-                couple_id_2 = f"{obj2_preF}-{obj1_preF}"
+# Avancement affiché à la fin de chaque étape d'un chargement local (lecture : de 0 à 0.5)
+LOCAL_LOAD_STAGES = {
+    'reading': (0.0, "Reading file"),
+    'parsing': (0.5, "Parsing"),
+    'deriving': (0.7, "Computing frames, neighbors and kinematics"),
+    'caching': (0.9, "Writing disk cache"),
+}
 
-                # Chercher toutes les interactions avec ce couple, peu importe le suffixe
-                inter_rows = inter_df[inter_df["interaction_id"].str.startswith(couple_id_1) |
-                                      inter_df["interaction_id"].str.startswith(couple_id_2)]
+_load_jobs = {}
+_load_jobs_lock = threading.Lock()
 
-                interaction_count = len(inter_rows)
-                total_duration = inter_rows["duration"].sum() if not inter_rows.empty else 0
 
-                couples_records.append({
-                    "name_couple": fusion_name,
-                    "obj1preF": obj1_preF,
-                    "obj2preF": obj2_preF,
-                    "obj3postR": obj3_postR,
-                    "obj4postR": obj4_postR,
-                    "timeF": fusion_time,
-                    "timeR": rupture_time,
-                    "duration_couple": duration_couple,
-                    "interaction_count": interaction_count,
-                    "total_duration": round(total_duration, 3)
-                })
+def _update_load_job(job_id, **fields):
+    with _load_jobs_lock:
+        _load_jobs[job_id].update(fields)
 
-    return pd.DataFrame(couples_records)
 
+def _run_local_load(job_id, path):
+    """Tâche d'un chargement local : lecture par blocs, analyse, puis dépôt dans le cache serveur."""
+    def on_stage(stage):
+        fraction, label = LOCAL_LOAD_STAGES[stage]
+        _update_load_job(job_id, progress=fraction, stage=label)
 
-def detect_rupture_fusion(inter_df, union_df, rupture_df):
-    couples_records = []
+    def on_read(read):
+        _update_load_job(job_id, progress=0.5 * read / total, stage=LOCAL_LOAD_STAGES['reading'][1])
+
+    try:
+        start = time.perf_counter()
+        size = os.path.getsize(path)
+        total = max(size, 1)
+
+        if detect_format(path) == "csv":
+            # CSV : empreinte calculée par blocs, puis analyse directe depuis le chemin
+            key = content_hash_file(path, chunk_bytes=LOCAL_READ_CHUNK_BYTES, on_chunk=on_read)
+            df, dataset_id, from_cache = load_trajectories(path, progress=on_stage, key=key)
+        else:
+            # Parquet/Feather : lecture par blocs dans un tampon alloué une fois (pas de copie finale)
+            data = bytearray(size)
+            view, read = memoryview(data), 0
+            with open(path, "rb") as f:
+                while read < size:
+                    n = f.readinto(view[read:read + LOCAL_READ_CHUNK_BYTES])
+                    if not n:
+                        break
+                    read += n
+                    on_read(read)
+            view.release()
+            del data[read:]
+            df, dataset_id, from_cache = load_trajectories(data, filename=path, progress=on_stage)
+            del data
+
+        missing_cols = missing_columns(df)
+        if missing_cols:
+            raise ValueError(f"Colonnes manquantes dans le fichier: {', '.join(missing_cols)}")
+
+        obj_colors = assign_colors_to_objects(df['object'].cat.categories)
+        put_dataset(dataset_id, df)
+
+        elapsed = time.perf_counter() - start
+        origin = "read from cache" if from_cache else "parsed"
+        status = (f"File loaded successfully ({len(df)} rows, {origin} in {elapsed:.2f} s, "
+                  f"{memory_usage_mb(df):.1f} MB in memory)")
+        _update_load_job(job_id, progress=1.0, stage="Done", done=True,
+                         result=(dataset_id, obj_colors, status))
+    except Exception as e:
+        _update_load_job(job_id, done=True, error=f"Error loading file: {str(e)}")
+
+
+def start_local_load(name):
+    """
+    Lance en arrière-plan le chargement d'un fichier du dossier de données (voir resolve_data_path),
+    sans passer par le navigateur : l'avancement se lit avec get_load_job.
+
+    Paramètres :
+        name (str) : chemin du fichier, relatif au dossier de données
+
+    Retour :
+        str : identifiant de la tâche
+
+    Lève :
+        ValueError : si le chemin sort du dossier de données, n'existe pas ou n'a pas un format reconnu
+    """
+    path = resolve_data_path(name)
+    job_id = uuid.uuid4().hex
+    with _load_jobs_lock:
+        _load_jobs[job_id] = {"name": name, "progress": 0.0, "stage": "Starting", "done": False,
+                              "result": None, "error": None}
+    threading.Thread(target=_run_local_load, args=(job_id, path), daemon=True).start()
+    return job_id
+
+
+def get_load_job(job_id, pop_done=True):
+    """
+    État d'un chargement local (copie du dictionnaire) : 'progress' (0 à 1), 'stage', 'done',
+    'result' (dataset_id, couleurs, message) ou 'error'. None si la tâche est inconnue.
+    Une tâche terminée est oubliée après lecture si pop_done est vrai.
+    """
+    with _load_jobs_lock:
+        job = _load_jobs.get(job_id)
+        if job is None:
+            return None
+        if job["done"] and pop_done:
+            _load_jobs.pop(job_id)
+        return dict(job)
+
+
+####################CACHE DES JEUX DE DONNEES ##############################################
+
+# Mémoire maximale occupée par les jeux de données conservés côté serveur, DataFrames et
+# produits de détection compris (voir enforce_dataset_cache_limit)
+MAX_DATASET_CACHE_BYTES = 1024 * 2 ** 20
+
+_datasets = OrderedDict()
+_datasets_lock = threading.Lock()
+
+# Total des tailles comptées (DataFrames et DetectionCache), tenu à jour à chaque ajout ou éviction
+_cached_bytes = 0
+
+
+def put_dataset(dataset_id, df):
+    """
+    Conserve un DataFrame côté serveur sous l'identifiant dataset_id ; seul l'identifiant
+    circule ensuite entre le navigateur et le serveur (dcc.Store).
 
-    for _, fusion in union_df.iterrows():
-        fusion_name = fusion["fusion_name"]
-        fusion_time = fusion["fusion_time"]
-        obj1_preF = fusion["object1"]
-        obj2_preF = fusion["object2"]
+    Au-delà de MAX_DATASET_CACHE_BYTES, les jeux de données les moins récemment utilisés sont
+    évincés (le plus récent est toujours conservé), avec leurs produits de détection (voir
+    enforce_dataset_cache_limit).
 
-        matching_ruptures = rupture_df[rupture_df["rupture_name"] == fusion_name]
+    Retour :
+        str : dataset_id
+    """
+    global _cached_bytes
+    size = int(df.memory_usage(deep=True).sum())
+    with _datasets_lock:
+        previous = _datasets.get(dataset_id)
+        _cached_bytes += size - (previous[1] if previous is not None else 0)
+        _datasets[dataset_id] = (df, size)
+        _datasets.move_to_end(dataset_id)
+    enforce_dataset_cache_limit(keep=dataset_id)
+    return dataset_id
+
+
+def enforce_dataset_cache_limit(keep=None):
+    """
+    Évince les jeux de données les moins récemment utilisés tant que la mémoire occupée dépasse
+    MAX_DATASET_CACHE_BYTES. Chaque jeu de données compte son DataFrame et tout son DetectionCache
+    (store et ses colonnes NumPy, tenseur dense, tables de détection, couches de trajectoires).
+    Les tailles sont mesurées une fois, à l'ajout de chaque élément, et leur total est tenu à
+    jour : la limite n'est vérifiée qu'à l'ajout d'un jeu de données ou d'un produit de détection,
+    jamais à la simple lecture.
 
-        for _, rupture in matching_ruptures.iterrows():
-            rupture_time = rupture["rupture_time"]
-            if rupture_time < fusion_time:
-                obj3_postR = rupture["object1"]
-                obj4_postR = rupture["object2"]
-                duration_couple = round(fusion_time - rupture_time, 3)  # durée positive
+    Paramètres :
+        keep (str) : jeu de données jamais évincé (celui en cours d'utilisation)
+    """
+    global _cached_bytes
+    with _datasets_lock, _detection_caches_lock:
+        if _cached_bytes <= MAX_DATASET_CACHE_BYTES:
+            return
+
+        # Par défaut, le jeu de données le plus récemment utilisé est conservé
+        protected = keep if keep is not None else next(reversed(_datasets), None)
+        for dataset_id in list(OrderedDict.fromkeys(list(_datasets) + list(_detection_caches))):
+            if _cached_bytes <= MAX_DATASET_CACHE_BYTES:
+                break
+            if dataset_id == protected:
+                continue
+            entry = _datasets.pop(dataset_id, None)
+            cache = _detection_caches.pop(dataset_id, None)
+            _cached_bytes -= (entry[1] if entry is not None else 0) + (cache.nbytes if cache is not None else 0)
 
-                # Identifier le couple, peu importe l'ordre
-                couple_id_1 = f"{obj1_preF}-{obj2_preF}"
-                couple_id_2 = f"{obj2_preF}-{obj1_preF}"
 
-                # Récupérer toutes les interactions associées à ce couple
-                inter_rows = inter_df[inter_df["interaction_id"].str.startswith(couple_id_1) |
-                                      inter_df["interaction_id"].str.startswith(couple_id_2)]
+def get_dataset(dataset_id):
+    """Renvoie le DataFrame conservé sous dataset_id, None s'il est inconnu ou a été évincé."""
+    if not dataset_id:
+        return None
+    with _datasets_lock:
+        entry = _datasets.get(dataset_id)
+        if entry is None:
+            return None
+        _datasets.move_to_end(dataset_id)
+        return entry[0]
 
-                interaction_count = len(inter_rows)
-                total_duration = inter_rows["duration"].sum() if not inter_rows.empty else 0
 
-                couples_records.append({
-                    "name_couple": fusion_name,
-                    "obj1preF": obj1_preF,
-                    "obj2preF": obj2_preF,
-                    "obj3postR": obj3_postR,
-                    "obj4postR": obj4_postR,
-                    "timeF": fusion_time,
-                    "timeR": rupture_time,
-                    "duration_couple": duration_couple,
-                    "interaction_count": interaction_count,
-                    "total_duration": round(total_duration, 3)
-                })
+####################CACHE DES DETECTIONS ##################################################
 
-    return pd.DataFrame(couples_records)
+# Distance maximale des curseurs de Mosquit'Love : les candidats sont calculés jusqu'à cette valeur
+MAX_SLIDER_DISTANCE = 0.1
+
+# Nombre de jeux de données dont les produits intermédiaires sont conservés
+MAX_CACHED_DATASETS = 4
+
+# Nombre de tables de pointages (une par seuil de distance) conservées par jeu de données
+MAX_CACHED_POINTING_TABLES = 4
+
+# Nombre de tables d'intervalles de contact (une par seuil de distance et d'écart de temps)
+# conservées par jeu de données
+MAX_CACHED_INTERVAL_TABLES = 8
+
+
+class DetectionCache:
+    """
+    Produits intermédiaires des détections pour un jeu de données, réutilisés d'un clic à l'autre.
+
+    Les paires proches (jusqu'à max_distance), les fusions/ruptures candidates avec leurs
+    distances, les intervalles de contact déjà extraits et les tables de pointages sont
+    conservés : changer un seuil ne fait que refiltrer ces candidats. Les tableaux sont identiques à ceux des fonctions
+    detect_interactions, detect_union et detect_rupture.
+    """
+
+    def __init__(self, store, max_distance=MAX_SLIDER_DISTANCE, n_workers=1, coarse_stride=1):
+        self.store = store
+        self.max_distance = max_distance
+        self.n_workers = n_workers
+        self.coarse_stride = coarse_stride
+        self._pairs = None
+        self._union_candidates = None
+        self._rupture_candidates = None
+        self._intervals = OrderedDict()
+        self._pointing_events = OrderedDict()
+        self._trajectory_layers = {}
+        self._neighbors_count = None
+        # Taille de chaque élément conservé, mesurée une fois à son ajout (voir _remember)
+        self._sizes = {"store": store.nbytes}
+        self.nbytes = self._sizes["store"]
+        self.on_resize = None
+
+    def interactions(self, distance_threshold=0.055, time_gap_threshold=0.05, min_duration=1.0):
+        if distance_threshold > self.max_distance:
+            return detect_interactions(self.store, distance_threshold, time_gap_threshold, min_duration,
+                                       n_workers=self.n_workers, coarse_stride=self.coarse_stride)
+
+        if self._pairs is None:
+            self._pairs = _close_pairs(self.store, self.max_distance, n_workers=self.n_workers,
+                                       coarse_stride=self.coarse_stride)
+            self._remember("pairs", self._pairs)
+
+        key = (distance_threshold, time_gap_threshold)
+        intervals = self._intervals.get(key)
+        if intervals is None:
+            i, j, dist = self._pairs
+            close = dist < distance_threshold
+            events = _contact_events(self.store, i[close], j[close])
+            intervals = _contact_intervals(self.store, events, time_gap_threshold)
+            self._intervals[key] = intervals
+            while len(self._intervals) > MAX_CACHED_INTERVAL_TABLES:
+                self._forget(("intervals", self._intervals.popitem(last=False)[0]))
+            self._remember(("intervals", key), intervals)
+        else:
+            self._intervals.move_to_end(key)
+
+        return _format_interactions(self.store, intervals[intervals["duration"] >= min_duration])
+
+    def unions(self, distance_seuil=0.02):
+        if distance_seuil > self.max_distance:
+            return detect_union(self.store, distance_seuil)
+
+        if self._union_candidates is None:
+            self._union_candidates = _boundary_neighbors(self.store, self.max_distance, last=True)
+            self._remember("union_candidates", self._union_candidates)
+
+        rows_a, rows_b, dist = self._union_candidates
+        close = dist < distance_seuil
+        return _format_unions(self.store, rows_a[close], rows_b[close], dist[close])
+
+    def ruptures(self, distance_seuil=0.02):
+        if distance_seuil > self.max_distance:
+            return detect_rupture(self.store, distance_seuil)
+
+        if self._rupture_candidates is None:
+            self._rupture_candidates = _boundary_neighbors(self.store, self.max_distance, last=False)
+            self._remember("rupture_candidates", self._rupture_candidates)
+
+        rows_a, rows_b, dist = self._rupture_candidates
+        close = dist < distance_seuil
+        return _format_ruptures(self.store, rows_a[close], rows_b[close], dist[close])
+
+    def pointing_events(self, distance_threshold=0.1):
+        """Table des pointages de tout l'enregistrement (compute_pointing_events), par seuil de distance."""
+        events = self._pointing_events.get(distance_threshold)
+        if events is None:
+            events = compute_pointing_events(self.store, distance_threshold)
+            self._pointing_events[distance_threshold] = events
+            while len(self._pointing_events) > MAX_CACHED_POINTING_TABLES:
+                self._forget(("pointing", self._pointing_events.popitem(last=False)[0]))
+            self._remember(("pointing", distance_threshold), events)
+        else:
+            self._pointing_events.move_to_end(distance_threshold)
+        return events
+
+    def neighbors_count(self):
+        """
+        Nombre de voisins de chaque ligne (compute_neighbors_count), calculé à la première coloration
+        par voisins puis conservé ; Series indexée comme le DataFrame d'origine.
+        """
+        if self._neighbors_count is None:
+            counts = self.store.to_source_order(compute_neighbors_count(self.store)).astype(np.int32)
+            self._neighbors_count = pd.Series(counts, index=self.store.source.index, name="neighbors_count")
+            self._remember("neighbors_count", self._neighbors_count)
+        return self._neighbors_count
+
+    def trajectory_layer(self, view, selected_objects, obj_colors, batched=False):
+        """
+        Traces des trajectoires complètes d'une vue (trajectory_traces, ou batched_trajectory_traces
+        en rendu groupé), construites une fois par sélection d'objets : les figures suivantes les
+        réutilisent. Les couches d'une autre sélection sont supprimées dès que la sélection change.
+        """
+        selection = tuple(selected_objects)
+        key = (view, selection, batched)
+        layer = self._trajectory_layers.get(key)
+        if layer is None:
+            for old_key in [k for k in self._trajectory_layers if k[1] != selection]:
+                del self._trajectory_layers[old_key]
+                self._forget(("layer", old_key))
+            build = batched_trajectory_traces if batched else trajectory_traces
+            layer = build(self.store, view, selected_objects, obj_colors)
+            self._trajectory_layers[key] = layer
+            self._remember(("layer", key), layer)
+        return layer
+
+    def _remember(self, name, value):
+        """
+        Compte un produit ajouté : sa taille est mesurée une seule fois (voir nbytes_of), avec celle
+        du store qui a pu grandir (tenseur dense, index construits au premier appel). nbytes est
+        ensuite le total de ces tailles, et on_resize(variation) est appelée si elle est définie.
+        """
+        self._sizes[name] = nbytes_of(value)
+        self._sizes["store"] = self.store.nbytes
+        self._resized()
+
+    def _forget(self, name):
+        """Retire de nbytes la taille d'un produit évincé."""
+        self._sizes.pop(name, None)
+        self._resized()
+
+    def _resized(self):
+        """Recalcule nbytes à partir des tailles déjà mesurées et signale la variation."""
+        previous, self.nbytes = self.nbytes, sum(self._sizes.values())
+        if self.on_resize is not None and self.nbytes != previous:
+            self.on_resize(self.nbytes - previous)
+
+
+_detection_caches = OrderedDict()
+_detection_caches_lock = threading.Lock()
+
+
+def _detection_cache_resized(dataset_key, cache, delta):
+    """Reporte la variation de taille d'un DetectionCache conservé dans le total, puis applique la limite."""
+    global _cached_bytes
+    with _datasets_lock, _detection_caches_lock:
+        if _detection_caches.get(dataset_key) is not cache:
+            return
+        _cached_bytes += delta
+    if delta > 0:
+        enforce_dataset_cache_limit(keep=dataset_key)
+
+
+def get_detection_cache(dataset_key, load_df, n_workers=1, coarse_stride=1):
+    """
+    Renvoie le DetectionCache du jeu de données `dataset_key`, en le construisant au premier appel.
+
+    Paramètres :
+        dataset_key (str) : identifiant du jeu de données (ex. empreinte de son contenu)
+        load_df (callable) : fonction sans argument renvoyant le DataFrame, appelée seulement si absent
+        n_workers (int) : nombre de processus pour la recherche de paires
+        coarse_stride (int) : pas du balayage grossier de la recherche de paires (1 = exhaustif)
+
+    Retour :
+        DetectionCache
+    """
+    global _cached_bytes
+    with _detection_caches_lock:
+        cache = _detection_caches.get(dataset_key)
+        if cache is not None:
+            _detection_caches.move_to_end(dataset_key)
+            cache.n_workers = n_workers
+            cache.coarse_stride = coarse_stride
+    if cache is not None:
+        return cache
+
+    cache = DetectionCache(TrajectoryStore(load_df()), n_workers=n_workers, coarse_stride=coarse_stride)
+    cache.on_resize = lambda delta: _detection_cache_resized(dataset_key, cache, delta)
+
+    with _datasets_lock, _detection_caches_lock:
+        previous = _detection_caches.pop(dataset_key, None)
+        _cached_bytes += cache.nbytes - (previous.nbytes if previous is not None else 0)
+        _detection_caches[dataset_key] = cache
+        while len(_detection_caches) > MAX_CACHED_DATASETS:
+            _cached_bytes -= _detection_caches.popitem(last=False)[1].nbytes
+    enforce_dataset_cache_limit(keep=dataset_key)
+    return cache
 
 
 
 ################# FONCTION GRAPHIQUES #####################################################
 
 ########## ------- Fonctions traitement des données ------ #########
-def load_inputs(df_json, obj_colors_data, axis_ranges_data):
-    try:
-        if not df_json:
-            return None, {}, {}
-
-        # Ne pas spécifier orient='split' car le JSON est au format 'columns'
-        df = pd.read_json(io.StringIO(df_json))
-    except ValueError as e:
-        return None, {}, {}
+def load_inputs(dataset_id, obj_colors_data, axis_ranges_data):
+    """Récupère le DataFrame conservé côté serveur (voir put_dataset), les couleurs et les bornes des axes."""
+    df = get_dataset(dataset_id)
 
     obj_colors = obj_colors_data if isinstance(obj_colors_data, dict) else {}
     axis_ranges = axis_ranges_data if isinstance(axis_ranges_data, dict) else {}
@@ -356,14 +1112,109 @@ def load_inputs(df_json, obj_colors_data, axis_ranges_data):
     return df, obj_colors, axis_ranges
 
 
-def prepare_dataframes(df, selected_objects, selected_time, window=0.02):
+def prepare_frame(df, selected_objects, selected_time, window=None, store=None):
+    """
+    Lignes des objets sélectionnés sur la période d'échantillonnage qui commence à selected_time
+    (ou dans la fenêtre [selected_time, selected_time + window) si elle est précisée), lues comme
+    une tranche du store.
+    """
+    store = ensure_store(df, store)
+    if window is None:
+        k = store.frame_index(selected_time)
+        rows_t = store.frame_slice(k, store.grid.stride) if k is not None else slice(0, 0)
+    else:
+        rows_t = store.time_slice(selected_time, selected_time + window)
+    df_t = store.take(rows_t)
+    if selected_objects:
+        # Masque calculé sur la seule tranche de l'instant, pas sur tout l'enregistrement
+        df_t = df_t[np.isin(store.codes[rows_t], store.object_codes(selected_objects))]
+    return df_t.copy()
+
+
+def prepare_dataframes(df, selected_objects, selected_time, window=None, store=None):
+    """
+    Prépare les données d'un instant : lignes de la frame de selected_time (ou de la fenêtre
+    [selected_time, selected_time + window) si elle est précisée) et trajectoires complètes
+    des objets sélectionnés.
+
+    Les trajectoires ne sont extraites qu'une fois (une seule indexation, sans copie
+    supplémentaire) : df_selected_objects et df_all_times sont le même DataFrame, en lecture seule.
+    """
+    store = ensure_store(df, store)
 
-    df_selected_objects = df[df['object'].isin(selected_objects)] if selected_objects else df
-    df_all_times = df[df['object'].isin(selected_objects)] if selected_objects else df
-    df_t = df[(df['time'] >= selected_time) & (df['time'] < selected_time + window)]
     if selected_objects:
-        df_t = df_t[df_t['object'].isin(selected_objects)]
-    return df_t.copy(), df_selected_objects.copy(), df_all_times.copy()
+        df_selected_objects = store.take(np.flatnonzero(store.object_mask(selected_objects)))
+    else:
+        df_selected_objects = store.source
+
+    df_t = prepare_frame(df, selected_objects, selected_time, window=window, store=store)
+    return df_t, df_selected_objects, df_selected_objects
+
+
+def frame_context(df, detections, selected_objects, selected_time, color_by_neighbors, color_by_speed,
+                  show_vectors, min_vectors, distance_threshold, group_traces=None):
+    """
+    Tout ce qui dépend de l'instant affiché dans les vues spatiales (XY, XZ, YZ, 3D) : lignes
+    de la frame, bornes des couleurs, étoiles et sources des pointages.
+
+    Paramètres :
+        df (pd.DataFrame) : trajectoires issues de parse_contents
+        detections (DetectionCache) : store et tables de pointages du jeu de données
+        selected_objects (list) : objets sélectionnés
+        selected_time (float) : instant affiché
+        color_by_neighbors, color_by_speed, show_vectors (list) : options cochées
+        min_vectors (int) : nombre minimal de pointages pour une étoile
+        distance_threshold (float) : distance maximale d'un pointage
+        group_traces (list) : option de rendu groupé cochée (voir batched_rendering)
+
+    Retour :
+        dict : 'time', 'store', 'frame_index', 'df_t', 'present' (objets présents), 'max_neighbors', 'speed_min',
+               'speed_max', 'stars', 'pointing_sources', et les options d'affichage (dont 'batched')
+    """
+    store = detections.store
+    df_t = prepare_frame(df, selected_objects, selected_time, store=store)
+
+    # Ajouter colonnes de vitesse et de voisins (nombre de voisins calculé à la première demande)
+    neighbors_count = detections.neighbors_count() if "neighbors" in color_by_neighbors else None
+    df_t, max_neighbors = compute_speed_and_neighbors(df_t, color_by_neighbors, neighbors_count)
+
+    # Calcul des bornes de vitesse
+    speed_min, speed_max = (0, 1.3) if "by_speed" in color_by_speed else (None, None)
+
+    # Traitement des vecteurs (si demandés)
+    vectors = bool(show_vectors and "vectors" in show_vectors)
+    if vectors:
+        min_vectors = int(min_vectors) if min_vectors is not None else 2
+        distance_threshold = float(distance_threshold) if distance_threshold is not None else 0.1
+
+        stars, pointing_pairs = get_objects_with_star_3d(
+            df, selected_objects, selected_time,
+            distance_threshold=distance_threshold,
+            min_vectors=min_vectors,
+            store=store,
+            pointing_events=detections.pointing_events(distance_threshold)
+        )
+        pointing_sources = {source for source, target in pointing_pairs if target in stars}
+    else:
+        stars = []
+        pointing_sources = set()
+
+    return {
+        "time": selected_time,
+        "store": store,
+        "frame_index": store.frame_index(selected_time),
+        "df_t": df_t,
+        "present": set(df_t['object'].unique()),
+        "max_neighbors": max_neighbors,
+        "speed_min": speed_min,
+        "speed_max": speed_max,
+        "stars": stars,
+        "pointing_sources": pointing_sources,
+        "color_by_neighbors": color_by_neighbors,
+        "color_by_speed": color_by_speed,
+        "vectors": vectors,
+        "batched": batched_rendering(selected_objects, group_traces),
+    }
 
 
 
@@ -380,7 +1231,7 @@ def create_marker(df_obj, obj, obj_colors, color_by_neighbors, color_by_speed, m
             cmin=0,
             cmax=max_neighbors,
             showscale=True,
-            colorbar=dict(title="Neighbors")
+            colorbar=dict(title=dict(text="Neighbors"))
         )
         showlegend = False
         name = None
@@ -392,7 +1243,7 @@ def create_marker(df_obj, obj, obj_colors, color_by_neighbors, color_by_speed, m
             cmin=speed_min,
             cmax=speed_max,
             showscale=True,
-            colorbar=dict(title="Speed (m/s)")
+            colorbar=dict(title=dict(text="Speed (m/s)"))
         )
         showlegend = False
         name = None
@@ -403,58 +1254,6 @@ def create_marker(df_obj, obj, obj_colors, color_by_neighbors, color_by_speed, m
         name = str_obj
     return marker, showlegend, name
 
-def add_scatter_trace(fig, x_data, y_data, marker, name, showlegend):
-    fig.add_trace(go.Scatter(
-        x=x_data,
-        y=y_data,
-        mode="markers",
-        marker=marker,
-        name=name,
-        showlegend=showlegend
-    ))
-
-def add_trajectory_trace(fig, df_all_times, obj, x_col, y_col, color):
-    df_obj_all = df_all_times[df_all_times['object'] == obj]
-    fig.add_trace(go.Scatter(
-        x=df_obj_all[x_col],
-        y=df_obj_all[y_col],
-        mode='lines',
-        line=dict(color=color, width=1),
-        name=f"{obj} (trajectoire)",
-        opacity=0.5,
-        showlegend=False
-    ))
-
-def add_direction_vector(fig, df, obj, selected_time, x_col, y_col):
-    df_obj_all = df[df['object'] == obj].copy()
-    df_obj_all["time_diff"] = abs(df_obj_all["time"] - selected_time)
-    df_obj_current = df_obj_all.sort_values("time_diff").head(1)
-
-    if not df_obj_current.empty:
-        current_pos = df_obj_current[[x_col, y_col]].iloc[0].values
-
-        df_obj_next = df_obj_all[df_obj_all["time"] > df_obj_current["time"].values[0]].sort_values("time").head(1)
-        if not df_obj_next.empty:
-            next_pos = df_obj_next[[x_col, y_col]].iloc[0].values
-
-            vector = next_pos - current_pos
-            norm = np.linalg.norm(vector)
-
-            if norm > 0.001:
-                unit_vector = vector / norm
-                scale = 0.1
-                extended_vector = unit_vector * scale
-                end_pos = current_pos + extended_vector
-
-                fig.add_trace(go.Scatter(
-                    x=[current_pos[0], end_pos[0]],
-                    y=[current_pos[1], end_pos[1]],
-                    mode='lines',
-                    line=dict(color='black', width=2),
-                    showlegend=False,
-                    name=f"Direction {obj}"
-                ))
-
 def axis_label(axis_name):
     return f"{axis_name}(m)"
 
@@ -484,7 +1283,7 @@ def create_marker_3d(df_obj, obj, obj_colors, color_by_neighbors, color_by_speed
             cmin=0,
             cmax=max_neighbors,
             showscale=True,
-            colorbar=dict(title="Neighbors")
+            colorbar=dict(title=dict(text="Neighbors"))
         )
         showlegend = False
         name = None
@@ -496,7 +1295,7 @@ def create_marker_3d(df_obj, obj, obj_colors, color_by_neighbors, color_by_speed
             cmin=speed_min,
             cmax=speed_max,
             showscale=True,
-            colorbar=dict(title="Speed"),
+            colorbar=dict(title=dict(text="Speed")),
             symbol='diamond' if is_star else 'circle'
         )
         showlegend = False
@@ -513,98 +1312,419 @@ def create_marker_3d(df_obj, obj, obj_colors, color_by_neighbors, color_by_speed
     return marker, showlegend, name
 
 
-def add_trajectory_3d(fig, df_all_times, obj, color):
-    df_obj_all = df_all_times[df_all_times['object'] == obj]
-    fig.add_trace(go.Scatter3d(
-        x=df_obj_all["XSplined"],
-        y=df_obj_all["YSplined"],
-        z=df_obj_all["ZSplined"],
-        mode='lines',
-        line=dict(color=color, width=2),
-        name=f"{obj} (trajectoire)",
-        opacity=0.5,
-        showlegend=False
-    ))
+def update_layout_3d(fig, axis_ranges):
+    fig.update_layout(
+        title="3D position of objects",
+        scene=dict(
+            xaxis=dict(title="X(m)", range=[axis_ranges["x_min"], axis_ranges["x_max"]], autorange=False),
+            yaxis=dict(title="Y(m)", range=[axis_ranges["y_min"], axis_ranges["y_max"]], autorange=False),
+            zaxis=dict(title="Z(m)", range=[axis_ranges["z_min"], axis_ranges["z_max"]], autorange=False),
+            aspectmode='manual',
+            aspectratio=dict(x=1, y=1, z=1)
+        ),
+        height=600,
+        margin=dict(l=0, r=0, b=0, t=40)
+    )
 
 
-def add_vector_3d(fig, df, obj, selected_time, pointing_sources):
-    df_obj_all = df[df['object'] == obj].copy()
-    df_obj_all["time_diff"] = abs(df_obj_all["time"] - selected_time)
-    df_obj_current = df_obj_all.sort_values("time_diff").head(1)
-
-    if not df_obj_current.empty:
-        current_pos = df_obj_current[["XSplined", "YSplined", "ZSplined"]].iloc[0].values
-        df_obj_next = df_obj_all[df_obj_all["time"] > df_obj_current["time"].values[0]].sort_values("time").head(1)
-
-        if not df_obj_next.empty:
-            next_pos = df_obj_next[["XSplined", "YSplined", "ZSplined"]].iloc[0].values
-            direction_vector = next_pos - current_pos
-            norm = np.linalg.norm(direction_vector)
-
-            if norm > 0.001:
-                unit_vector = direction_vector / norm
-                scale = 0.1
-                extended_vector = unit_vector * scale
-                end_pos = current_pos + extended_vector
-
-                vector_color = 'red' if obj in pointing_sources else 'black'
-                fig.add_trace(go.Scatter3d(
-                    x=[current_pos[0], end_pos[0]],
-                    y=[current_pos[1], end_pos[1]],
-                    z=[current_pos[2], end_pos[2]],
-                    mode='lines',
-                    line=dict(color=vector_color, width=6),
-                    name=f"Direction {obj}",
-                    showlegend=False
-                ))
+######### ----- Vues spatiales : couches statique et dynamique ----- ##########
 
-######### ----- Fonctions xyzt, xt, yt, zt ----- ##########
+# Vues planes : (colonne en abscisse, colonne en ordonnée, titre, nom de l'axe x, nom de l'axe y)
+PLANE_VIEWS = {
+    "xy": ("YSplined", "XSplined", "X as a function of Y", "Y", "X"),
+    "xz": ("ZSplined", "XSplined", "X as a function of Z", "Z", "X"),
+    "yz": ("ZSplined", "YSplined", "Y as a function of Z", "Z", "Y"),
+}
+SPATIAL_VIEWS = list(PLANE_VIEWS) + ["3d"]
 
-def split_trajectory_segments(df_obj, gap_threshold):
-    """Découpe une trajectoire en segments continus basés sur des gaps temporels."""
-    times = df_obj['time'].values
-    time_diffs = np.diff(times)
-    gap_indices = np.where(time_diffs > gap_threshold)[0]
 
-    segments = []
-    start_idx = 0
-    for gap_idx in gap_indices:
-        end_idx = gap_idx + 1
-        segments.append(df_obj.iloc[start_idx:end_idx])
-        start_idx = end_idx
-    segments.append(df_obj.iloc[start_idx:])  # Dernier segment
-    return segments
+def view_graph_id(view):
+    """Identifiant du dcc.Graph d'une vue, ciblé par les mises à jour partielles de la lecture."""
+    return {"type": "view-graph", "view": view}
 
 
-def add_time_series_trace(fig, segment, obj, color, coords, show_legend=True):
+def rows_by_object(store, selected_objects):
     """
-    Ajoute une ou plusieurs coordonnées (X, Y, Z) en fonction du temps à une figure.
+    Lignes du store de chaque objet sélectionné, dans l'ordre des frames, lues en une passe
+    (tableau vide pour un objet absent des données).
 
-    Parameters:
-        - fig: objet go.Figure
-        - segment: DataFrame du segment
-        - obj: identifiant de l'objet
-        - color: couleur utilisée
-        - coords: str ou list de str parmi ['X', 'Y', 'Z']
-        - show_legend: booléen, pour afficher la légende sur la 1ère courbe
+    Retour :
+        list : un tableau d'indices de lignes par objet, dans l'ordre de selected_objects
     """
-    dash_styles = {'X': 'solid', 'Y': 'dot', 'Z': 'dash'}
+    codes = pd.Index(store.objects).get_indexer(pd.Index(selected_objects))
+    rows = np.flatnonzero(np.isin(store.codes, codes[codes >= 0]))
+    # Lignes regroupées par objet, dans l'ordre des frames pour chacun (tri stable)
+    rows = rows[np.argsort(store.codes[rows], kind="stable")]
+    bounds = np.searchsorted(store.codes[rows], np.stack([codes, codes + 1]))
+    bounds[:, codes < 0] = 0
+    return [rows[start:end] for start, end in zip(bounds[0], bounds[1])]
+
+
+def trajectory_traces(store, view, selected_objects, obj_colors):
+    """
+    Couche statique d'une vue spatiale : trajectoire complète de chaque objet sélectionné (trace
+    vide pour un objet absent des données), tracée en ligne semi-transparente et construite
+    directement en dictionnaires plotly bruts.
+    """
+    # Colonnes d'origine (sans conversion), lues via source_rows
+    columns = {col: store.source[col].to_numpy() for col in POSITION_COLS}
+    traces = []
+    for obj, obj_rows in zip(selected_objects, rows_by_object(store, selected_objects)):
+        obj_rows = store.source_rows[obj_rows]
+        color = obj_colors.get(str(obj), "#000000")
+        if view == "3d":
+            trace = dict(type="scatter3d", x=columns["XSplined"][obj_rows], y=columns["YSplined"][obj_rows],
+                         z=columns["ZSplined"][obj_rows], line=dict(color=color, width=2))
+        else:
+            x_col, y_col = PLANE_VIEWS[view][:2]
+            trace = dict(type="scatter", x=columns[x_col][obj_rows], y=columns[y_col][obj_rows],
+                         line=dict(color=color, width=1))
+        trace.update(mode='lines', name=f"{obj} (trajectoire)", opacity=0.5, showlegend=False)
+        traces.append(trace)
+    return traces
+
+
+# Longueur des flèches de direction et déplacement minimal pour en tracer une
+DIRECTION_LENGTH = 0.1
+DIRECTION_MIN_NORM = 0.001
+
+
+def direction_segments(store, k, selected_objects, axes):
+    """
+    Flèches de direction de tous les objets sélectionnés présents sur la période d'échantillonnage
+    qui commence à la frame k, en une passe :
+    de la position courante vers l'observation suivante du même objet, ramenée à
+    DIRECTION_LENGTH, dans le plan des colonnes `axes` (indices 0, 1, 2 pour X, Y, Z).
+
+    Les positions sont lues dans le TrajectoryStore, sans parcourir tout le DataFrame pour
+    chaque objet.
+
+    Retour :
+        dict : objet -> (début, fin) ; les objets sans observation suivante ou immobiles sont absents
+    """
+    if k is None:
+        return {}
+    codes = store.object_codes(selected_objects)
+    rows = store.row_index(np.full(len(codes), k), codes, span=store.grid.stride)
+    codes, rows = codes[rows >= 0], rows[rows >= 0]
+    next_rows = store.next_rows[rows]
+
+    current = store.xyz[rows][:, axes]
+    with np.errstate(invalid="ignore"):
+        vector = store.xyz[next_rows][:, axes] - current
+        norm = np.sqrt((vector ** 2).sum(axis=1))
+        valid = (next_rows >= 0) & (norm > DIRECTION_MIN_NORM)
+        end = current + vector / norm[:, None] * DIRECTION_LENGTH
+
+    return {store.objects[code]: (current[i], end[i]) for i, code in zip(np.flatnonzero(valid), codes[valid])}
+
+
+# Colonnes de l'instant lues par les marqueurs (positions et grandeurs de coloration)
+FRAME_COLUMNS = ["XSplined", "YSplined", "ZSplined", "speed", "neighbors_count"]
+
+
+def frame_traces(view, df, frame, selected_objects, obj_colors):
+    """
+    Couche dynamique d'une vue spatiale à l'instant de frame (voir frame_context) : un marqueur
+    par objet sélectionné, puis une direction par objet si les vecteurs sont affichés.
+
+    Un objet absent à cet instant garde une trace vide, hors légende : le nombre et l'ordre des
+    traces ne dépendent que de la sélection, ce qui permet de les remplacer par index (Patch).
+    Les traces sont des dictionnaires plotly bruts, sans la validation coûteuse des go.Scatter.
+    """
+    if frame["batched"]:
+        return batched_frame_traces(view, frame, selected_objects, obj_colors)
+
+    df_t = frame["df_t"]
+    rows_by_object = df_t.groupby('object', observed=True).indices
+    columns = {col: df_t[col].to_numpy() for col in FRAME_COLUMNS}
+    no_rows = np.empty(0, dtype=np.int64)
+
+    axes = [0, 1, 2] if view == "3d" else [POSITION_COLS.index(col) for col in PLANE_VIEWS[view][:2]]
+    segments = direction_segments(frame["store"], frame["frame_index"], selected_objects, axes) \
+        if frame["vectors"] else {}
+
+    markers, vectors = [], []
+    for obj in selected_objects:
+        rows = rows_by_object.get(obj, no_rows)
+        # Valeurs de l'objet à cet instant (même accès par colonne qu'un DataFrame pour create_marker)
+        df_obj = {col: values[rows] for col, values in columns.items()}
+        present = len(rows) > 0
+        segment = segments.get(obj)
+        vector_coords = [[start, end] for start, end in zip(*segment)] if segment is not None else [[]] * len(axes)
+
+        if view == "3d":
+            marker, showlegend, name = create_marker_3d(df_obj, obj, obj_colors, frame["color_by_neighbors"],
+                                                        frame["color_by_speed"], frame["max_neighbors"],
+                                                        frame["speed_min"], frame["speed_max"],
+                                                        obj in frame["stars"])
+            markers.append(dict(type="scatter3d", x=df_obj["XSplined"], y=df_obj["YSplined"],
+                                z=df_obj["ZSplined"], mode="markers", marker=marker, name=name,
+                                showlegend=showlegend and present))
+            if frame["vectors"]:
+                vector_color = 'red' if obj in frame["pointing_sources"] else 'black'
+                vectors.append(dict(type="scatter3d", x=vector_coords[0], y=vector_coords[1], z=vector_coords[2],
+                                    mode='lines', line=dict(color=vector_color, width=6),
+                                    name=f"Direction {obj}", showlegend=False))
+        else:
+            x_col, y_col = PLANE_VIEWS[view][:2]
+            marker, showlegend, name = create_marker(df_obj, obj, obj_colors, frame["color_by_neighbors"],
+                                                     frame["color_by_speed"], frame["max_neighbors"],
+                                                     frame["speed_min"], frame["speed_max"])
+            markers.append(dict(type="scatter", x=df_obj[x_col], y=df_obj[y_col], mode="markers",
+                                marker=marker, name=name, showlegend=showlegend and present))
+            if frame["vectors"]:
+                vectors.append(dict(type="scatter", x=vector_coords[0], y=vector_coords[1], mode='lines',
+                                    line=dict(color='black', width=2), showlegend=False,
+                                    name=f"Direction {obj}"))
+    return markers + vectors
+
+
+def spatial_figure(view, df, frame, selected_objects, obj_colors, axis_ranges, trajectories=None):
+    """
+    Figure complète d'une vue spatiale : trajectoires (couche de trajectory_traces, si elle est
+    fournie), puis la couche dynamique de frame_traces, avec les bornes fixes de axis_ranges.
+    """
+    fig = go.Figure()
+    if trajectories is not None and frame["batched"]:
+        fig.add_traces(trajectories)
+    elif trajectories is not None:
+        # Trajectoires affichées pour les seuls objets présents à cet instant (la couche partagée
+        # n'est pas modifiée)
+        fig.add_traces([dict(trace, visible=obj in frame["present"])
+                        for obj, trace in zip(selected_objects, trajectories)])
+    fig.add_traces(frame_traces(view, df, frame, selected_objects, obj_colors))
+
+    if view == "3d":
+        update_layout_3d(fig, axis_ranges)
+    else:
+        x_col, y_col, title, x_title, y_title = PLANE_VIEWS[view]
+        x_key, y_key = x_col[0].lower(), y_col[0].lower()
+        update_layout(fig, title, x_title, y_title,
+                      [axis_ranges[f'{x_key}_min'], axis_ranges[f'{x_key}_max']],
+                      [axis_ranges[f'{y_key}_min'], axis_ranges[f'{y_key}_max']])
+    return fig
+
+
+def spatial_frame_patch(view, df, frame, selected_objects, obj_colors, trajectories=None):
+    """
+    Mise à jour partielle (dash.Patch) d'une figure de spatial_figure pour un nouvel instant :
+    seules les traces dynamiques et la visibilité des trajectoires sont envoyées, la mise en
+    page et les trajectoires (couche `trajectories` de la figure, None si elles sont masquées)
+    restent dans le navigateur.
+    """
+    patch = Patch()
+    offset = 0
+    if trajectories is not None:
+        if not frame["batched"]:
+            for i, obj in enumerate(selected_objects):
+                patch["data"][i]["visible"] = obj in frame["present"]
+        offset = len(trajectories)
+    for i, trace in enumerate(frame_traces(view, df, frame, selected_objects, obj_colors)):
+        patch["data"][offset + i] = trace
+    return patch
+
+
+######### ----- Vues spatiales : rendu groupé ----- ##########
 
-    # Permettre une string simple ou une liste
-    if isinstance(coords, str):
-        coords = [coords]
+# Si l'option est cochée (d'office pour un jeu de données d'au moins autant d'objets), à partir de
+# ce nombre d'objets sélectionnés, chaque vue est tracée en quelques traces (une par couleur de
+# trajectoire, une pour les marqueurs, une par couleur de vecteur, plus les entrées de légende)
+BATCH_OBJECT_THRESHOLD = 100
 
-    for i, coord in enumerate(coords):
-        fig.add_trace(go.Scatter(
-            x=segment['time'],
-            y=segment[f"{coord}Splined"],
-            mode='lines',
-            name=f"{obj} - {coord}",
-            line=dict(color=color, dash=dash_styles.get(coord, 'solid')),
-            legendgroup=str(obj),
-            showlegend=show_legend
-        ))
 
+def batched_rendering(selected_objects, group_traces=None):
+    """
+    Indique si les vues spatiales sont tracées en rendu groupé : option "group" cochée et au
+    moins BATCH_OBJECT_THRESHOLD objets sélectionnés. L'option est cochée d'office au chargement
+    d'un jeu de données d'au moins BATCH_OBJECT_THRESHOLD objets (voir dataset_values) et reste
+    décochable pour revenir au rendu par objet.
+    """
+    return "group" in (group_traces or []) and len(selected_objects or []) >= BATCH_OBJECT_THRESHOLD
+
+
+def _join_with_nan(parts):
+    """Concatène des segments en un seul tableau, séparés par NaN (plotly coupe la ligne à chaque NaN)."""
+    if not parts:
+        return np.empty(0)
+    parts = [np.asarray(segment) for segment in parts]
+    # Même précision que les segments (float32 pour les positions lues du fichier)
+    separator = np.full(1, np.nan, dtype=np.result_type(np.float32, *parts))
+    joined = [part for segment in parts for part in (segment, separator)]
+    return np.concatenate(joined[:-1])
+
+
+def batched_trajectory_traces(store, view, selected_objects, obj_colors):
+    """
+    Couche statique groupée : les trajectoires de trajectory_traces réunies en une trace par
+    couleur, séparées par NaN. La visibilité n'est plus réglable objet par objet : une seule
+    entrée de légende "Trajectories" masque ou affiche toute la couche.
+    """
+    groups = OrderedDict()
+    for trace in trajectory_traces(store, view, selected_objects, obj_colors):
+        if len(trace["x"]):
+            groups.setdefault(trace["line"]["color"], []).append(trace)
+
+    keys = ["x", "y", "z"] if view == "3d" else ["x", "y"]
+    traces = []
+    for color, group in groups.items():
+        trace = dict(group[0], name="Trajectories", legendgroup="trajectories", showlegend=not traces)
+        for key in keys:
+            trace[key] = _join_with_nan([t[key] for t in group])
+        traces.append(trace)
+    return traces
+
+
+def batched_frame_traces(view, frame, selected_objects, obj_colors):
+    """
+    Couche dynamique groupée : un seul marqueur pour tous les objets sélectionnés (couleurs,
+    et symboles en 3D, par point), puis les vecteurs en une trace par couleur séparée par NaN.
+
+    Les points sont dans l'ordre de la sélection, NaN pour un objet absent à cet instant : la
+    trace garde la même taille d'un instant à l'autre. Le survol affiche l'identifiant de
+    l'objet, comme le nom de trace du rendu par objet.
+
+    Viennent enfin, après les vecteurs, une trace vide par objet sélectionné, réduite à son
+    entrée de légende (couleur de l'objet, affichée pour les seuls objets présents comme dans
+    frame_traces) : la légende reste celle du rendu par objet et le nombre de traces ne
+    dépend toujours que de la sélection.
+    """
+    df_t = frame["df_t"]
+    names = [str(obj) for obj in selected_objects]
+    positions = pd.Index(selected_objects).get_indexer(df_t["object"].astype(object))
+    found = positions >= 0
+
+    # Valeurs de l'instant dans l'ordre de la sélection (NaN pour les objets absents)
+    values = {}
+    for col in FRAME_COLUMNS:
+        column = np.full(len(selected_objects), np.nan)
+        column[positions[found]] = df_t[col].to_numpy(dtype=float)[found]
+        values[col] = column
+
+    axes = [0, 1, 2] if view == "3d" else [POSITION_COLS.index(col) for col in PLANE_VIEWS[view][:2]]
+    segments = direction_segments(frame["store"], frame["frame_index"], selected_objects, axes) \
+        if frame["vectors"] else {}
+
+    if view == "3d":
+        marker, showlegend, _ = create_marker_3d(values, None, obj_colors, frame["color_by_neighbors"],
+                                                 frame["color_by_speed"], frame["max_neighbors"],
+                                                 frame["speed_min"], frame["speed_max"], False)
+        if "symbol" in marker:
+            marker["symbol"] = ['diamond' if obj in frame["stars"] else 'circle' for obj in selected_objects]
+        coords = dict(x=values["XSplined"], y=values["YSplined"], z=values["ZSplined"])
+        hovertemplate = "x: %{x}<br>y: %{y}<br>z: %{z}<extra>%{text}</extra>"
+        vector_styles = [('black', 6), ('red', 6)]
+    else:
+        marker, showlegend, _ = create_marker(values, None, obj_colors, frame["color_by_neighbors"],
+                                              frame["color_by_speed"], frame["max_neighbors"],
+                                              frame["speed_min"], frame["speed_max"])
+        x_col, y_col = PLANE_VIEWS[view][:2]
+        coords = dict(x=values[x_col], y=values[y_col])
+        hovertemplate = "(%{x}, %{y})<extra>%{text}</extra>"
+        vector_styles = [('black', 2)]
+
+    if showlegend:
+        # Couleur propre à chaque objet
+        marker["color"] = [obj_colors.get(name, "#000000") for name in names]
+    else:
+        # Échelle de couleurs : valeur quelconque (cmin) pour les objets absents, non affichés
+        marker["color"] = np.where(np.isnan(marker["color"]), marker["cmin"] or 0, marker["color"])
+
+    trace_type = "scatter3d" if view == "3d" else "scatter"
+    traces = [dict(type=trace_type, mode="markers", marker=marker, text=names, hovertemplate=hovertemplate,
+                   name="Objects", showlegend=False, **coords)]
+
+    if frame["vectors"]:
+        for color, width in vector_styles:
+            parts = [[] for _ in axes]
+            for obj, (start, end) in segments.items():
+                is_red = view == "3d" and obj in frame["pointing_sources"]
+                if (color == 'red') == is_red:
+                    for a in range(len(axes)):
+                        parts[a].append([start[a], end[a]])
+            vector_coords = dict(zip(coords, (_join_with_nan(part) for part in parts)))
+            traces.append(dict(type=trace_type, mode='lines', line=dict(color=color, width=width),
+                               name="Directions", showlegend=False, **vector_coords))
+
+    # Entrées de légende par objet : traces sans point visible (None), placées après les vecteurs
+    # pour que la lecture dans le navigateur retrouve le marqueur groupé en première trace 'markers'
+    present = np.zeros(len(selected_objects), dtype=bool)
+    present[positions[found]] = True
+    empty = {key: [None] for key in coords}
+    for name, is_present in zip(names, present):
+        traces.append(dict(type=trace_type, mode="markers", marker=dict(color=obj_colors.get(name, "#000000")),
+                           name=name, showlegend=bool(showlegend and is_present), hoverinfo="skip", **empty))
+    return traces
+
+
+######### ----- Lecture dans le navigateur ----- ##########
+
+# Valeurs (frames × objets × 3) envoyées au navigateur par bloc de lecture : 1 Mo en float32
+PLAYBACK_CHUNK_VALUES = 2 ** 18
+
+
+def playback_axes():
+    """Colonnes de positions (indices 0, 1, 2 pour X, Y, Z) tracées en x, y (et z) dans chaque vue spatiale."""
+    axes = {view: [POSITION_COLS.index(col) for col in PLANE_VIEWS[view][:2]] for view in PLANE_VIEWS}
+    axes["3d"] = [0, 1, 2]
+    return axes
+
+
+def playback_chunk(store, selected_objects, start_frame, session=None, max_values=PLAYBACK_CHUNK_VALUES,
+                   obj_colors=None, batched=False):
+    """
+    Positions des objets sélectionnés sur un bloc de frames consécutives, animées ensuite dans
+    le navigateur (assets/playback.js) sans repasser par le serveur. Les frames de la lecture sont
+    les périodes d'échantillonnage (grid.step, voir FrameGrid.to_sample).
+
+    Encodage compact par frame : un tableau float32 (frames, objets, 3) en base64, les objets dans
+    l'ordre de la sélection (celui des traces de marqueurs), NaN si l'objet est absent. Le bloc est
+    limité à max_values valeurs ; le navigateur demande le suivant avant d'en atteindre la fin.
+
+    Paramètres :
+        store (TrajectoryStore) : trajectoires indexées par frame
+        selected_objects (list) : objets sélectionnés, dans l'ordre des traces
+        start_frame (int) : première frame du bloc
+        session (str) : identifiant de la lecture en cours (nouveau si absent)
+        max_values (int) : nombre maximal de valeurs du bloc
+        obj_colors (dict) : couleur de chaque objet, reprise par les marqueurs pendant la lecture
+        batched (bool) : vues tracées en rendu groupé (voir batched_rendering)
+
+    Retour :
+        dict : 'session', 'start_frame', 'n_frames', 'n_objects', 'last_frame', 't0', 'period',
+            'axes' (voir playback_axes), 'batched' (voir batched_rendering), 'colors' (une par
+            objet sélectionné) et 'positions' (base64)
+    """
+    # Un code par trace, -1 pour un objet sélectionné absent des données
+    codes = pd.Index(store.objects).get_indexer(pd.Index(selected_objects))
+    last_frame = store.n_samples - 1
+    start_frame = int(min(max(start_frame, 0), max(last_frame, 0)))
+    n_frames = max(1, min(max_values // max(3 * len(codes), 1), last_frame + 1 - start_frame))
+
+    frames = np.repeat(np.arange(start_frame, start_frame + n_frames), len(codes))
+    all_codes = np.tile(codes, n_frames)
+    rows = np.full(len(frames), -1, dtype=np.int64)
+    known = all_codes >= 0
+    stride = store.grid.stride
+    rows[known] = store.row_index(frames[known] * stride, all_codes[known], span=stride)
+    positions = np.full((len(rows), 3), np.nan, dtype=np.float32)
+    positions[rows >= 0] = store.xyz[rows[rows >= 0]]
+
+    return {
+        "session": session or uuid.uuid4().hex,
+        "start_frame": start_frame,
+        "n_frames": int(n_frames),
+        "n_objects": len(codes),
+        "last_frame": int(last_frame),
+        "t0": store.grid.t0,
+        "period": store.grid.step,
+        "axes": playback_axes(),
+        "batched": bool(batched),
+        "colors": [(obj_colors or {}).get(str(obj), "#000000") for obj in selected_objects],
+        "positions": base64.b64encode(positions.astype("<f4").tobytes()).decode("ascii")
+    }
+
+######### ----- Fonctions xyzt, xt, yt, zt ----- ##########
 
 def update_coord_figure_layout(fig, title, yaxis_title):
     """Applique un layout standard à une figure existante."""
@@ -621,6 +1741,173 @@ def update_coord_figure_layout(fig, title, yaxis_title):
     )
 
 
+def update_xyzt_layout(fig):
+    """Layout de la figure X, Y, Z en fonction du temps."""
+    fig.update_layout(
+        title="X, Y, Z versus time",
+        xaxis_title="Time (s)",
+        yaxis_title="Position (m)",
+        legend_title="Object - Coordinates",
+        height=500,
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        xaxis=dict(gridcolor='lightgray'),
+        yaxis=dict(gridcolor='lightgray'),
+    )
+
+
+# Courbes de chaque graphique temporel
+TIME_SERIES_VIEWS = {"xyzt": ["X", "Y", "Z"], "xt": ["X"], "yt": ["Y"], "zt": ["Z"]}
+
+# Écart de temps (s) au-delà duquel une trajectoire est coupée
+TIME_SERIES_GAP = 0.05
+
+# Points par courbe après sous-échantillonnage : environ un par pixel d'un graphique pleine largeur,
+# réduit quand les courbes sont nombreuses pour que la figure entière ne dépasse pas
+# TIME_SERIES_FIGURE_BUDGET points
+TIME_SERIES_POINT_BUDGET = 1500
+TIME_SERIES_MIN_POINTS = 200
+TIME_SERIES_FIGURE_BUDGET = 200_000
+
+
+def time_series_graph_id(view):
+    """Identifiant du dcc.Graph d'un graphique temporel, ciblé par le rechargement au zoom."""
+    return {"type": "time-series-graph", "view": view}
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Sous-échantillonnage Largest-Triangle-Three-Buckets : garde n_out points d'une courbe en
+    conservant sa forme (premier et dernier points, puis dans chaque intervalle le point qui forme
+    le plus grand triangle avec le point gardé précédent et la moyenne de l'intervalle suivant).
+
+    Paramètres :
+        x, y (np.ndarray) : abscisses croissantes et ordonnées
+        n_out (int) : nombre de points à garder
+
+    Retour :
+        np.ndarray : indices des points gardés, croissants (au plus n_out)
+    """
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        # Pas d'intervalle intérieur : premier et dernier points seulement
+        return np.array([0, n - 1][:max(n_out, 0)], dtype=np.int64)
+
+    # n_out - 2 intervalles entre le premier et le dernier point
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    bucket_edges = np.append(edges, n)
+    means_x = np.add.reduceat(x, bucket_edges[:-1]) / np.diff(bucket_edges)
+    means_y = np.add.reduceat(y, bucket_edges[:-1]) / np.diff(bucket_edges)
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        area = np.abs((x[a] - means_x[b + 1]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (means_y[b + 1] - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[b + 1] = a
+    return selected
+
+
+def relayout_time_range(relayout_data):
+    """
+    Intervalle de temps affiché d'après le relayoutData d'un graphique temporel.
+
+    Retour :
+        tuple | None : (t0, t1) après un zoom, (None, None) après un retour à la vue complète,
+            None si l'évènement ne concerne pas l'axe des temps
+    """
+    if not relayout_data:
+        return None
+    if "xaxis.range[0]" in relayout_data and "xaxis.range[1]" in relayout_data:
+        return float(relayout_data["xaxis.range[0]"]), float(relayout_data["xaxis.range[1]"])
+    if "xaxis.range" in relayout_data:
+        t0, t1 = relayout_data["xaxis.range"]
+        return float(t0), float(t1)
+    if relayout_data.get("xaxis.autorange"):
+        return None, None
+    return None
+
+
+def time_series_figure(store, view, selected_objects, obj_colors, time_range=(None, None)):
+    """
+    Graphique temporel (xyzt, xt, yt ou zt) en traces WebGL : une courbe par objet et coordonnée,
+    coupée par NaN aux écarts de plus de TIME_SERIES_GAP, sous-échantillonnée par LTTB.
+
+    LTTB est appliqué une fois à la courbe complète de l'objet (segments mis bout à bout), puis
+    un NaN est remis entre deux points gardés de segments différents : chaque trace a au plus
+    budget + nombre de segments points, quel que soit le nombre de segments.
+
+    Avec time_range, seuls les points de l'intervalle (et un de part et d'autre) sont retenus :
+    au zoom, la courbe est rechargée à pleine résolution tant que l'intervalle tient dans le budget.
+
+    Paramètres :
+        store (TrajectoryStore) : trajectoires indexées par frame
+        view (str) : 'xyzt', 'xt', 'yt' ou 'zt'
+        selected_objects (list) : objets sélectionnés
+        obj_colors (dict) : couleur de chaque objet
+        time_range (tuple) : (t0, t1) affiché, (None, None) pour tout l'enregistrement
+
+    Retour :
+        go.Figure
+    """
+    coords = TIME_SERIES_VIEWS[view]
+    dash_styles = {'X': 'solid', 'Y': 'dot', 'Z': 'dash'}
+    t0, t1 = time_range
+    budget = int(np.clip(TIME_SERIES_FIGURE_BUDGET // max(len(selected_objects) * len(coords), 1),
+                         TIME_SERIES_MIN_POINTS, TIME_SERIES_POINT_BUDGET))
+
+    # Temps enregistrés (pas ceux de la grille de frames), comme les courbes par segment d'origine
+    all_times = store.row_times
+
+    fig = go.Figure()
+    for obj, rows in zip(selected_objects, rows_by_object(store, selected_objects)):
+        times = all_times[rows]
+        if t0 is not None:
+            lo = max(int(np.searchsorted(times, t0, side="left")) - 1, 0)
+            hi = int(np.searchsorted(times, t1, side="right")) + 1
+            rows, times = rows[lo:hi], times[lo:hi]
+
+        # Segments continus d'au moins deux points, mis bout à bout
+        cuts = np.flatnonzero(np.diff(times) > TIME_SERIES_GAP) + 1
+        segments = [(start, end) for start, end in zip(np.r_[0, cuts], np.r_[cuts, len(rows)]) if end - start >= 2]
+        if not segments:
+            continue
+        kept = np.concatenate([np.arange(start, end) for start, end in segments])
+        segment_ids = np.repeat(np.arange(len(segments)), [end - start for start, end in segments])
+        rows, times = rows[kept], times[kept]
+
+        color = obj_colors.get(str(obj), "#000000")
+        for coord in coords:
+            values = store.xyz[rows, POSITION_COLS.index(f"{coord}Splined")]
+            keep = lttb_indices(times, values, budget)
+            # Coupure (NaN) entre deux points gardés de segments différents
+            breaks = np.flatnonzero(np.diff(segment_ids[keep])) + 1
+
+            fig.add_trace(go.Scattergl(
+                x=np.insert(times[keep], breaks, np.nan),
+                y=np.insert(values[keep], breaks, np.nan),
+                mode='lines',
+                name=f"{obj} - {coord}",
+                line=dict(color=color, dash=dash_styles.get(coord, 'solid')),
+                legendgroup=str(obj),
+                showlegend=True
+            ))
+
+    if view == "xyzt":
+        update_xyzt_layout(fig)
+    else:
+        update_coord_figure_layout(fig, f"{coords[0]} versus time", coords[0])
+    # Zoom de l'utilisateur conservé quand la figure est remplacée par sa version rechargée
+    fig.update_layout(uirevision=view)
+    if t0 is not None:
+        fig.update_xaxes(range=[t0, t1])
+    return fig
+
+
 ######### ----- Fonctions dt ----- ##########
 
 def euclidean_distance(df1, df2):
@@ -636,21 +1923,41 @@ def euclidean_distance(df1, df2):
         (df1['ZSplined'] - df2['ZSplined']) ** 2
     )
 
-def add_distance_trace(fig, df1, df2, obj1, obj2, color):
+def pair_distances(store, obj1, obj2):
     """
-    Ajoute une courbe de distance en fonction du temps entre deux objets.
+    Distance entre deux objets à chaque frame où ils sont tous deux observés.
+
+    Les paires qui ne coexistent jamais sont écartées par l'index des durées de vie ; les frames
+    communes sont lues directement dans le tenseur dense s'il est avantageux, sinon obtenues par
+    intersection des frames des deux objets.
+
+    Retour :
+        tuple : (temps, distances)
     """
-    common_times = pd.merge(df1[['time']], df2[['time']], on='time')
-    df1_aligned = pd.merge(common_times, df1, on='time')
-    df2_aligned = pd.merge(common_times, df2, on='time')
+    code1, code2 = pd.Index(store.objects).get_indexer(pd.Index([obj1, obj2]))
+    if code1 < 0 or code2 < 0 or not store.lifetimes.overlaps(code1, code2):
+        return np.empty(0), np.empty(0)
 
-    if df1_aligned.empty or df2_aligned.empty:
-        return
+    if _use_dense(store):
+        frames, distances = store.dense().pair_distance(code1, code2)
+        return store.times[frames], distances
+
+    rows1 = np.flatnonzero(store.codes == code1)
+    rows2 = np.flatnonzero(store.codes == code2)
+    frames, idx1, idx2 = np.intersect1d(store.frames[rows1], store.frames[rows2], return_indices=True)
+    distances = np.sqrt(((store.xyz[rows1[idx1]] - store.xyz[rows2[idx2]]) ** 2).sum(axis=1))
+    return store.times[frames], distances
 
-    distances = euclidean_distance(df1_aligned, df2_aligned)
+
+def add_distance_trace(fig, times, distances, obj1, obj2, color):
+    """
+    Ajoute une courbe de distance en fonction du temps entre deux objets (voir pair_distances).
+    """
+    if len(times) == 0:
+        return
 
     fig.add_trace(go.Scatter(
-        x=common_times['time'],
+        x=times,
         y=distances,
         mode='lines',
         name=f"Distance {obj1} - {obj2}",
@@ -663,100 +1970,275 @@ def add_distance_trace(fig, df1, df2, obj1, obj2, color):
 
 
 ######## ------ Fonctions Options ------- ##########
-def get_objects_with_star_3d(df, selected_objects, selected_time, distance_threshold=0.1, min_vectors=2):
+# Cosinus minimal entre la direction de vol d'une source et la direction de sa cible
+POINTING_MIN_COSINE = 0.9
+
+POINTING_EVENT_COLUMNS = ["frame", "time", "source", "target"]
+
+# Distance maximale d'un pointage proposée dans l'interface
+MAX_POINTING_DISTANCE = 1.0
+
+# Nombre maximal de paires candidates examinées à la fois par compute_pointing_events
+POINTING_CHUNK_PAIRS = 2 ** 22
+
+
+def compute_pointing_events(df, distance_threshold=0.1, store=None):
+    """
+    Table de tous les pointages de l'enregistrement, en une passe.
+
+    Une source pointe une cible de la même frame si sa direction de vol fait un cosinus
+    > POINTING_MIN_COSINE avec la direction de la cible, à une distance <= distance_threshold.
+    Les paires candidates viennent de la recherche de paires proches, par blocs de frames
+    d'environ POINTING_CHUNK_PAIRS paires : seuls les pointages retenus sont conservés, si bien
+    que la mémoire ne croît pas avec le carré du nombre d'objets sur tout l'enregistrement.
+    Les deux sens de chaque paire sont évalués en opérations vectorisées.
+
+    Paramètres :
+        df (pd.DataFrame) : trajectoires issues de parse_contents
+        distance_threshold (float) : distance maximale entre la source et la cible
+        store (TrajectoryStore) : trajectoires indexées par frame, construites si absentes
+
+    Retour :
+        pd.DataFrame : colonnes 'frame', 'time', 'source', 'target', triées par (frame, source, cible)
+    """
+    store = ensure_store(df, store)
+    if store.vxyz is None or distance_threshold is None or distance_threshold <= 0:
+        return pd.DataFrame({col: [] for col in POINTING_EVENT_COLUMNS})
+
+    # distance <= seuil : seuil strict juste au-dessus de distance_threshold
+    cutoff = np.nextafter(distance_threshold, np.inf)
+    sources, targets = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)]
+    bounds = _frame_blocks(np.diff(store.frame_offsets), POINTING_CHUNK_PAIRS)
+    for f0, f1 in zip(bounds[:-1], bounds[1:]):
+        r0, r1 = store.frame_offsets[f0], store.frame_offsets[f1]
+        if r1 - r0 < 2:
+            continue
+        i, j, _ = find_close_pairs_parallel(store.frames[r0:r1], store.xyz[r0:r1], cutoff)
+        source, target = _pointing_pairs(store, i + r0, j + r0, distance_threshold)
+        sources.append(source)
+        targets.append(target)
+    source, target = np.concatenate(sources), np.concatenate(targets)
+
+    order = np.lexsort((store.codes[target], store.codes[source], store.frames[source]))
+    source, target = source[order], target[order]
+    frames = store.frames[source]
+
+    return pd.DataFrame({
+        "frame": frames.astype(np.int32),
+        "time": store.times[frames],
+        "source": store.objects[store.codes[source]],
+        "target": store.objects[store.codes[target]]
+    })
+
+
+def _pointing_pairs(store, i, j, distance_threshold):
+    """Sources et cibles (lignes du store) des pointages parmi les paires proches (i, j), dans les deux sens."""
+    other = store.codes[i] != store.codes[j]
+    source = np.concatenate([i[other], j[other]])
+    target = np.concatenate([j[other], i[other]])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        velocities = store.vxyz[source]
+        norm = np.sqrt((velocities ** 2).sum(axis=1))
+        source_dir = velocities / norm[:, None]
+
+        vector_to_target = store.xyz[target] - store.xyz[source]
+        distance = np.sqrt((vector_to_target ** 2).sum(axis=1))
+        dir_to_target = vector_to_target / distance[:, None]
+        dot_product = (source_dir * dir_to_target).sum(axis=1)
+
+    pointing = (dot_product > POINTING_MIN_COSINE) & (distance <= distance_threshold) & (distance != 0) & (norm != 0)
+    return source[pointing], target[pointing]
+
+
+def star_events(pointing_events, min_vectors=2, selected_objects=None):
+    """
+    Chronologie des étoiles : objets pointés par au moins min_vectors autres objets, frame par frame.
+
+    Paramètres :
+        pointing_events (pd.DataFrame) : table de compute_pointing_events
+        min_vectors (int) : nombre minimal de sources pointant la cible
+        selected_objects (list) : si fourni, seuls les pointages entre objets sélectionnés comptent
+
+    Retour :
+        pd.DataFrame : colonnes 'frame', 'time', 'star', 'pointer_count', triées par frame
+    """
+    events = pointing_events
+    if selected_objects is not None:
+        events = events[events["source"].isin(selected_objects) & events["target"].isin(selected_objects)]
+
+    stars = events.groupby(["frame", "time", "target"], sort=True).size().reset_index(name="pointer_count")
+    stars = stars[stars["pointer_count"] >= min_vectors]
+    return stars.rename(columns={"target": "star"}).reset_index(drop=True)
+
+
+def get_objects_with_star_3d(df, selected_objects, selected_time, distance_threshold=0.1, min_vectors=2,
+                             store=None, pointing_events=None):
     """
     Identifie les objets qui sont pointés par au moins min_vectors autres objets à un instant donné.
 
+    Si la table de compute_pointing_events (calculée avec le même distance_threshold) est fournie,
+    les pointages de la frame y sont simplement lus ; sinon toutes les paires de la frame sont
+    évaluées en une opération matricielle (positions lues dans le tenseur dense s'il est avantageux).
+
     Retourne aussi les vecteurs de direction vers les étoiles détectées.
     """
-    df_time = df[(df['time'] == selected_time) & (df['object'].isin(selected_objects))]
-
-    if df_time.empty:
+    store = ensure_store(df, store)
+    k = store.frame_index(selected_time)
+    if k is None or store.vxyz is None:
         return [], []
 
+    if pointing_events is not None:
+        frames = pointing_events["frame"].to_numpy()
+        events = pointing_events.iloc[np.searchsorted(frames, k, side="left"):np.searchsorted(frames, k, side="right")]
+        events = events[events["source"].isin(selected_objects) & events["target"].isin(selected_objects)]
+        pointing_pairs = [(int(a), int(b)) for a, b in zip(events["source"], events["target"])]
+    else:
+        pointing_pairs = _frame_pointing_pairs(store, k, selected_objects, distance_threshold)
+
+    # Étoiles dans l'ordre de leur premier pointage
     star_candidates = {}
-    pointing_pairs = []
+    for _, target_id in pointing_pairs:
+        star_candidates[target_id] = star_candidates.get(target_id, 0) + 1
 
-    for _, source_obj in df_time.iterrows():
-        source_id = int(source_obj['object'])
-        source_pos = np.array([source_obj['XSplined'], source_obj['YSplined'], source_obj['ZSplined']])
-        source_vel = np.array([source_obj['VXSplined'], source_obj['VYSplined'], source_obj['VZSplined']])
+    starred_objects = [obj_id for obj_id, count in star_candidates.items() if count >= min_vectors]
+    return starred_objects, pointing_pairs
 
-        norm = np.linalg.norm(source_vel)
-        if norm == 0:
-            continue
 
-        source_dir = source_vel / norm
+def _frame_pointing_pairs(store, k, selected_objects, distance_threshold):
+    """Pointages (source, cible) entre objets sélectionnés de la frame k, dans l'ordre (source, cible)."""
+    codes = np.unique(store.object_codes(selected_objects))
+    if _use_dense(store):
+        dense = store.dense()
+        codes = codes[dense.present[k, codes]]
+        positions, velocities = dense.positions[k, codes], dense.velocities[k, codes]
+    else:
+        frame_rows = store.frame_slice(k)
+        rows = np.arange(frame_rows.start, frame_rows.stop)
+        rows = rows[np.isin(store.codes[rows], codes)]
+        codes = store.codes[rows]
+        positions, velocities = store.xyz[rows], store.vxyz[rows]
 
-        for _, target_obj in df_time.iterrows():
-            target_id = int(target_obj['object'])
-            if target_id == source_id:
-                continue
+    if len(codes) == 0:
+        return []
 
-            target_pos = np.array([target_obj['XSplined'], target_obj['YSplined'], target_obj['ZSplined']])
-            vector_to_target = target_pos - source_pos
-            distance = np.linalg.norm(vector_to_target)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        norm = np.sqrt((velocities ** 2).sum(axis=1))
+        source_dir = velocities / norm[:, None]
 
-            if distance == 0:
-                continue
+        # vecteurs source -> cible, indexés [source, cible]
+        vector_to_target = positions[None, :, :] - positions[:, None, :]
+        distance = np.sqrt((vector_to_target ** 2).sum(axis=2))
+        dir_to_target = vector_to_target / distance[:, :, None]
+        dot_product = (source_dir[:, None, :] * dir_to_target).sum(axis=2)
 
-            dir_to_target = vector_to_target / distance
-            dot_product = np.dot(source_dir, dir_to_target)
+    pointing = ((dot_product > POINTING_MIN_COSINE) & (distance <= distance_threshold) & (distance != 0)
+                & (norm != 0)[:, None] & (codes[:, None] != codes[None, :]))
+    source_idx, target_idx = np.nonzero(pointing)
 
-            if dot_product > 0.9 and distance <= distance_threshold:
-                pointing_pairs.append((source_id, target_id))
-                star_candidates[target_id] = star_candidates.get(target_id, 0) + 1
+    ids = [int(obj) for obj in store.objects[codes]]
+    return [(ids[a], ids[b]) for a, b in zip(source_idx, target_idx)]
 
-    starred_objects = [obj_id for obj_id, count in star_candidates.items() if count >= min_vectors]
-    return starred_objects, pointing_pairs
 
+# Nombre maximal de distances calculées à la fois par compute_neighbors_count
+NEIGHBOR_CHUNK_DISTANCES = 2 ** 22
 
-def count_closest_neighbors_with_ties(df, tol=1e-6):
+
+def _frame_blocks(sizes, budget):
     """
-    Pour chaque objet dans le DataFrame donné, trouve les objets les plus proches
-    (en cas d'égalité, tous sont pris en compte) et incrémente leur compteur.
+    Bornes de blocs de groupes consécutifs (frames ou périodes d'échantillonnage) d'environ
+    `budget` paires (sizes ** 2 par groupe), sans jamais couper un groupe.
+    """
+    cost = np.cumsum(sizes.astype(np.int64) ** 2)
+    total = int(cost[-1]) if len(cost) else 0
+    cuts = np.searchsorted(cost, np.arange(budget, total, budget), side="right")
+    return np.unique(np.concatenate([[0], cuts, [len(sizes)]]))
 
-    df doit contenir les colonnes 'object', 'XSplined', 'YSplined', 'ZSplined'
 
-    Retour :
-    - dict {objet: nombre de fois où il est le plus proche d’un autre}
+def compute_neighbors_count(df, tol=1e-6, store=None):
     """
-    positions = {
-        row['object']: np.array([row['XSplined'], row['YSplined'], row['ZSplined']])
-        for _, row in df.iterrows()
-    }
+    Pour chaque observation, nombre d'objets de la même période d'échantillonnage (l'instant
+    affiché) dont elle est le plus proche voisin (en cas d'égalité à tol près, tous les plus
+    proches sont comptés), pour tout l'enregistrement.
 
-    neighbor_counts = {obj: 0 for obj in positions}
+    Toutes les distances entre objets d'une même période sont calculées par blocs de périodes,
+    en opérations NumPy groupées.
 
-    for obj1 in positions:
-        dists = {}
-        for obj2 in positions:
-            if obj1 == obj2:
-                continue
-            dist = np.linalg.norm(positions[obj1] - positions[obj2])
-            dists[obj2] = dist
+    Paramètres :
+        df (pd.DataFrame) : trajectoires issues de parse_contents
+        tol (float) : tolérance d'égalité des distances
+        store (TrajectoryStore) : trajectoires indexées par frame, construites si absentes
 
-        if not dists:
+    Retour :
+        np.ndarray : compte de chaque ligne du store (ordre (frame, object))
+    """
+    store = ensure_store(df, store)
+    counts = np.zeros(len(store), dtype=np.int64)
+    offsets = store.sample_offsets
+    samples = store.frames // store.grid.stride
+    sizes = np.diff(offsets)
+
+    # Blocs de périodes consécutives d'environ NEIGHBOR_CHUNK_DISTANCES distances
+    bounds = _frame_blocks(sizes, NEIGHBOR_CHUNK_DISTANCES)
+
+    for f0, f1 in zip(bounds[:-1], bounds[1:]):
+        r0, r1 = offsets[f0], offsets[f1]
+        if r1 - r0 < 2:
             continue
+        src = np.arange(r0, r1)
+        frame_size = sizes[samples[src]]
+        frame_start = offsets[samples[src]]
+        src_rep = np.repeat(src, frame_size)
+        dst = _expand_ranges(frame_start, frame_size)
+
+        dist = np.sqrt(((store.xyz[src_rep] - store.xyz[dst]) ** 2).sum(axis=1))
+        dist[(store.codes[src_rep] == store.codes[dst]) | np.isnan(dist)] = np.inf
+
+        # Distance minimale de chaque source (segments contigus de taille frame_size)
+        min_dist = np.minimum.reduceat(dist, np.cumsum(frame_size) - frame_size)
+        with np.errstate(invalid="ignore"):
+            ties = np.isfinite(dist) & (np.abs(dist - np.repeat(min_dist, frame_size)) <= tol)
+        counts[r0:r1] += np.bincount(dst[ties] - r0, minlength=r1 - r0)
 
-        min_dist = min(dists.values())
+    return counts
 
-        closest_objs = [obj for obj, dist in dists.items() if abs(dist - min_dist) <= tol]
 
-        for neighbor in closest_objs:
-            neighbor_counts[neighbor] += 1
+def count_closest_neighbors_with_ties(df, tol=1e-6):
+    """
+    Pour chaque objet dans le DataFrame donné, trouve les objets les plus proches
+    (en cas d'égalité, tous sont pris en compte) et incrémente leur compteur.
+
+    df doit contenir les colonnes 'object', 'XSplined', 'YSplined', 'ZSplined'
 
-    return neighbor_counts
+    Retour :
+    - dict {objet: nombre de fois où il est le plus proche d’un autre}
+    """
+    df = df.drop_duplicates(subset="object", keep="last")
+    positions = df[["XSplined", "YSplined", "ZSplined"]].to_numpy(dtype=float)
 
-def compute_speed_and_neighbors(df_t, color_by_neighbors):
-    df_t["speed"] = np.sqrt(df_t["VXSplined"] ** 2 + df_t["VYSplined"] ** 2 + df_t["VZSplined"] ** 2)
-    df_t["neighbors_count"] = 0
+    dist = np.sqrt(((positions[:, None, :] - positions[None, :, :]) ** 2).sum(axis=2))
+    np.fill_diagonal(dist, np.inf)
+    min_dist = dist.min(axis=1, initial=np.inf)
+    with np.errstate(invalid="ignore"):
+        ties = np.isfinite(dist) & (np.abs(dist - min_dist[:, None]) <= tol)
+
+    return dict(zip(df["object"], ties.sum(axis=0).tolist()))
+
+def compute_speed_and_neighbors(df_t, color_by_neighbors, neighbors_count=None):
+    # Colonne 'speed' calculée au chargement par add_kinematics
+    if "speed" not in df_t.columns:
+        df_t["speed"] = np.sqrt(df_t["VXSplined"] ** 2 + df_t["VYSplined"] ** 2 + df_t["VZSplined"] ** 2)
 
     if "neighbors" in color_by_neighbors:
-        neighbor_counts = count_closest_neighbors_with_ties(df_t)
-        df_t["neighbors_count"] = df_t["object"].map(neighbor_counts)
-        max_neighbors = max(neighbor_counts.values()) if neighbor_counts else 1
+        # Comptes calculés une fois pour tout l'enregistrement (DetectionCache.neighbors_count),
+        # alignés sur l'index des lignes de l'instant
+        if neighbors_count is not None:
+            df_t["neighbors_count"] = neighbors_count
+        else:
+            df_t["neighbors_count"] = df_t["object"].map(count_closest_neighbors_with_ties(df_t))
+        max_neighbors = int(df_t["neighbors_count"].max()) if not df_t.empty else 1
     else:
+        df_t["neighbors_count"] = 0
         max_neighbors = 1
 
     return df_t, max_neighbors